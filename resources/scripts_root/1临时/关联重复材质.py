@@ -3,6 +3,11 @@
 # 功能：关联重复材质，并可选择性地删除不再使用的材质。
 # 作者：一位独具风格的小说家
 #
+# 判重方式：不再看名字后缀，而是给每个材质的节点树算一个"结构哈希"
+# (节点类型、节点属性、未连接的插槽值、常量节点的输出值、连线关系、引用的图像数据块)。
+# 哈希相同的材质才算重复，名字毫不相干也能合并，同名但内容不同的则不会误合并；
+# 合并前还会逐节点复核一遍，哈希漏掉的差异也不会导致误删。
+#
 # =========================================================================
 #  ！！！ 警 告 ！！！
 #  此脚本会直接修改你的场景数据，特别是开启删除功能后，操作不可逆！
@@ -10,6 +15,223 @@
 # =========================================================================
 
 import bpy
+import hashlib
+import re
+
+# --- 配置区 ---
+DRY_RUN = True             # 只打印报告，不做任何修改。确认无误后改成 False
+REMOVE_DUPLICATES = True   # 合并后删除被替换掉的重复材质 (只删它们，不影响别的数据)
+PURGE_ORPHANS = False      # 额外执行一次全局 orphans_purge (旧脚本的行为)
+FLOAT_DIGITS = 5           # 浮点数比较精度
+
+# 通用属性里与外观无关、不应参与哈希的字段
+SKIP_PROPS = {
+    'rna_type', 'name', 'name_full', 'label', 'location', 'width', 'width_hidden', 'height',
+    'dimensions', 'select', 'show_options', 'show_preview', 'show_texture', 'hide', 'mute',
+    'parent', 'use_custom_color', 'color', 'bl_idname', 'bl_label', 'bl_description',
+    'bl_icon', 'bl_static_type', 'bl_width_default', 'bl_width_min', 'bl_width_max',
+    'bl_height_default', 'bl_height_min', 'bl_height_max', 'type', 'internal_links',
+    'inputs', 'outputs', 'is_active_output', 'warning_propagation', 'color_tag',
+    'users', 'use_fake_user', 'use_extra_user', 'is_embedded_data', 'is_evaluated',
+    'is_missing', 'is_runtime_data', 'is_library_indirect', 'is_editmode', 'tag',
+    'session_uid', 'original', 'preview', 'asset_data', 'library', 'library_weak_reference',
+    'override_library', 'id_type', 'node_tree', 'paint_active_slot', 'texture_paint_images',
+    'texture_paint_slots', 'preview_render_type', 'pass_index', 'line_priority',
+}
+
+
+def _value_key(value):
+    """把各种 RNA 值转成可哈希、可稳定排序的形式"""
+    if isinstance(value, float):
+        return round(value, FLOAT_DIGITS)
+    if isinstance(value, (bool, int, str)) or value is None:
+        return value
+    if isinstance(value, bpy.types.ID):
+        # 数据块(图像/节点组/物体)按身份比较
+        return ("ID", type(value).__name__, value.name_full)
+    try:
+        return tuple(_value_key(v) for v in value)
+    except TypeError:
+        return repr(value)
+
+
+def rna_signature(struct):
+    """读取一个 RNA 结构上所有简单属性/数据块指针，生成排序后的签名"""
+    items = []
+    for prop in struct.bl_rna.properties:
+        ident = prop.identifier
+        if ident in SKIP_PROPS:
+            continue
+        if prop.type in {'BOOLEAN', 'INT', 'FLOAT', 'STRING', 'ENUM'}:
+            items.append((ident, _value_key(getattr(struct, ident))))
+        elif prop.type == 'POINTER':
+            value = getattr(struct, ident)
+            if isinstance(value, bpy.types.ID):
+                items.append((ident, _value_key(value)))
+            elif isinstance(value, bpy.types.ColorRamp):
+                items.append((ident, rna_signature(value),
+                              tuple((round(e.position, FLOAT_DIGITS), _value_key(e.color)) for e in value.elements)))
+            elif isinstance(value, bpy.types.CurveMapping):
+                items.append((ident, tuple(
+                    tuple((_value_key(p.location), p.handle_type) for p in c.points) for c in value.curves)))
+    return tuple(items)
+
+
+class NodeTreeHasher:
+    """
+    从输出节点往上游递归算哈希：节点哈希 = 自身签名 + 每个输入插槽(连线来源的哈希 或 默认值)。
+    与节点名字、位置、未连接的孤立节点都无关，所以改名/挪位置不影响判重。
+    """
+
+    def __init__(self):
+        self.tree_cache = {}
+        self.node_hashes = {}    # 节点树指针 -> {节点指针: 哈希}，只含从输出能到达的节点
+
+    def tree_hash(self, tree):
+        key = tree.as_pointer()
+        cached = self.tree_cache.get(key)
+        if cached is not None:
+            return cached
+
+        incoming = {}
+        for link in tree.links:
+            if link.is_muted or not link.is_valid:
+                continue
+            incoming.setdefault(link.to_socket.as_pointer(), []).append(link)
+
+        node_cache = {}
+
+        def node_hash(node):
+            cached_node = node_cache.get(node.as_pointer())
+            if cached_node is not None:
+                return cached_node
+            parts = [node.bl_idname, repr(rna_signature(node)), str(node.mute)]
+            if getattr(node, "node_tree", None) is not None:
+                # 节点组：按组内结构哈希，而不是组的名字
+                parts.append(self.tree_hash(node.node_tree))
+            if not node.inputs:
+                # 值/RGB 这类常量节点，数值存在输出插槽上
+                parts.extend(f"out:{sock.identifier}={_value_key(sock.default_value)!r}"
+                             for sock in node.outputs if hasattr(sock, "default_value"))
+            for sock in node.inputs:
+                if not sock.enabled:
+                    continue
+                links = incoming.get(sock.as_pointer())
+                if links:
+                    sources = sorted(f"{node_hash(l.from_node)}:{l.from_socket.identifier}" for l in links)
+                    parts.append(f"{sock.identifier}<-{'|'.join(sources)}")
+                elif hasattr(sock, "default_value"):
+                    parts.append(f"{sock.identifier}={_value_key(sock.default_value)!r}")
+            digest = hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+            node_cache[node.as_pointer()] = digest
+            return digest
+
+        outputs = [n for n in tree.nodes if not n.outputs or n.bl_idname in {
+            'ShaderNodeOutputMaterial', 'NodeGroupOutput', 'ShaderNodeOutputWorld', 'ShaderNodeOutputLight'}]
+        roots = sorted(f"{getattr(n, 'target', '')}:{getattr(n, 'is_active_output', True)}:{node_hash(n)}"
+                       for n in outputs)
+        digest = hashlib.sha1("\n".join(roots).encode("utf-8")).hexdigest()
+        self.tree_cache[key] = digest
+        self.node_hashes[key] = node_cache
+        return digest
+
+
+def material_hash(mat, hasher):
+    parts = [repr(rna_signature(mat)), str(mat.use_nodes)]
+    if mat.use_nodes and mat.node_tree:
+        parts.append(hasher.tree_hash(mat.node_tree))
+    if mat.grease_pencil:
+        parts.append(repr(rna_signature(mat.grease_pencil)))
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _socket_values(sockets):
+    """连着线的输入插槽的默认值不起作用，不参与比较"""
+    return tuple((sock.identifier, sock.enabled,
+                  _value_key(sock.default_value)
+                  if hasattr(sock, "default_value") and not (sock.is_linked and not sock.is_output) else None)
+                 for sock in sockets)
+
+
+def trees_identical(a, b, hasher):
+    """
+    删除前的逐节点复核：哈希只是分组依据，真正合并前再把两棵树的可达节点一一比对
+    (全部属性 + 输入/输出插槽值 + 连线)，避免哈希漏掉的字段把不同的材质合并掉
+    """
+    if a == b:
+        return True
+    if hasher.tree_hash(a) != hasher.tree_hash(b):
+        return False
+    hashes_a = hasher.node_hashes[a.as_pointer()]
+    hashes_b = hasher.node_hashes[b.as_pointer()]
+    nodes_a = sorted((n for n in a.nodes if n.as_pointer() in hashes_a), key=lambda n: hashes_a[n.as_pointer()])
+    nodes_b = sorted((n for n in b.nodes if n.as_pointer() in hashes_b), key=lambda n: hashes_b[n.as_pointer()])
+    if len(nodes_a) != len(nodes_b):
+        return False
+    for na, nb in zip(nodes_a, nodes_b):
+        if (na.bl_idname, rna_signature(na), na.mute, _socket_values(na.inputs), _socket_values(na.outputs)) != \
+                (nb.bl_idname, rna_signature(nb), nb.mute, _socket_values(nb.inputs), _socket_values(nb.outputs)):
+            return False
+        group_a, group_b = getattr(na, "node_tree", None), getattr(nb, "node_tree", None)
+        if (group_a is None) != (group_b is None):
+            return False
+        if group_a is not None and not trees_identical(group_a, group_b, hasher):
+            return False
+
+    def link_set(tree, hashes):
+        return sorted((hashes[l.from_node.as_pointer()], l.from_socket.identifier,
+                       hashes[l.to_node.as_pointer()], l.to_socket.identifier)
+                      for l in tree.links
+                      if not l.is_muted and l.is_valid
+                      and l.from_node.as_pointer() in hashes and l.to_node.as_pointer() in hashes)
+
+    return link_set(a, hashes_a) == link_set(b, hashes_b)
+
+
+def materials_identical(a, b, hasher):
+    if (rna_signature(a), a.use_nodes) != (rna_signature(b), b.use_nodes):
+        return False
+    if bool(a.grease_pencil) != bool(b.grease_pencil):
+        return False
+    if a.grease_pencil and rna_signature(a.grease_pencil) != rna_signature(b.grease_pencil):
+        return False
+    if not a.use_nodes:
+        return True
+    if (a.node_tree is None) != (b.node_tree is None):
+        return False
+    return a.node_tree is None or trees_identical(a.node_tree, b.node_tree, hasher)
+
+
+_SUFFIX = re.compile(r"\.\d{3,}$")
+
+
+def _keeper_rank(mat):
+    """组内保留谁：优先没有 .001 后缀的，其次用户多的，最后按名字，保证结果确定"""
+    return (bool(_SUFFIX.search(mat.name)), -mat.users, mat.name)
+
+
+def find_duplicate_groups():
+    hasher = NodeTreeHasher()
+    groups = {}
+    for mat in bpy.data.materials:
+        if mat.library:
+            continue
+        groups.setdefault(material_hash(mat, hasher), []).append(mat)
+    result = []
+    for mats in groups.values():
+        if len(mats) > 1:
+            mats.sort(key=_keeper_rank)
+            same = [mats[0]]
+            for mat in mats[1:]:
+                if materials_identical(mats[0], mat, hasher):
+                    same.append(mat)
+                else:
+                    print(f"  哈希相同但逐节点比对不一致，不合并: '{mat.name}' vs '{mats[0].name}'")
+            if len(same) > 1:
+                result.append(same)
+    result.sort(key=lambda g: g[0].name)
+    return result
+
 
 def clean_and_purge_materials():
     """
@@ -18,57 +240,48 @@ def clean_and_purge_materials():
     print("==============================================")
     print("开始执行材质清理与净化脚本...")
 
-    # --- 第一步：构建原始材质索引库 (逻辑不变) ---
-    all_materials = bpy.data.materials
-    if not all_materials:
+    # --- 第一步：按结构哈希分组 ---
+    if not bpy.data.materials:
         print("场景中没有任何材质，脚本已停止。")
         print("==============================================")
         return
 
-    base_materials_map = {}
-    for mat in all_materials:
-        if '.' not in mat.name:
-            base_materials_map[mat.name] = mat
-    
-    if not base_materials_map:
-        print("警告：未找到任何不带后缀的“原始材质”，无法进行替换。")
+    groups = find_duplicate_groups()
+    if not groups:
+        print("检查完毕，未发现内容重复的材质。")
         print("==============================================")
         return
 
-    print(f"已找到 {len(base_materials_map)} 个原始材质作为替换基准。")
+    duplicate_total = sum(len(g) - 1 for g in groups)
+    print(f"找到 {len(groups)} 组重复材质，共 {duplicate_total} 个可合并：")
+    for mats in groups:
+        keeper, dups = mats[0], mats[1:]
+        print(f"  保留 '{keeper.name}' <- " + ", ".join(f"'{m.name}'({m.users})" for m in dups))
 
-    # --- 第二步：重新关联材质 (逻辑不变) ---
-    remapped_count = 0
-    for obj in bpy.context.scene.objects:
-        if obj.type != 'MESH' or not obj.material_slots:
-            continue
-            
-        for slot in obj.material_slots:
-            if slot.material:
-                base_name = slot.material.name.split('.')[0]
-                
-                if base_name in base_materials_map:
-                    original_mat = base_materials_map[base_name]
-                    
-                    if slot.material != original_mat:
-                        slot.material = original_mat
-                        remapped_count += 1
-    
-    if remapped_count > 0:
-        print(f"\n步骤一完成：成功将 {remapped_count} 个重复材质槽关联回原始材质。")
-    else:
-        print("\n步骤一完成：检查完毕，未发现需要重新关联的材质。")
+    if DRY_RUN:
+        print("\nDRY_RUN 模式：只输出报告，没有修改任何数据。")
+        print("==============================================")
+        return
+
+    # --- 第二步：user_remap 一次性替换所有引用 (物体槽、网格槽、节点等全都覆盖) ---
+    removed = 0
+    for mats in groups:
+        keeper = mats[0]
+        for dup in mats[1:]:
+            dup.user_remap(keeper)
+            if REMOVE_DUPLICATES and dup.users == 0:
+                bpy.data.materials.remove(dup)
+                removed += 1
+
+    print(f"\n步骤一完成：已把 {duplicate_total} 个重复材质的引用关联到保留材质，删除 {removed} 个。")
 
     # =========================================================================
-    # --- 新增！第三步：删除孤立无用的数据 ---
-    # 下面这行代码是Blender的“大扫除”命令。
-    # 它会删除掉所有不再被任何对象使用的材质、网格、图像等数据。
-    # 默认已注释掉（关闭状态）以防意外。
-    # 如果你确认要删除，请将下面这行代码开头的 '#' 和空格删掉。
+    # --- 可选：全局大扫除 ---
+    # 会删除掉所有不再被任何对象使用的材质、网格、图像等数据，范围远大于本脚本。
     # =========================================================================
-    
-    bpy.ops.outliner.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
-    
+    if PURGE_ORPHANS:
+        bpy.ops.outliner.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+
     print("\n脚本执行结束。")
     print("==============================================")
 
@@ -1,27 +1,210 @@
 # script_id: 598adb10-c2d9-46d8-9480-fdb0b50f9ab6
 import bpy
+import os
+import csv
+import json
+import numpy as np
+
+# =============================================================================
+#  场景面数/内存统计
+#  - 只取一次 depsgraph，遍历 object_instances，实例化(集合实例/粒子/几何节点)也计入
+#  - 直接读评估后网格的数量，三角面数 = 面角数 - 2 × 面数，不再 to_mesh()
+#  - 每个物体的结果按 "网格 + 修改器 + 修改器引用的物体 + 评估后网格 + 帧" 指纹缓存在会话里，
+#    场景没变时再次统计几乎免费；实例 (几何节点/粒子/集合实例) 的评估网格不属于某个原始物体，
+#    不进会话缓存，只在本次统计里按评估网格去重
+#  - 输出按物体 / 集合 / 材质汇总，可导出 CSV / JSON
+# =============================================================================
+
+SORT_KEY = 'tris'          # 排序字段: 'tris' / 'verts' / 'faces' / 'memory' / 'instances'
+EXPORT_CSV = False
+EXPORT_JSON = False
+CACHE_KEY = "scene_mesh_stats_cache"
+
+# 每个元素的大致字节数 (位置/索引等核心数据，用来做预算估计)
+BYTES_PER_VERT = 12
+BYTES_PER_EDGE = 8
+BYTES_PER_LOOP = 8
+BYTES_PER_FACE = 12
+BYTES_PER_UV_LOOP = 8
+
+
+def _simple_props(struct):
+    items = []
+    for prop in struct.bl_rna.properties:
+        if prop.type in {'BOOLEAN', 'INT', 'FLOAT', 'ENUM', 'STRING'} and prop.identifier != 'rna_type':
+            value = getattr(struct, prop.identifier)
+            items.append(tuple(value) if getattr(prop, "is_array", False) else value)
+        elif prop.type == 'POINTER':
+            value = getattr(struct, prop.identifier)
+            if isinstance(value, bpy.types.ID):
+                items.append(value.name_full)
+    return tuple(items)
+
+
+def _modifier_inputs(mod):
+    """修改器引用的物体：RNA 指针 (布尔对象、镜像对象…) 和几何节点的物体输入"""
+    refs = [getattr(mod, p.identifier) for p in mod.bl_rna.properties if p.type == 'POINTER']
+    if mod.type == 'NODES':
+        refs.extend(mod[k] for k in mod.keys())
+    return [r for r in refs if isinstance(r, bpy.types.Object)]
+
+
+def _input_signature(obj):
+    """被引用物体的变换和网格数量，它们变了引用者的评估结果也会变"""
+    data = obj.data
+    counts = (len(data.vertices), len(data.polygons)) if obj.type == 'MESH' else ()
+    return (obj.name_full, tuple(v for row in obj.matrix_world for v in row),
+            data.name_full if data else "", counts)
+
+
+def object_fingerprint(obj, frame):
+    """网格数据 + 修改器设置和它引用的物体 (+ 有动画/形态键/几何节点时的当前帧)"""
+    data = obj.data
+    mods = tuple((m.type, _simple_props(m), tuple(_input_signature(o) for o in _modifier_inputs(m)))
+                 for m in obj.modifiers)
+    time_dependent = (obj.animation_data is not None
+                      or (getattr(data, "shape_keys", None) is not None)
+                      or any(m.type == 'NODES' for m in obj.modifiers))
+    return (data.name_full if data else "",
+            len(data.vertices), len(data.edges), len(data.polygons),
+            tuple(uv.name for uv in data.uv_layers),
+            mods, frame if time_dependent else None)
+
+
+def evaluated_signature(eval_obj):
+    """评估后网格的数量、UV 层和材质槽；这些都没变时统计结果才可以复用"""
+    mesh = eval_obj.data
+    return (len(mesh.vertices), len(mesh.edges), len(mesh.loops), len(mesh.polygons),
+            len(mesh.uv_layers),
+            tuple(slot.material.name_full if slot.material else "" for slot in eval_obj.material_slots))
+
+
+def measure_evaluated(eval_obj):
+    """读取评估后网格的统计，不构建新网格"""
+    mesh = eval_obj.data
+    verts, edges, loops, faces = len(mesh.vertices), len(mesh.edges), len(mesh.loops), len(mesh.polygons)
+    tris = loops - 2 * faces
+    memory = (verts * BYTES_PER_VERT + edges * BYTES_PER_EDGE + loops * BYTES_PER_LOOP
+              + faces * BYTES_PER_FACE + loops * BYTES_PER_UV_LOOP * len(mesh.uv_layers))
+
+    per_material = {}
+    if faces:
+        mat_index = np.empty(faces, dtype=np.int32)
+        loop_total = np.empty(faces, dtype=np.int32)
+        mesh.polygons.foreach_get("material_index", mat_index)
+        mesh.polygons.foreach_get("loop_total", loop_total)
+        tri_per_slot = np.bincount(mat_index, weights=loop_total - 2)
+        slots = eval_obj.material_slots
+        for slot_index, count in enumerate(tri_per_slot):
+            if count <= 0:
+                continue
+            mat = slots[slot_index].material if slot_index < len(slots) else None
+            name = mat.name if mat else "<无材质>"
+            per_material[name] = per_material.get(name, 0) + int(count)
+
+    return {"verts": verts, "faces": faces, "tris": tris, "memory": memory, "per_material": per_material}
+
+
+def instance_collection(instance):
+    """实例算到它的实例化者所在的集合；普通物体算到自己的第一个集合"""
+    owner = instance.parent.original if instance.is_instance and instance.parent else instance.object.original
+    cols = owner.users_collection
+    return cols[0].name if cols else "<无集合>"
+
+
+def collect_scene_stats(context):
+    depsgraph = context.evaluated_depsgraph_get()   # 只取一次
+    frame = context.scene.frame_current
+    cache = bpy.app.driver_namespace.setdefault(CACHE_KEY, {})
+
+    per_object = {}
+    per_collection = {}
+    per_material = {}
+    instance_stats = {}      # 本次统计内：评估网格指针 -> 统计 (同一网格被实例化多次只量一次)
+    hits = misses = 0
+
+    for instance in depsgraph.object_instances:
+        eval_obj = instance.object
+        if eval_obj.type != 'MESH':
+            continue
+        original = eval_obj.original
+        key = original.name_full
+        if instance.is_instance:
+            # 实例的 original 是实例化者，不能拿它的指纹代表实例网格
+            memo_key = (eval_obj.data.as_pointer(), evaluated_signature(eval_obj))
+            stats = instance_stats.get(memo_key)
+            if stats is None:
+                stats = instance_stats[memo_key] = measure_evaluated(eval_obj)
+                misses += 1
+            else:
+                hits += 1
+        else:
+            fingerprint = (object_fingerprint(original, frame), evaluated_signature(eval_obj))
+            cached = cache.get(key)
+            if cached and cached[0] == fingerprint:
+                stats = cached[1]
+                hits += 1
+            else:
+                stats = measure_evaluated(eval_obj)
+                cache[key] = (fingerprint, stats)
+                misses += 1
+
+        row = per_object.setdefault(key, {"name": key, "instances": 0, "verts": 0, "faces": 0,
+                                          "tris": 0, "memory": stats["memory"]})
+        row["instances"] += 1
+        for field in ("verts", "faces", "tris"):
+            row[field] += stats[field]
+
+        col = per_collection.setdefault(instance_collection(instance),
+                                        {"verts": 0, "faces": 0, "tris": 0, "instances": 0})
+        col["instances"] += 1
+        for field in ("verts", "faces", "tris"):
+            col[field] += stats[field]
+
+        for mat_name, tris in stats["per_material"].items():
+            per_material[mat_name] = per_material.get(mat_name, 0) + tris
+
+    return per_object, per_collection, per_material, hits, misses
+
+
+def export_stats(per_object, per_collection, per_material):
+    base = bpy.path.abspath("//") or os.getcwd()
+    if EXPORT_CSV:
+        path = os.path.join(base, "scene_stats.csv")
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=["name", "instances", "verts", "faces", "tris", "memory"])
+            writer.writeheader()
+            writer.writerows(per_object)
+        print(f"已导出 CSV: {path}")
+    if EXPORT_JSON:
+        path = os.path.join(base, "scene_stats.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"objects": per_object, "collections": per_collection, "materials": per_material},
+                      f, ensure_ascii=False, indent=2)
+        print(f"已导出 JSON: {path}")
+
 
 def print_objects_face_count():
-    # 存放 (名字, 面数) 的列表
-    obj_face_list = []
-
-    for obj in bpy.context.scene.objects:
-        if obj.type == 'MESH':
-            # 使用 evaluated 版本以获取 modifiers 后的面数
-            depsgraph = bpy.context.evaluated_depsgraph_get()
-            eval_obj = obj.evaluated_get(depsgraph)
-            mesh = eval_obj.to_mesh()
-            face_count = len(mesh.polygons)
-            obj_face_list.append((obj.name, face_count))
-            eval_obj.to_mesh_clear()
-
-    # 按面数从多到少排序
-    obj_face_list.sort(key=lambda x: x[1], reverse=True)
+    per_object, per_collection, per_material, hits, misses = collect_scene_stats(bpy.context)
+
+    # 按指定字段从多到少排序
+    rows = sorted(per_object.values(), key=lambda r: r[SORT_KEY], reverse=True)
 
     # 输出
-    print("对象面数统计 (单位: 万面)")
-    for name, count in obj_face_list:
-        print(f"{name:<20}  {count/10000:.2f} 万面")
+    print(f"对象面数统计 (单位: 万面) —— 缓存命中 {hits}，重新统计 {misses}")
+    for r in rows:
+        print(f"{r['name']:<20}  {r['faces']/10000:.2f} 万面  {r['tris']/10000:.2f} 万三角  "
+              f"{r['verts']/10000:.2f} 万点  x{r['instances']}  ≈{r['memory']/2**20:.2f} MB")
+
+    print("\n按集合汇总 (三角面)")
+    for name, c in sorted(per_collection.items(), key=lambda kv: kv[1]["tris"], reverse=True):
+        print(f"{name:<20}  {c['tris']/10000:.2f} 万三角  {c['verts']/10000:.2f} 万点  {c['instances']} 个实例")
+
+    print("\n按材质汇总 (三角面)")
+    for name, tris in sorted(per_material.items(), key=lambda kv: kv[1], reverse=True):
+        print(f"{name:<20}  {tris/10000:.2f} 万三角")
+
+    export_stats(rows, per_collection, per_material)
 
 # 调用
 print_objects_face_count()
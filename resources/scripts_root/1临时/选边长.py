@@ -4,27 +4,135 @@
 # 我是你的可爱小助手，这次带来了兼容性更强的“用完即焚”工具！(ฅ'ω'ฅ)
 import bpy
 import bmesh
+import numpy as np
 from bpy.props import EnumProperty, BoolProperty
 
 classes_to_manage = []
 
-# --- 核心功能 (不变) ---
+# --- 核心功能 (预计算 + 二分查找版) ---
+HIST_BARS = "▁▂▃▄▅▆▇█"
+HIST_BINS = 24
+
+
+def compute_sorted_sizes(obj, mode):
+    """一次性读出所有面积/边长并排序，返回 (升序尺寸, 对应元素索引)"""
+    # 把编辑中的 bmesh 同步回网格数据，这样就能用 foreach_get 批量读取了
+    obj.update_from_editmode()
+    mesh = obj.data
+    if mode == 'FACE':
+        sizes = np.empty(len(mesh.polygons), dtype=np.float64)
+        mesh.polygons.foreach_get("area", sizes)
+    else:
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float64)
+        mesh.vertices.foreach_get("co", co)
+        edge_verts = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+        mesh.edges.foreach_get("vertices", edge_verts)
+        co = co.reshape(-1, 3)
+        edge_verts = edge_verts.reshape(-1, 2)
+        sizes = np.linalg.norm(co[edge_verts[:, 0]] - co[edge_verts[:, 1]], axis=1)
+    order = np.argsort(sizes, kind='stable')
+    return sizes[order], order
+
+
+def build_histogram(sorted_sizes, bins=HIST_BINS):
+    """按对数刻度统计尺寸分布，返回 (每格字符, 分箱边界)；尺寸跨度通常好几个数量级"""
+    if len(sorted_sizes) == 0:
+        return [], np.zeros(0)
+    positive = sorted_sizes[sorted_sizes > 0]
+    if len(positive) == 0:
+        return [HIST_BARS[-1]], np.array([0.0, 1.0])
+    lo, hi = np.log10(positive[0]), np.log10(positive[-1])
+    if hi - lo < 1e-6:
+        hi = lo + 1e-6
+    edges = np.logspace(lo, hi, bins + 1)
+    counts, _ = np.histogram(np.clip(sorted_sizes, edges[0], edges[-1]), bins=edges)
+    levels = np.zeros(bins, dtype=np.int64)
+    peak = counts.max()
+    if peak > 0:
+        # 有元素的格子至少显示最矮的一档，避免"看起来是空的"
+        levels = np.where(counts > 0, np.ceil(counts / peak * len(HIST_BARS)).astype(np.int64), 0)
+    return [HIST_BARS[l - 1] if l > 0 else " " for l in levels], edges
+
+
+class SizeSelector:
+    """
+    保存排序后的尺寸，阈值变化时只做二分查找，
+    并且只改写"选中状态真正发生变化"的元素。
+    """
+
+    def __init__(self, obj, mode, initial_indices):
+        self.mode = mode
+        self.sorted_sizes, self.order = compute_sorted_sizes(obj, mode)
+        self.count = len(self.order)
+        self.mask = np.zeros(self.count, dtype=bool)
+        if initial_indices:
+            self.mask[np.fromiter(initial_indices, dtype=np.int64)] = True
+        self.hist_chars, self.hist_edges = build_histogram(self.sorted_sizes)
+        self.selected_count = int(self.mask.sum())
+
+    def target_mask(self, threshold, greater_than):
+        if greater_than:
+            cut = np.searchsorted(self.sorted_sizes, threshold, side='right')
+            picked = self.order[cut:]
+        else:
+            cut = np.searchsorted(self.sorted_sizes, threshold, side='left')
+            picked = self.order[:cut]
+        mask = np.zeros(self.count, dtype=bool)
+        mask[picked] = True
+        return mask
+
+    def apply(self, context, threshold, greater_than):
+        obj = context.active_object
+        bm = bmesh.from_edit_mesh(obj.data)
+        elements = bm.faces if self.mode == 'FACE' else bm.edges
+        if len(elements) != self.count:
+            return
+        elements.ensure_lookup_table()
+
+        mask = self.target_mask(threshold, greater_than)
+        deselected = np.flatnonzero(self.mask & ~mask).tolist()
+        selected = np.flatnonzero(mask & ~self.mask).tolist()
+        for index in deselected:
+            elements[index].select = False
+        for index in selected:
+            elements[index].select = True
+        # 取消选择一条边/一个面会连带取消它的顶点 (和边)，
+        # 与它共点且仍然选中的邻居要重新选一次，把顶点补回来
+        touched = set()
+        for index in deselected:
+            for vert in elements[index].verts:
+                for linked in (vert.link_faces if self.mode == 'FACE' else vert.link_edges):
+                    if linked.index not in touched and mask[linked.index]:
+                        touched.add(linked.index)
+                        linked.select = True
+        self.mask = mask
+        self.selected_count = int(mask.sum())
+        if deselected or selected:
+            bm.select_flush_mode()
+            bmesh.update_edit_mesh(obj.data)
+
+    def histogram_text(self, threshold):
+        if not self.hist_chars:
+            return ""
+        # 在阈值所在的位置插入一根竖线，拖动时能直观看到切在分布的哪里
+        slot = int(np.searchsorted(self.hist_edges, threshold, side='right')) - 1
+        slot = min(max(slot, 0), len(self.hist_chars))
+        chars = list(self.hist_chars)
+        chars.insert(slot, "|")
+        lo, hi = self.hist_edges[0], self.hist_edges[-1]
+        return f"{lo:.3g} [{''.join(chars)}] {hi:.3g}"
+
+
 def select_geometry_by_size(context, mode, threshold, greater_than):
+    """非交互用法：一次性按尺寸选择（内部同样走排序 + 二分查找）"""
     obj = context.active_object
     if not obj or obj.type != 'MESH' or obj.mode != 'EDIT':
         return
     bm = bmesh.from_edit_mesh(obj.data)
     elements = bm.faces if mode == 'FACE' else bm.edges
-    size_attr = 'calc_area' if mode == 'FACE' else 'calc_length'
-    
-    elements.ensure_lookup_table()
-    for elem in elements:
-        elem.select = False
-    for elem in elements:
-        size = getattr(elem, size_attr)()
-        if (greater_than and size > threshold) or (not greater_than and size < threshold):
-            elem.select = True
-    bmesh.update_edit_mesh(obj.data)
+    elements.index_update()
+    selector = SizeSelector(obj, mode, {elem.index for elem in elements if elem.select})
+    selector.apply(context, threshold, greater_than)
 
 # --- 延迟注销 (不变) ---
 def unregister_delayed():
@@ -50,6 +158,8 @@ class MESH_OT_select_by_size_ephemeral(bpy.types.Operator):
     
     # --- 关键修改：用自己的列表来存储初始选择 ---
     initial_selection_indices: set
+    # 启动时预计算好的排序尺寸，拖动过程中只做二分查找
+    selector: SizeSelector
 
     initial_mouse_x: int
     initial_threshold: float
@@ -60,27 +170,28 @@ class MESH_OT_select_by_size_ephemeral(bpy.types.Operator):
         if event.type == 'MOUSEMOVE':
             delta = (event.mouse_x - self.initial_mouse_x) * 0.005 * (0.1 if event.shift else 1.0)
             self.current_threshold = max(0, self.initial_threshold + delta)
-            select_geometry_by_size(context, self.mode, self.current_threshold, self.greater_than)
+            self.selector.apply(context, self.current_threshold, self.greater_than)
             context.area.header_text_set(self.get_header_text())
         
         elif event.type in {'WHEELUPMOUSE', 'WHEELDOWNMOUSE'}:
             factor = 1.1 if event.type == 'WHEELUPMOUSE' else 0.9
             self.current_threshold *= factor
-            select_geometry_by_size(context, self.mode, self.current_threshold, self.greater_than)
+            self.selector.apply(context, self.current_threshold, self.greater_than)
             context.area.header_text_set(self.get_header_text())
             
         elif event.type == 'M' and event.value == 'PRESS':
             self.mode = 'EDGE' if self.mode == 'FACE' else 'FACE'
             self.initial_threshold = 0.1
             self.current_threshold = self.initial_threshold
-            # 切换模式时也需要重新保存初始选择
+            # 切换模式时也需要重新保存初始选择，并重新预计算尺寸
             self.save_initial_selection(context)
-            select_geometry_by_size(context, self.mode, self.current_threshold, self.greater_than)
+            self.selector = SizeSelector(context.active_object, self.mode, self.initial_selection_indices)
+            self.selector.apply(context, self.current_threshold, self.greater_than)
             context.area.header_text_set(self.get_header_text())
             
         elif event.type == 'G' and event.value == 'PRESS':
             self.greater_than = not self.greater_than
-            select_geometry_by_size(context, self.mode, self.current_threshold, self.greater_than)
+            self.selector.apply(context, self.current_threshold, self.greater_than)
             context.area.header_text_set(self.get_header_text())
         # --- (modal内部的事件处理逻辑结束) ---
         
@@ -106,6 +217,7 @@ class MESH_OT_select_by_size_ephemeral(bpy.types.Operator):
         """记录下当前选中的元素索引"""
         bm = bmesh.from_edit_mesh(context.active_object.data)
         elements = bm.faces if self.mode == 'FACE' else bm.edges
+        elements.index_update()
         self.initial_selection_indices = {elem.index for elem in elements if elem.select}
 
     def restore_initial_selection(self, context):
@@ -126,7 +238,10 @@ class MESH_OT_select_by_size_ephemeral(bpy.types.Operator):
 
     def get_header_text(self):
         compare = ">" if self.greater_than else "<"
-        return f"模式: {self.mode} | 阈值: {self.current_threshold:.4f} | 选择: {compare} 阈值 | [LMB]确认 [RMB/ESC]取消 [M]/[G]切换"
+        return (f"模式: {self.mode} | 阈值: {self.current_threshold:.4f} | 选择: {compare} 阈值 "
+                f"({self.selector.selected_count}/{self.selector.count}) | "
+                f"分布: {self.selector.histogram_text(self.current_threshold)} | "
+                f"[LMB]确认 [RMB/ESC]取消 [M]/[G]切换")
 
     def invoke(self, context, event):
         if context.mode != 'EDIT_MESH':
@@ -135,12 +250,13 @@ class MESH_OT_select_by_size_ephemeral(bpy.types.Operator):
         
         # --- 关键修改：调用我们自己的保存函数 ---
         self.save_initial_selection(context)
+        self.selector = SizeSelector(context.active_object, self.mode, self.initial_selection_indices)
 
         self.initial_mouse_x = event.mouse_x
         self.initial_threshold = 0.1
         self.current_threshold = self.initial_threshold
 
-        select_geometry_by_size(context, self.mode, self.current_threshold, self.greater_than)
+        self.selector.apply(context, self.current_threshold, self.greater_than)
         context.window_manager.modal_handler_add(self)
         context.area.header_text_set(self.get_header_text())
         return {'RUNNING_MODAL'}
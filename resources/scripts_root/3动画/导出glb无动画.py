@@ -2,13 +2,30 @@
 # -*- coding: utf-8 -*-
 import bpy
 import os
+import runpy
+
+# 导出参数取自 99未分类/导出预设.json 里的这个预设
+PRESET = "glb_static"
+# 只导出内容有变化的物体 (见 99未分类/导出清单.py)
+INCREMENTAL = True
+# 导出前先跑一遍检查 (见 99未分类/导出检查.py)，有 ERROR 级问题时不导出
+VALIDATE = True
+# 能和插件结果一致时 (全是网格、材质不用贴图、没有形态键) 不走 glTF 插件，直接写 GLB，
+# 修改器是否应用跟随预设的 export_apply (见 99未分类/GLB直写.py)；其余情况和 False 时都按 PRESET 导出
+DIRECT_WRITER = True
+
+
+# 共享工具 (导出预设、导出清单、材质节点索引等) 统一由 99未分类/共享加载.py 取出或安装
+load_shared = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", "")))),
+                                          "99未分类", "共享加载.py"))["load_shared"]
+
 
 def export_active_object_with_custom_settings():
     """
     将当前活动物体导出为 GLB 文件。
     - 文件名基于活动物体的名称。
     - 保存在 .blend 文件同级目录下的 "GLB" 文件夹中。
-    - 使用您提供的全套自定义参数进行导出。
+    - 参数取自导出预设 PRESET (99未分类/导出预设.json)；DIRECT_WRITER 且结果等价时直接写出选中的网格。
     """
     # --- 1. 安全检查 ---
     if not bpy.data.is_saved:
@@ -26,6 +43,18 @@ def export_active_object_with_custom_settings():
         )
         return {'CANCELLED'}
 
+    # 一次检查全部问题 (缩放/贴图/零面积面/NLA…)，只打印警告，有 ERROR 时不导出
+    if VALIDATE:
+        validator = load_shared("export_validator", "99未分类/导出检查.py")
+        issues = validator.validate(bpy.context.selected_objects)
+        validator.print_report(issues)
+        if not validator.passes(issues):
+            bpy.context.window_manager.popup_menu(
+                lambda self, context: self.layout.label(text="导出检查未通过，详见控制台"),
+                title="操作失败", icon='ERROR'
+            )
+            return {'CANCELLED'}
+
     # --- 2. 准备动态路径和文件名 (这是脚本的核心优势) ---
     blend_file_dir = os.path.dirname(bpy.data.filepath)
     export_folder = os.path.join(blend_file_dir, "GLB")
@@ -38,113 +67,37 @@ def export_active_object_with_custom_settings():
     file_name = f"{active_obj.name}.glb"
     export_path = os.path.join(export_folder, file_name)
 
-    # --- 3. 使用您的全部自定义设置执行导出 ---
-    print(f"准备导出 '{active_obj.name}' 到: {export_path}")
+    # --- 3. 按预设导出 ---
+    export_kwargs = load_shared("export_presets", "99未分类/导出预设.py").settings(PRESET)
+    apply_modifiers = export_kwargs.get("export_apply", False)
+    direct = False
+    if DIRECT_WRITER:
+        blockers = load_shared("glb_writer", "99未分类/GLB直写.py").direct_write_blockers(bpy.context.selected_objects)
+        direct = not blockers
+        for reason in blockers:
+            print(f"  不能直写，改用 glTF 插件: {reason}")
+    if direct:
+        export_kwargs = {"writer": "direct", "export_apply": apply_modifiers}
+    print(f"准备导出 '{active_obj.name}' 到: {export_path} ({'直写' if direct else f'预设 {PRESET}'})")
+
+    # 内容 (网格/修改器/材质/变换/动画/预设) 和上次一样且文件还在：跳过
+    manifest = None
+    if INCREMENTAL:
+        tools = load_shared("export_manifest", "99未分类/导出清单.py")
+        manifest = tools.load(export_folder)
+        fp = tools.fingerprint(bpy.context.selected_objects, export_kwargs)
+        if manifest.is_current(active_obj.name, fp, export_path):
+            print(f"'{active_obj.name}' 未变化，跳过导出: {export_path}")
+            return {'FINISHED'}
 
-    bpy.ops.export_scene.gltf(
-        # 动态文件路径 (关键！)
-        filepath=export_path,
-        
-        # ▼▼▼ 以下是您提供的全部自定义参数 ▼▼▼
-        export_format='GLB',
-        use_selection=True,
-        export_apply=False, # 注意：您的设置是False，通常建议为True来应用修改器
-        
-        # General
-        ui_tab='GENERAL',
-        export_copyright='',
-        export_image_format='AUTO',
-        export_image_add_webp=False,
-        export_image_webp_fallback=False,
-        export_texture_dir='',
-        export_jpeg_quality=75,
-        export_image_quality=75,
-        export_keep_originals=False,
-        
-        # Mesh
-        export_texcoords=True,
-        export_normals=True,
-        export_gn_mesh=False,
-        export_draco_mesh_compression_enable=False,
-        export_draco_mesh_compression_level=6,
-        export_draco_position_quantization=14,
-        export_draco_normal_quantization=10,
-        export_draco_texcoord_quantization=12,
-        export_draco_color_quantization=10,
-        export_draco_generic_quantization=12,
-        export_tangents=False,
-        export_materials='EXPORT',
-        export_unused_images=False,
-        export_unused_textures=False,
-        export_vertex_color='MATERIAL',
-        export_all_vertex_colors=True,
-        export_active_vertex_color_when_no_material=True,
-        export_attributes=False,
-        
-        # Object
-        use_mesh_edges=False,
-        use_mesh_vertices=False,
-        export_cameras=False,
-        use_visible=False,
-        use_renderable=False,
-        use_active_collection_with_nested=True,
-        use_active_collection=False,
-        use_active_scene=False,
-        at_collection_center=False,
-        export_extras=False,
-        export_yup=True,
-        export_shared_accessors=False,
-        
-        # Animation
-        export_animations=False,
-        export_frame_range=False,
-        export_frame_step=1,
-        export_force_sampling=True,
-        export_pointer_animation=False,
-        export_animation_mode='NLA_TRACKS',
-        export_nla_strips_merged_animation_name='Animation',
-        export_def_bones=True,
-        export_hierarchy_flatten_bones=False,
-        export_hierarchy_flatten_objs=False,
-        export_armature_object_remove=False,
-        export_leaf_bone=False,
-        export_optimize_animation_size=True,
-        export_optimize_animation_keep_anim_armature=True,
-        export_optimize_animation_keep_anim_object=True,
-        export_optimize_disable_viewport=False,
-        export_negative_frame='CROP',
-        export_anim_slide_to_zero=True,
-        export_bake_animation=False,
-        export_anim_single_armature=True,
-        export_reset_pose_bones=True,
-        export_current_frame=True,
-        export_rest_position_armature=True,
-        export_anim_scene_split_object=True,
-        
-        # Skinning
-        export_skins=True,
-        export_influence_nb=4,
-        export_all_influences=False,
-        
-        # Shape Keys
-        export_morph=True,
-        export_morph_normal=True,
-        export_morph_tangent=False,
-        export_morph_animation=True,
-        export_morph_reset_sk_data=True,
-        
-        # Others
-        export_lights=False,
-        export_try_sparse_sk=True,
-        export_try_omit_sparse_sk=False,
-        export_gpu_instances=False,
-        export_action_filter=False,
-        export_convert_animation_pointer=False,
-        export_nla_strips=True,
-        export_original_specular=False,
-        export_hierarchy_full_collections=False,
-        export_extra_animations=False
-    )
+    # 动态文件路径 (关键！)
+    if direct:
+        load_shared("glb_writer", "99未分类/GLB直写.py").write_glb(bpy.context.selected_objects, export_path, apply_modifiers=apply_modifiers)
+    else:
+        load_shared("export_presets", "99未分类/导出预设.py").export(PRESET, filepath=export_path)
+    if manifest:
+        manifest.record(active_obj.name, fp, export_path)
+        manifest.save()
     
     print("=" * 40)
     print(f"成功导出！文件保存在: {export_path}")
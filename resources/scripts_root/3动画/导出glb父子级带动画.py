@@ -2,96 +2,35 @@
 import bpy
 import os
 import re
+import runpy
 import sys          # 导入 sys 模块，用于判断操作系统
 import subprocess   # 导入 subprocess 模块，用于执行系统命令
+import numpy as np
+
+# 导出参数取自 99未分类/导出预设.json 里的这个预设
+PRESET = "glb_anim"
+
+# 只导出内容有变化的层级 (见 99未分类/导出清单.py)
+INCREMENTAL = True
+# 导出前先跑一遍检查 (见 99未分类/导出检查.py)，有 ERROR 级问题时不导出
+VALIDATE = True
+
+# 所有层级共用一次时间轴扫描：逐帧采样一遍写进内存，再烘成临时线性动作，
+# 临时换进各物体原来的 NLA 片段里导出 (轨道名/剪辑结构不变，仍按 NLA 轨道出剪辑)，
+# 导出器不再逐层级重采样 (耗时随帧数增长，而不是帧数 × 层级数)。
+# 只有 "每个动画物体恰好一条轨道一个片段" 的层级能这样还原；其余 (约束、多轨道/多片段、
+# 只有活动动作没下推等) 仍按原方式逐个强制采样导出。
+# compare_with_legacy() 会把选中层级按两种方式各导出一次，对比 GLB 里的动画名和通道数。
+SINGLE_SWEEP = True
+SWEEP_OVERRIDES = {"export_force_sampling": False}
+
+INTERP_LINEAR = 1   # BezTriple 插值枚举里 LINEAR 的值
+
+
+# 共享工具 (导出预设、导出清单、材质节点索引等) 统一由 99未分类/共享加载.py 取出或安装
+load_shared = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", "")))),
+                                          "99未分类", "共享加载.py"))["load_shared"]
 
-# EXPORT_SETTINGS 字典保持不变，与您提供的一致
-EXPORT_SETTINGS = dict(
-    export_format='GLB',
-    use_selection=True,
-    export_apply=False,
-    ui_tab='GENERAL',
-    export_copyright='',
-    export_image_format='AUTO',
-    export_image_add_webp=False,
-    export_image_webp_fallback=False,
-    export_texture_dir='',
-    export_jpeg_quality=75,
-    export_image_quality=75,
-    export_keep_originals=False,
-    export_texcoords=True,
-    export_normals=True,
-    export_gn_mesh=False,
-    export_draco_mesh_compression_enable=False,
-    export_draco_mesh_compression_level=6,
-    export_draco_position_quantization=14,
-    export_draco_normal_quantization=10,
-    export_draco_texcoord_quantization=12,
-    export_draco_color_quantization=10,
-    export_draco_generic_quantization=12,
-    export_tangents=False,
-    export_materials='EXPORT',
-    export_unused_images=False,
-    export_unused_textures=False,
-    export_vertex_color='MATERIAL',
-    export_all_vertex_colors=True,
-    export_active_vertex_color_when_no_material=True,
-    export_attributes=False,
-    use_mesh_edges=False,
-    use_mesh_vertices=False,
-    export_cameras=False,
-    use_visible=False,
-    use_renderable=False,
-    use_active_collection_with_nested=True,
-    use_active_collection=False,
-    use_active_scene=False,
-    at_collection_center=False,
-    export_extras=False,
-    export_yup=True,
-    export_shared_accessors=False,
-    export_animations=True,
-    export_frame_range=False,
-    export_frame_step=1,
-    export_force_sampling=True,
-    export_pointer_animation=False,
-    export_animation_mode='NLA_TRACKS',
-    export_nla_strips_merged_animation_name='Animation',
-    export_def_bones=True,
-    export_hierarchy_flatten_bones=False,
-    export_hierarchy_flatten_objs=False,
-    export_armature_object_remove=False,
-    export_leaf_bone=False,
-    export_optimize_animation_size=True,
-    export_optimize_animation_keep_anim_armature=True,
-    export_optimize_animation_keep_anim_object=True,
-    export_optimize_disable_viewport=False,
-    export_negative_frame='CROP',
-    export_anim_slide_to_zero=True,
-    export_bake_animation=False,
-    export_anim_single_armature=True,
-    export_reset_pose_bones=True,
-    export_current_frame=True,
-    export_rest_position_armature=True,
-    export_anim_scene_split_object=True,
-    export_skins=True,
-    export_influence_nb=4,
-    export_all_influences=False,
-    export_morph=True,
-    export_morph_normal=True,
-    export_morph_tangent=False,
-    export_morph_animation=True,
-    export_morph_reset_sk_data=True,
-    export_lights=False,
-    export_try_sparse_sk=True,
-    export_try_omit_sparse_sk=False,
-    export_gpu_instances=False,
-    export_action_filter=False,
-    export_convert_animation_pointer=False,
-    export_nla_strips=True,
-    export_original_specular=False,
-    export_hierarchy_full_collections=False,
-    export_extra_animations=False
-)
 
 # +++ 新增函数：用于跨平台打开文件夹 +++
 def open_folder(path):
@@ -144,9 +83,245 @@ def select_hierarchy(obj, selected_set):
         select_hierarchy(c, selected_set)
 
 
+def hierarchy_objects(root):
+    """根物体和它的所有子孙"""
+    objs = [root]
+    for c in root.children:
+        objs.extend(hierarchy_objects(c))
+    return objs
+
+
+def is_animated(obj):
+    ad = obj.animation_data
+    return bool(ad and (ad.action or ad.drivers or len(ad.nla_tracks)))
+
+
+def clip_strip(obj):
+    """
+    能被一条烘焙动作原样替换的 NLA 片段：没有活动动作、唯一一条未静音轨道、轨道上唯一一个
+    替换混合且影响值不带动画的片段。不满足返回 None。
+    """
+    ad = obj.animation_data
+    if ad is None or ad.action is not None or ad.use_tweak_mode:
+        return None
+    tracks = [t for t in ad.nla_tracks if not t.mute]
+    if len(tracks) != 1 or len(tracks[0].strips) != 1:
+        return None
+    strip = tracks[0].strips[0]
+    if strip.action is None or strip.mute or strip.blend_type != 'REPLACE' or strip.use_animated_influence:
+        return None
+    return strip
+
+
+def can_sweep(obj):
+    """只采通道值 (loc/rot/scale)：约束无法还原；有动画的物体必须是 clip_strip() 那种单片段"""
+    if obj.constraints:
+        return False
+    if obj.type == 'ARMATURE' and obj.pose and any(pb.constraints for pb in obj.pose.bones):
+        return False
+    return not is_animated(obj) or clip_strip(obj) is not None
+
+
+def strip_range(obj, scene_range=None):
+    strip = clip_strip(obj)
+    lo, hi = strip.frame_start, strip.frame_end
+    if scene_range:
+        lo, hi = max(lo, scene_range[0]), min(hi, scene_range[1])
+    return lo, hi
+
+
+def rotation_path(mode):
+    if mode == 'QUATERNION':
+        return "rotation_quaternion"
+    if mode == 'AXIS_ANGLE':
+        return "rotation_axis_angle"
+    return "rotation_euler"
+
+
+CHANNEL_WIDTHS = {"location": 3, "rotation_quaternion": 4, "rotation_axis_angle": 4, "rotation_euler": 3, "scale": 3}
+
+
+class SweepCache:
+    """一次扫过所有帧，把每个物体 (和骨骼) 的变换通道写进预分配的 numpy 数组"""
+
+    def __init__(self, objects, frames):
+        self.frames = np.asarray(frames, dtype=np.float32)
+        n = len(frames)
+        self.objects = {}
+        self.bones = {}
+        for o in objects:
+            paths = ("location", rotation_path(o.rotation_mode), "scale")
+            self.objects[o.name] = {p: np.empty((n, CHANNEL_WIDTHS[p]), np.float32) for p in paths}
+            if o.type == 'ARMATURE' and o.pose:
+                nb = len(o.pose.bones)
+                self.bones[o.name] = {p: np.empty((n, nb * w), np.float32) for p, w in CHANNEL_WIDTHS.items()}
+
+    def sweep(self, context):
+        scene = context.scene
+        original = scene.frame_current
+        try:
+            for i, frame in enumerate(self.frames):
+                scene.frame_set(int(frame))
+                depsgraph = context.evaluated_depsgraph_get()
+                for name, channels in self.objects.items():
+                    ev = bpy.data.objects[name].evaluated_get(depsgraph)
+                    for path, buf in channels.items():
+                        buf[i] = getattr(ev, path)
+                    for path, buf in self.bones.get(name, {}).items():
+                        ev.pose.bones.foreach_get(path, buf[i])
+        finally:
+            scene.frame_set(original)
+
+
+def _set_linear(fcurve, count):
+    try:
+        fcurve.keyframe_points.foreach_set("interpolation", np.full(count, INTERP_LINEAR, np.int32))
+    except (TypeError, AttributeError, RuntimeError):
+        for kp in fcurve.keyframe_points:
+            kp.interpolation = 'LINEAR'
+
+
+def _add_fcurves(action, data_path, values, frames, group):
+    count = len(frames)
+    co = np.empty(count * 2, np.float32)
+    co[0::2] = frames
+    for index in range(values.shape[1]):
+        fc = action.fcurves.new(data_path, index=index, action_group=group)
+        fc.keyframe_points.add(count)
+        co[1::2] = values[:, index]
+        fc.keyframe_points.foreach_set("co", co)
+        _set_linear(fc, count)
+        fc.update()
+
+
+def bake_action(obj, cache, mask):
+    """用缓存里 mask 选中的帧给 obj 建一个临时动作"""
+    frames = cache.frames[mask]
+    action = bpy.data.actions.new(f"{obj.name}_扫描烘焙")
+    for path, buf in cache.objects[obj.name].items():
+        _add_fcurves(action, path, buf[mask], frames, "Object Transforms")
+    if obj.name in cache.bones:
+        bones = cache.bones[obj.name]
+        for b, pb in enumerate(obj.pose.bones):
+            for path in ("location", rotation_path(pb.rotation_mode), "scale"):
+                w = CHANNEL_WIDTHS[path]
+                _add_fcurves(action, f'pose.bones["{pb.name}"].{path}',
+                             bones[path][mask, b * w:(b + 1) * w], frames, pb.name)
+    return action
+
+
+def _set_action_range(strip, start, end):
+    # 先动会越界的那一端，避免中间状态 start > end 被钳制
+    if start > strip.action_frame_end:
+        strip.action_frame_end, strip.action_frame_start = end, start
+    else:
+        strip.action_frame_start, strip.action_frame_end = start, end
+
+
+class BakedStrips:
+    """
+    导出期间把每个动画物体那唯一 NLA 片段里的动作换成扫描烘焙的临时动作，
+    片段时间一一对应 (不缩放/不重复/不反向)；轨道、片段名、静音状态都不动。
+    离开时 (含异常) 还原片段参数并删除临时动作。
+    """
+
+    def __init__(self, objs, cache, scene_range=None):
+        self.objs = [o for o in objs if o.name in cache.objects]
+        self.cache = cache
+        self.scene_range = scene_range
+        self.saved = []
+
+    def __enter__(self):
+        for o in self.objs:
+            strip = clip_strip(o)
+            start, end = strip.frame_start, strip.frame_end
+            lo, hi = strip_range(o, self.scene_range)
+            mask = (self.cache.frames >= lo) & (self.cache.frames <= hi)
+            self.saved.append((strip, strip.action, strip.action_frame_start, strip.action_frame_end,
+                               strip.repeat, strip.scale, strip.use_reverse, start, end))
+            strip.action = bake_action(o, self.cache, mask)
+            strip.use_reverse = False
+            strip.repeat = 1.0
+            strip.scale = 1.0
+            _set_action_range(strip, start, end)
+        return self
+
+    def __exit__(self, *exc):
+        for strip, action, a_start, a_end, repeat, scale, reverse, start, end in reversed(self.saved):
+            temp = strip.action
+            strip.action = action
+            _set_action_range(strip, a_start, a_end)
+            strip.repeat = repeat
+            strip.scale = scale
+            strip.use_reverse = reverse
+            if (strip.frame_start, strip.frame_end) != (start, end):
+                strip.frame_start, strip.frame_end = start, end
+            if temp and temp is not action:
+                bpy.data.actions.remove(temp)
+        self.saved.clear()
+        return False
+
+
+def build_sweep_cache(animated, export_kwargs):
+    """对所有要扫描的动画物体一次扫过它们片段覆盖的帧"""
+    scene = bpy.context.scene
+    scene_range = (scene.frame_start, scene.frame_end) if export_kwargs.get("export_frame_range") else None
+    ranges = [strip_range(o, scene_range) for o in animated]
+    step = max(1, int(export_kwargs.get("export_frame_step", 1)))
+    start = int(min(r[0] for r in ranges))
+    end = int(round(max(r[1] for r in ranges)))
+    cache = SweepCache(animated, list(range(start, end + 1, step)))
+    cache.sweep(bpy.context)
+    return cache, scene_range
+
+
+def glb_animations(path):
+    """GLB 里的 [(动画名, 通道数)]，用于和原方式对比"""
+    import json
+    import struct
+    with open(path, "rb") as f:
+        data = f.read()
+    json_len = struct.unpack_from("<I", data, 12)[0]
+    doc = json.loads(data[20:20 + json_len])
+    return sorted((a.get("name", ""), len(a.get("channels", []))) for a in doc.get("animations", []))
+
+
+def compare_with_legacy():
+    """选中的每个可扫描层级分别按原方式和扫描方式导出到临时目录，对比动画名和通道数"""
+    import tempfile
+    out = tempfile.mkdtemp(prefix="glb_sweep_check_")
+    export_kwargs = load_shared("export_presets", "99未分类/导出预设.py").settings(PRESET)
+    original_selection = list(bpy.context.selected_objects)
+    mismatches = 0
+    for r in selected_roots():
+        objs = hierarchy_objects(r)
+        animated = [o for o in objs if is_animated(o)]
+        if not animated or not all(can_sweep(o) for o in objs):
+            print(f"{r.name}: 不走扫描，跳过对比")
+            continue
+        bpy.ops.object.select_all(action='DESELECT')
+        select_hierarchy(r, set())
+        legacy = os.path.join(out, f"{sanitize(r.name)}_legacy.glb")
+        swept = os.path.join(out, f"{sanitize(r.name)}_sweep.glb")
+        load_shared("export_presets", "99未分类/导出预设.py").export(PRESET, filepath=legacy)
+        cache, scene_range = build_sweep_cache(animated, export_kwargs)
+        with BakedStrips(animated, cache, scene_range):
+            load_shared("export_presets", "99未分类/导出预设.py").export(PRESET, filepath=swept, **SWEEP_OVERRIDES)
+        a, b = glb_animations(legacy), glb_animations(swept)
+        if a != b:
+            mismatches += 1
+        print(f"{r.name}: {'一致' if a == b else '不一致'}  原方式 {a}  扫描 {b}")
+    bpy.ops.object.select_all(action='DESELECT')
+    for o in original_selection:
+        o.select_set(True)
+    print(f"对比完成，{mismatches} 个层级不一致 ({out})")
+    return mismatches == 0
+
+
 def export_hierarchy_to_glb():
     """
     主函数：将选择的每个物体层级导出为独立的 GLB 文件。
+    SINGLE_SWEEP 时先一次扫描全部层级的动画，再逐个导出。
     """
     # 检查 .blend 文件是否已保存
     if not bpy.data.is_saved:
@@ -163,6 +338,17 @@ def export_hierarchy_to_glb():
             title="错误", icon='ERROR')
         return {'CANCELLED'}
 
+    # 所有层级一起检查一遍
+    if VALIDATE:
+        validator = load_shared("export_validator", "99未分类/导出检查.py")
+        issues = validator.validate([o for r in roots for o in hierarchy_objects(r)])
+        validator.print_report(issues)
+        if not validator.passes(issues):
+            bpy.context.window_manager.popup_menu(
+                lambda s, c: s.layout.label(text="导出检查未通过，详见控制台"),
+                title="错误", icon='ERROR')
+            return {'CANCELLED'}
+
     # 准备输出目录
     blend_dir = os.path.dirname(bpy.data.filepath)
     out_dir = os.path.join(blend_dir, "GLB")
@@ -170,22 +356,56 @@ def export_hierarchy_to_glb():
 
     # 保存原始选择
     original_selection = list(bpy.context.selected_objects)
-    
-    # 循环导出每个根物体的层级
+
+    export_kwargs = load_shared("export_presets", "99未分类/导出预设.py").settings(PRESET)
+    sweep_kwargs = dict(export_kwargs, **SWEEP_OVERRIDES)
+    tools = load_shared("export_manifest", "99未分类/导出清单.py") if INCREMENTAL else None
+    manifest = tools.load(out_dir) if tools else None
+
+    # 先定下每个层级怎么导出、要不要导出，再决定扫描哪些物体
+    jobs = []
     for r in roots:
+        objs = hierarchy_objects(r)
+        animated = [o for o in objs if is_animated(o)]
+        sweep = SINGLE_SWEEP and bool(animated) and all(can_sweep(o) for o in objs)
+        kwargs = sweep_kwargs if sweep else export_kwargs
+        filepath = os.path.join(out_dir, f"{sanitize(r.name)}.glb")
+        fp = None
+        if manifest:
+            fp = tools.fingerprint(objs, kwargs)
+            if manifest.is_current(r.name, fp, filepath):
+                continue
+        jobs.append((r, objs, animated, sweep, filepath, fp))
+
+    cache, scene_range = None, None
+    sweep_jobs = [j for j in jobs if j[3]]
+    if sweep_jobs:
+        cache, scene_range = build_sweep_cache([o for j in sweep_jobs for o in j[2]], export_kwargs)
+        print(f"时间轴扫描: {len(cache.frames)} 帧, {len(cache.objects)} 个动画物体, {len(sweep_jobs)} 个层级共用")
+
+    # 循环导出每个根物体的层级
+    for r, objs, animated, sweep, filepath, fp in jobs:
         # 清空选择，然后仅选择当前层级
         bpy.ops.object.select_all(action='DESELECT')
         temp_sel = set()
         select_hierarchy(r, temp_sel)
-        
-        # 定义并导出文件
-        filepath = os.path.join(out_dir, f"{sanitize(r.name)}.glb")
+
         try:
-            bpy.ops.export_scene.gltf(filepath=filepath, **EXPORT_SETTINGS)
-            print(f"成功导出: {filepath}")
+            if sweep:
+                with BakedStrips(animated, cache, scene_range):
+                    load_shared("export_presets", "99未分类/导出预设.py").export(PRESET, filepath=filepath, **SWEEP_OVERRIDES)
+            else:
+                load_shared("export_presets", "99未分类/导出预设.py").export(PRESET, filepath=filepath)
+            print(f"成功导出: {filepath}{' (共用扫描)' if sweep else ''}")
+            if manifest:
+                manifest.record(r.name, fp, filepath)
         except Exception as e:
             print(f"导出 '{r.name}' 时发生错误: {e}")
 
+    if manifest:
+        manifest.save()
+        print(manifest.summary())
+
     # 恢复原始选择
     bpy.ops.object.select_all(action='DESELECT')
     for o in original_selection:
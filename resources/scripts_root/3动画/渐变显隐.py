@@ -2,6 +2,7 @@
 import bpy
 import os
 import numpy as np
+from mathutils import Vector
 
 def bake_alpha_to_image(base_image, alpha_multiplier, image_name):
     """
@@ -36,6 +37,76 @@ def bake_alpha_to_image(base_image, alpha_multiplier, image_name):
     return baked_image
 
 
+FADE_ATTRIBUTE = "fade_alpha"
+
+
+def image_bytes(img):
+    w, h = img.size
+    return w * h * 4 * (4 if img.is_float else 1)
+
+
+def alpha_texture(mat):
+    """返回接在 Principled BSDF Alpha 上的贴图 (没有则为 None)"""
+    if not (mat and mat.use_nodes):
+        return None
+    bsdf = next((n for n in mat.node_tree.nodes if n.type == 'BSDF_PRINCIPLED'), None)
+    if not bsdf or not bsdf.inputs['Alpha'].is_linked:
+        return None
+    from_node = bsdf.inputs['Alpha'].links[0].from_node
+    return from_node.image if from_node.type == 'TEX_IMAGE' else None
+
+
+class AlphaImageCache:
+    """(基础贴图, 量化透明度) -> 烘焙后的贴图，同一次执行内所有物体共享"""
+
+    def __init__(self):
+        self.images = {}
+        self.total_bytes = 0
+
+    def get(self, base_image, level):
+        key = (base_image.name_full, int(round(level * 100)))
+        img = self.images.get(key)
+        if img is None:
+            img = bake_alpha_to_image(base_image, level, f"{base_image.name}_alpha_{key[1]}")
+            if img is None:
+                return None
+            self.images[key] = img
+            self.total_bytes += image_bytes(img)
+        return img
+
+
+def make_attribute_alpha_material(src_mat):
+    """复制一份材质，在 Alpha 输入前乘上物体属性 fade_alpha"""
+    mat = src_mat.copy()
+    mat.name = f"{src_mat.name}_alpha_attr"
+    mat.use_nodes = True
+    mat.blend_method = 'BLEND'
+    nt = mat.node_tree
+    bsdf = next((n for n in nt.nodes if n.type == 'BSDF_PRINCIPLED'), None)
+    if not bsdf:
+        return mat
+
+    alpha_input = bsdf.inputs['Alpha']
+    attr = nt.nodes.new("ShaderNodeAttribute")
+    attr.attribute_type = 'OBJECT'
+    attr.attribute_name = f'["{FADE_ATTRIBUTE}"]'
+    attr.location = bsdf.location + Vector((-400, -400))
+    mul = nt.nodes.new("ShaderNodeMath")
+    mul.operation = 'MULTIPLY'
+    mul.use_clamp = True
+    mul.location = bsdf.location + Vector((-200, -400))
+
+    if alpha_input.is_linked:
+        link = alpha_input.links[0]
+        nt.links.new(link.from_socket, mul.inputs[0])
+        nt.links.remove(link)
+    else:
+        mul.inputs[0].default_value = alpha_input.default_value
+    nt.links.new(attr.outputs['Fac'], mul.inputs[1])
+    nt.links.new(mul.outputs['Value'], alpha_input)
+    return mat
+
+
 class OBJECT_OT_animated_alpha_fade(bpy.types.Operator):
     """
     为选中物体创建基于Alpha和缩放的逐帧渐隐/渐现动画。
@@ -68,6 +139,18 @@ class OBJECT_OT_animated_alpha_fade(bpy.types.Operator):
         description="动画开始的帧",
         default=1
     )
+    alpha_mode: bpy.props.EnumProperty(
+        name="Alpha Mode",
+        description="透明度的实现方式",
+        items=[('BAKE_CACHED', 'Baked (Shared Cache)', '把透明度烘焙进贴图，按量化级数在物体之间共享 (可导出GLB)'),
+               ('ATTRIBUTE', 'Object Attribute', '所有步骤共用一个材质，透明度由物体属性驱动 (不烘焙贴图，GLB 导出不支持)')],
+        default='BAKE_CACHED'
+    )
+    alpha_levels: bpy.props.IntProperty(
+        name="Alpha Levels",
+        description="透明度量化级数，烘焙贴图数量最多为 贴图数 × 级数；0 = 与步数一致，每一步的透明度都保持精确",
+        default=0, min=0, max=101
+    )
 
     @classmethod
     def poll(cls, context):
@@ -101,6 +184,75 @@ class OBJECT_OT_animated_alpha_fade(bpy.types.Operator):
             print(f"    集合 '{collection.name}' 中的物体不完整或命名不匹配。将重新创建。")
             return []
 
+    def level_count(self):
+        return self.alpha_levels or self.steps
+
+    def quantize(self, alpha):
+        levels = self.level_count() - 1
+        return round(alpha * levels) / levels
+
+    def assign_baked_materials(self, obj, fade_obj, alpha_float, image_cache, material_cache):
+        """烘焙模式：材质和贴图都按 (来源, 量化透明度) 共享"""
+        level = self.quantize(alpha_float)
+        alpha_int = int(round(level * 100))
+        for slot, src_slot in zip(fade_obj.material_slots, obj.material_slots):
+            src_mat = src_slot.material
+            if not src_mat:
+                continue
+            key = (src_mat.name_full, alpha_int)
+            mat = material_cache.get(key)
+            if mat is None:
+                mat = src_mat.copy()
+                mat.name = f"{src_mat.name}_alpha_{alpha_int}"
+                material_cache[key] = mat
+                self.apply_alpha(mat, level, image_cache)
+            slot.material = mat
+
+    def apply_alpha(self, mat, level, image_cache):
+        mat.use_nodes = True
+        nodes = mat.node_tree.nodes
+        bsdf = next((n for n in nodes if n.type == 'BSDF_PRINCIPLED'), None)
+        if not bsdf:
+            return
+
+        alpha_input = bsdf.inputs['Alpha']
+        mat.blend_method = 'BLEND'
+
+        if not alpha_input.is_linked:
+            alpha_input.default_value = level
+        else:
+            from_node = alpha_input.links[0].from_node
+            if from_node.type == 'TEX_IMAGE' and from_node.image:
+                baked_image = image_cache.get(from_node.image, level)
+                if baked_image and from_node.image.name != baked_image.name:
+                    from_node.image = baked_image
+
+    def assign_attribute_materials(self, obj, fade_obj, alpha_float, attr_materials):
+        """属性模式：每个来源材质只做一份，透明度由物体自定义属性驱动，不烘焙任何贴图"""
+        fade_obj[FADE_ATTRIBUTE] = alpha_float
+        for slot, src_slot in zip(fade_obj.material_slots, obj.material_slots):
+            src_mat = src_slot.material
+            if not src_mat:
+                continue
+            mat = attr_materials.get(src_mat.name_full)
+            if mat is None:
+                mat = make_attribute_alpha_material(src_mat)
+                attr_materials[src_mat.name_full] = mat
+            slot.material = mat
+
+    def memory_report(self, objects, image_cache):
+        """对比三种方案的贴图内存：旧的逐步烘焙 / 量化共享缓存 / 属性驱动"""
+        per_step = {}
+        for obj in objects:
+            for slot in obj.material_slots:
+                img = alpha_texture(slot.material)
+                if img:
+                    per_step[img.name_full] = image_bytes(img) * self.steps
+        legacy = sum(per_step.values())
+        cached = image_cache.total_bytes
+        return (f" 贴图内存: 逐步烘焙≈{legacy / 2**20:.1f}MB | 量化共享({self.level_count()}级)"
+                f"≈{cached / 2**20:.1f}MB ({len(image_cache.images)}张) | 属性驱动=0MB")
+
     def execute(self, context):
         print("开始执行 Alpha Fade 动画生成...")
         original_objects = [obj for obj in context.selected_objects if obj.type == 'MESH']
@@ -108,6 +260,11 @@ class OBJECT_OT_animated_alpha_fade(bpy.types.Operator):
             self.report({'WARNING'}, "没有选中任何网格物体。")
             return {'CANCELLED'}
 
+        # 整次执行共享的缓存：同一贴图 + 同一量化透明度只烘焙一次，同一材质 + 同一透明度只复制一次
+        image_cache = AlphaImageCache()
+        material_cache = {}
+        attr_materials = {}
+
         for obj in original_objects:
             print(f"  处理物体: {obj.name}")
             
@@ -141,36 +298,14 @@ class OBJECT_OT_animated_alpha_fade(bpy.types.Operator):
             else:
                 print(f"    成功复用 {len(fade_objects)} 个物体。")
 
-            print(f"    处理材质Alpha...")
+            print(f"    处理材质Alpha ({self.alpha_mode})...")
             for i, fade_obj in enumerate(fade_objects):
                 alpha_float = i / (self.steps - 1) if self.steps > 1 else 0.0
-                alpha_int = int(round(alpha_float * 100))
-                
-                if fade_obj.material_slots:
-                    for slot in fade_obj.material_slots:
-                        if not slot.material: continue
-                        if slot.material.users > 1 or slot.material.library: slot.material = slot.material.copy()
-
-                        mat = slot.material
-                        mat.use_nodes = True
-                        nodes = mat.node_tree.nodes
-                        bsdf = next((n for n in nodes if n.type == 'BSDF_PRINCIPLED'), None)
-                        if not bsdf: continue
-                        
-                        alpha_input = bsdf.inputs['Alpha']
-                        mat.blend_method = 'BLEND'
-                        
-                        if not alpha_input.is_linked:
-                            alpha_input.default_value = alpha_float
-                        else:
-                            from_node = alpha_input.links[0].from_node
-                            if from_node.type == 'TEX_IMAGE' and from_node.image:
-                                base_image = from_node.image
-                                baked_image_name = f"{base_image.name}_alpha_{alpha_int}"
-                                baked_image = bake_alpha_to_image(base_image, alpha_float, baked_image_name)
-                                if baked_image and from_node.image.name != baked_image.name:
-                                    from_node.image = baked_image
-            
+                if self.alpha_mode == 'ATTRIBUTE':
+                    self.assign_attribute_materials(obj, fade_obj, alpha_float, attr_materials)
+                else:
+                    self.assign_baked_materials(obj, fade_obj, alpha_float, image_cache, material_cache)
+
             print(f"    设置可见性动画 (通过缩放)...")
             for fade_obj in fade_objects:
                 fade_obj.animation_data_clear()
@@ -220,7 +355,9 @@ class OBJECT_OT_animated_alpha_fade(bpy.types.Operator):
             obj.hide_render = True
             obj.select_set(False)
 
-        self.report({'INFO'}, f"为 {len(original_objects)} 个物体生成了基于缩放的 Alpha Fade 动画。")
+        report = self.memory_report(original_objects, image_cache)
+        print(report)
+        self.report({'INFO'}, f"为 {len(original_objects)} 个物体生成了基于缩放的 Alpha Fade 动画。{report}")
         print("Alpha Fade 动画生成/更新完成。")
         return {'FINISHED'}
 
@@ -3,13 +3,19 @@
 # 材质贴图一键给box投影方式 
 # 2网格
 import bpy
+import os
+import runpy
+
+
+# 共享工具 (导出预设、导出清单、材质节点索引等) 统一由 99未分类/共享加载.py 取出或安装
+load_shared = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", "")))),
+                                          "99未分类", "共享加载.py"))["load_shared"]
+
 
 active_material = bpy.context.object.active_material
-if active_material is not None:
-    node_tree = active_material.node_tree
-    mat_name = active_material.name
-    print(mat_name)
-    for node in node_tree.nodes:
-        if node.type == 'TEX_IMAGE':
-            # 将投影方式更改为方框
-            node.projection = 'BOX'
\ No newline at end of file
+graph = load_shared("material_graph_index", "5材质贴图/材质节点索引.py").get(active_material)
+if graph is not None:
+    print(active_material.name)
+    for node in graph.nodes_of_type('TEX_IMAGE'):
+        # 将投影方式更改为方框
+        node.projection = 'BOX'
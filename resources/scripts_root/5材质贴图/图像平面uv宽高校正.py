@@ -1,7 +1,9 @@
 # script_id: 08669b56-c76b-4ee8-923d-2877d557c423
 import bpy
 import bmesh
+import os
 import re
+import runpy
 import numpy as np
 
 def parse_k_to_pixels(k_string):
@@ -19,26 +21,17 @@ def parse_k_to_pixels(k_string):
     except ValueError:
         return None
 
+# 共享工具 (导出预设、导出清单、材质节点索引等) 统一由 99未分类/共享加载.py 取出或安装
+load_shared = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", "")))),
+                                          "99未分类", "共享加载.py"))["load_shared"]
+
+
 def find_base_color_image_node(material):
-    """智能查找连接到 Principled BSDF 的 Base Color 输入的图像纹理节点"""
-    if not material or not material.use_nodes: return None
-    output_node = next((n for n in material.node_tree.nodes if n.type == 'OUTPUT_MATERIAL' and n.is_active_output), None)
-    if not output_node: return None
-    surface_input = output_node.inputs.get('Surface')
-    if not surface_input or not surface_input.is_linked: return None
-    shader_node = surface_input.links[0].from_node
-    base_color_input = shader_node.inputs.get('Base Color')
-    if not base_color_input: return None
-    def trace_back(socket):
-        if not socket.is_linked: return None
-        from_node = socket.links[0].from_node
-        if from_node.type == 'TEX_IMAGE' and from_node.image: return from_node
-        for input_socket in from_node.inputs:
-            if input_socket.type in ('RGBA', 'VECTOR'):
-                result = trace_back(input_socket)
-                if result: return result
-        return None
-    return trace_back(base_color_input)
+    """查找连接到 Principled BSDF 的 Base Color 输入的图像纹理节点 (走共享索引，不再每次递归)"""
+    graph = load_shared("material_graph_index", "5材质贴图/材质节点索引.py").get(material) if material else None
+    if graph is None: return None
+    nodes = [n for n in graph.images_for_socket('Base Color') if n.image]
+    return nodes[0] if nodes else None
 
 class IMAGE_OT_smart_fill_to_square(bpy.types.Operator):
     bl_idname = "image.smart_fill_to_square"
@@ -0,0 +1,207 @@
+# script_id: 93b63441-03bd-402f-b458-1c891937edc8
+# -*- coding: utf-8 -*-
+# =============================================================================
+#  材质节点索引 (Material Graph Index)
+#  为每个材质建一次索引：PBR 插槽 -> 上游贴图节点、贴图用途、节点类型表。
+#  索引放在 bpy.app.driver_namespace 里，整个 Blender 会话内所有脚本共享；
+#  材质被编辑后由 depsgraph 回调标脏，再用节点树指纹确认是否真的需要重建；
+#  回调是 @persistent 的，打开别的文件或撤销/重做时整个索引清空。
+#
+#  其他脚本的用法 (运行过本脚本后，或由它们自动加载)：
+#      index = bpy.app.driver_namespace["material_graph_index"]
+#      graph = index.get(material)
+#      graph.images_for_socket('Base Color')   # -> [图像纹理节点]
+#      graph.images_with_role('Normal')
+# =============================================================================
+
+import bpy
+from bpy.app.handlers import persistent
+
+INDEX_KEY = "material_graph_index"
+
+# Principled 插槽名 -> 贴图用途 (与 设置贴图名称.py 的命名一致)
+SOCKET_ROLES = {
+    'Specular IOR Level': 'Specular', 'Specular Tint': 'SpecularTint',
+    'Base Color': 'BaseColor', 'Metallic': 'Metallic', 'Specular': 'Specular',
+    'Roughness': 'Roughness', 'Normal': 'Normal', 'Alpha': 'Opacity',
+    'Emission': 'Emission', 'Emission Color': 'Emission', 'Height': 'Height',
+    'Subsurface': 'Subsurface', 'Subsurface Weight': 'Subsurface',
+    'Subsurface Color': 'SubsurfaceColor', 'Subsurface Radius': 'SubsurfaceRadius',
+    'Sheen': 'Sheen', 'Sheen Weight': 'Sheen', 'Sheen Tint': 'SheenTint',
+    'Clearcoat': 'Clearcoat', 'Coat Weight': 'Clearcoat',
+    'Clearcoat Roughness': 'ClearcoatRoughness', 'Coat Roughness': 'ClearcoatRoughness',
+    'IOR': 'IOR', 'Transmission': 'Transmission', 'Transmission Weight': 'Transmission',
+    'Anisotropic': 'Anisotropic', 'Anisotropic Rotation': 'AnisotropicRotation',
+}
+# 途经这些节点时，用途以节点为准 (例如法线贴图经过 Normal Map 节点)
+NODE_ROLES = {'NORMAL_MAP': 'Normal', 'BUMP': 'Height', 'DISPLACEMENT': 'Displacement'}
+
+
+def tree_fingerprint(tree):
+    """节点树指纹：节点(名字/类型/图像) + 连线。只做一次线性遍历，不递归"""
+    nodes = tuple((n.name, n.bl_idname, n.image.name_full if getattr(n, "image", None) else "")
+                  for n in tree.nodes)
+    links = tuple((l.from_node.name, l.from_socket.identifier, l.to_node.name, l.to_socket.identifier)
+                  for l in tree.links if not l.is_muted)
+    return hash((nodes, links))
+
+
+class MaterialGraph:
+    """单个材质的索引结果；只存节点名字，取用时再从节点树解析，避免悬空引用"""
+
+    def __init__(self, material):
+        self.material_name = material.name_full
+        tree = material.node_tree
+        self.fingerprint = tree_fingerprint(tree)
+        self.node_types = {}
+        self.socket_images = {}   # Principled 插槽名 -> [贴图节点名] (由近到远，去重)
+        self.image_roles = {}     # 贴图节点名 -> 用途
+        self.output_images = {}   # 材质输出插槽 (如 Displacement) -> [贴图节点名]
+        self._build(tree)
+
+    def _build(self, tree):
+        incoming = {}
+        for link in tree.links:
+            if not link.is_muted:
+                incoming.setdefault(link.to_node.name, []).append(link)
+
+        for node in tree.nodes:
+            self.node_types.setdefault(node.type, []).append(node.name)
+
+        def upstream_images(start_node, role):
+            found, stack, seen = [], [(start_node, role)], set()
+            while stack:
+                node, cur_role = stack.pop()
+                if node.name in seen:
+                    continue
+                seen.add(node.name)
+                cur_role = NODE_ROLES.get(node.type, cur_role)
+                if node.type == 'TEX_IMAGE':
+                    found.append(node.name)
+                    self.image_roles.setdefault(node.name, cur_role)
+                # 逆序压栈，保证弹出顺序与插槽顺序一致 (结果稳定)
+                for link in reversed(incoming.get(node.name, ())):
+                    stack.append((link.from_node, cur_role))
+            return found
+
+        for bsdf in (tree.nodes.get(n) for n in self.node_types.get('BSDF_PRINCIPLED', ())):
+            for link in incoming.get(bsdf.name, ()):
+                name = link.to_socket.name
+                role = SOCKET_ROLES.get(name, 'Other')
+                images = self.socket_images.setdefault(name, [])
+                for img in upstream_images(link.from_node, role):
+                    if img not in images:
+                        images.append(img)
+
+        for out in (tree.nodes.get(n) for n in self.node_types.get('OUTPUT_MATERIAL', ())):
+            for link in incoming.get(out.name, ()):
+                if link.to_socket.name == 'Displacement':
+                    self.output_images['Displacement'] = upstream_images(link.from_node, 'Displacement')
+
+    # --- 查询接口 (全部是字典查找) ---
+    def _nodes(self, names):
+        mat = bpy.data.materials.get(self.material_name)
+        if mat is None or mat.node_tree is None:
+            return []
+        nodes = mat.node_tree.nodes
+        return [n for n in (nodes.get(name) for name in names) if n is not None]
+
+    def images_for_socket(self, socket_name):
+        return self._nodes(self.socket_images.get(socket_name, ()))
+
+    def images_with_role(self, role):
+        return self._nodes([n for n, r in self.image_roles.items() if r == role])
+
+    def nodes_of_type(self, node_type):
+        return self._nodes(self.node_types.get(node_type, ()))
+
+    def role_of(self, node):
+        return self.image_roles.get(node.name, 'Other')
+
+
+class MaterialGraphIndex:
+    def __init__(self):
+        self.graphs = {}
+        self.dirty = set()
+        self.stats = {"hit": 0, "verify": 0, "build": 0}
+
+    def get(self, material):
+        if material is None or not material.use_nodes or material.node_tree is None:
+            return None
+        key = material.name_full
+        graph = self.graphs.get(key)
+        if graph is not None and key not in self.dirty:
+            self.stats["hit"] += 1
+            return graph
+        if graph is not None:
+            # 被标脏：对比指纹，只改了数值没改结构时不用重建
+            self.stats["verify"] += 1
+            self.dirty.discard(key)
+            if tree_fingerprint(material.node_tree) == graph.fingerprint:
+                return graph
+        self.stats["build"] += 1
+        self.dirty.discard(key)
+        graph = MaterialGraph(material)
+        self.graphs[key] = graph
+        return graph
+
+    def invalidate(self, material=None):
+        if material is None:
+            self.dirty.update(self.graphs)
+        else:
+            self.dirty.add(material.name_full)
+
+    def images_with_role(self, materials, role):
+        result = []
+        for mat in materials:
+            graph = self.get(mat)
+            if graph:
+                result.extend(graph.images_with_role(role))
+        return result
+
+
+@persistent
+def _on_depsgraph_update(scene, depsgraph):
+    index = bpy.app.driver_namespace.get(INDEX_KEY)
+    if index is None:
+        return
+    for update in depsgraph.updates:
+        id_data = update.id
+        if isinstance(id_data, bpy.types.Material):
+            index.dirty.add(id_data.original.name_full)
+        elif isinstance(id_data, bpy.types.NodeTree):
+            # 节点组被改：无法便宜地知道哪些材质用到了它，全部交给指纹校验
+            index.invalidate()
+
+
+@persistent
+def _on_load_material_index(*args):
+    # 打开别的文件 / 撤销重做后，同名材质已是另一份数据，缓存的节点引用也失效了
+    index = bpy.app.driver_namespace.get(INDEX_KEY)
+    if index is not None:
+        index.graphs.clear()
+        index.dirty.clear()
+
+
+def install():
+    """安装(或替换)共享索引和回调，重复运行不会叠加回调"""
+    for handlers, fn in ((bpy.app.handlers.depsgraph_update_post, _on_depsgraph_update),
+                         (bpy.app.handlers.load_post, _on_load_material_index),
+                         (bpy.app.handlers.undo_post, _on_load_material_index),
+                         (bpy.app.handlers.redo_post, _on_load_material_index)):
+        for handler in list(handlers):
+            if getattr(handler, "__name__", "") == fn.__name__:
+                handlers.remove(handler)
+        handlers.append(fn)
+    index = MaterialGraphIndex()
+    bpy.app.driver_namespace[INDEX_KEY] = index
+    return index
+
+
+install()
+
+if __name__ == "__main__":
+    index = bpy.app.driver_namespace[INDEX_KEY]
+    for mat in bpy.data.materials:
+        index.get(mat)
+    print(f"材质节点索引已就绪：{len(index.graphs)} 个材质")
@@ -0,0 +1,215 @@
+# script_id: a4d86e66-c05b-4adf-8b53-36c60f6bf47d
+# Blender 4.x 脚本
+# 功能：找出被重复加载/重复打包的同一张贴图，把所有引用合并到一个图像数据块上。
+#
+# 判重方式：
+#   - 外部图片：对磁盘文件的字节流做 SHA1
+#   - 打包图片：对打包进 .blend 的字节做 SHA1
+#   - (可选) 近似重复：把像素缩成 16x16 灰度后量化再哈希，能抓到重新压缩/换格式的同一张图
+# 哈希计算分块流式读取，并放到线程池里并行；bpy 数据只在主线程访问。
+#
+# =========================================================================
+#  ！！！ 警 告 ！！！  关闭 DRY_RUN 后会修改场景数据，请先保存文件！
+# =========================================================================
+
+import bpy
+import os
+import re
+import time
+import hashlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# --- 配置区 ---
+DRY_RUN = True              # 只打印报告，不做修改
+REMOVE_DUPLICATES = True    # 合并后删除没人用的重复图像
+NEAR_DUPLICATES = False     # 开启像素级近似判重 (需要加载像素，较慢)
+THUMB_SIZE = 16             # 近似判重的缩略图边长
+THUMB_LEVELS = 32           # 近似判重的量化级数，越小越宽松
+CHUNK_SIZE = 1 << 20        # 流式读取块大小
+MAX_WORKERS = os.cpu_count() or 4
+
+
+def hash_file(path):
+    sha = hashlib.sha1()
+    with open(path, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def hash_bytes(data):
+    # hashlib 处理大块数据时会释放 GIL，分块喂进去线程池才能真正并行
+    sha = hashlib.sha1()
+    view = memoryview(data)
+    for start in range(0, len(view), CHUNK_SIZE):
+        sha.update(view[start:start + CHUNK_SIZE])
+    return sha.hexdigest()
+
+
+def pixel_signature(pixels, width, height, channels):
+    """缩成 THUMB_SIZE 见方的灰度图再量化，作为近似重复的指纹"""
+    img = pixels.reshape(height, width, channels)
+    gray = img[..., :3].mean(axis=2) if channels >= 3 else img[..., 0]
+    ys = np.linspace(0, height, THUMB_SIZE + 1).astype(int)
+    xs = np.linspace(0, width, THUMB_SIZE + 1).astype(int)
+    # 先按行块求和，再按列块求和，得到每个格子的均值
+    rows = np.add.reduceat(gray, ys[:-1], axis=0)
+    cells = np.add.reduceat(rows, xs[:-1], axis=1)
+    counts = np.outer(np.diff(ys), np.diff(xs))
+    thumb = cells / np.maximum(counts, 1)
+    quant = np.clip(thumb * THUMB_LEVELS, 0, THUMB_LEVELS - 1).astype(np.uint8)
+    return "px:" + hashlib.sha1(quant.tobytes()).hexdigest()
+
+
+def image_memory(img):
+    """估算图像解码后占用的内存 (字节) 和打包数据大小"""
+    width, height = img.size
+    bytes_per_channel = 4 if img.is_float else 1
+    decoded = width * height * img.channels * bytes_per_channel
+    packed = img.packed_file.size if img.packed_file else 0
+    return decoded, packed
+
+
+def collect_jobs():
+    """
+    主线程：决定每张图用什么方式哈希，并把需要的原始数据(路径/字节/像素)取出来。
+    返回 [(image, kind, payload)]
+    """
+    jobs = []
+    for img in bpy.data.images:
+        if img.library or img.type != 'IMAGE' or img.source not in {'FILE', 'MOVIE'}:
+            continue
+        if img.packed_file:
+            jobs.append((img, 'bytes', img.packed_file.data))
+            continue
+        path = bpy.path.abspath(img.filepath, library=img.library)
+        if path and os.path.isfile(path):
+            jobs.append((img, 'file', path))
+        else:
+            print(f"  跳过 '{img.name}'：文件不存在 ({img.filepath})")
+    return jobs
+
+
+def read_pixels(img):
+    width, height = img.size
+    if width == 0 or height == 0:
+        return None
+    pixels = np.empty(width * height * img.channels, dtype=np.float32)
+    img.pixels.foreach_get(pixels)
+    return pixels, width, height, img.channels
+
+
+def compute_hashes(jobs):
+    hashes = {}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        futures = {}
+        for img, kind, payload in jobs:
+            fn = hash_bytes if kind == 'bytes' else hash_file
+            futures[img.name] = pool.submit(fn, payload)
+
+        if NEAR_DUPLICATES:
+            # 像素只能在主线程读取；读完一张就把缩略图计算丢进线程池，与下一张的读取重叠。
+            # 每个在飞的任务都拿着一整张图的浮点像素，所以同时在飞的数量要有上限
+            pending = {}
+
+            def collect(done):
+                for fut in done:
+                    hashes[pending.pop(fut)] = fut.result()
+
+            for img, _, _ in jobs:
+                while len(pending) >= MAX_WORKERS * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                data = read_pixels(img)
+                if data is not None:
+                    pending[pool.submit(pixel_signature, *data)] = img.name
+                del data
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        for name, fut in futures.items():
+            if name in hashes:
+                continue
+            try:
+                hashes[name] = fut.result()
+            except OSError as e:
+                print(f"  读取失败 '{name}': {e}")
+    return hashes
+
+
+_SUFFIX = re.compile(r"\.\d{3,}$")
+
+
+def _keeper_rank(img):
+    """优先保留：无 .001 后缀 > 外部文件(不占 .blend 体积) > 用户多 > 名字"""
+    return (bool(_SUFFIX.search(img.name)), img.packed_file is not None, -img.users, img.name)
+
+
+def find_duplicate_groups():
+    jobs = collect_jobs()
+    start = time.perf_counter()
+    hashes = compute_hashes(jobs)
+    print(f"已哈希 {len(hashes)} 张图像，用时 {time.perf_counter() - start:.2f}s ({MAX_WORKERS} 线程)")
+
+    groups = {}
+    for img, _, _ in jobs:
+        digest = hashes.get(img.name)
+        if digest is None:
+            continue
+        # 色彩空间/透明模式不同的同一张图用途不同，不能合并
+        key = (digest, img.colorspace_settings.name, img.alpha_mode)
+        groups.setdefault(key, []).append(img)
+
+    result = []
+    for imgs in groups.values():
+        if len(imgs) > 1:
+            imgs.sort(key=_keeper_rank)
+            result.append(imgs)
+    result.sort(key=lambda g: g[0].name)
+    return result
+
+
+def dedupe_images():
+    print("==============================================")
+    print("开始查找重复贴图...")
+    groups = find_duplicate_groups()
+    if not groups:
+        print("没有发现重复贴图。")
+        print("==============================================")
+        return
+
+    saved_decoded = saved_packed = 0
+    for imgs in groups:
+        keeper, dups = imgs[0], imgs[1:]
+        print(f"  保留 '{keeper.name}' <- " + ", ".join(f"'{i.name}'({i.users})" for i in dups))
+        for img in dups:
+            decoded, packed = image_memory(img)
+            saved_decoded += decoded
+            saved_packed += packed
+
+    dup_count = sum(len(g) - 1 for g in groups)
+    print(f"共 {len(groups)} 组、{dup_count} 张重复贴图。")
+    print(f"预计节省：显存/内存 {saved_decoded / 2**20:.1f} MB，.blend 打包数据 {saved_packed / 2**20:.1f} MB")
+
+    if DRY_RUN:
+        print("DRY_RUN 模式：只输出报告，没有修改任何数据。")
+        print("==============================================")
+        return
+
+    removed = 0
+    for imgs in groups:
+        keeper = imgs[0]
+        for dup in imgs[1:]:
+            # user_remap 一次替换所有引用：图像节点、纹理、笔刷、UV 编辑器……
+            dup.user_remap(keeper)
+            if REMOVE_DUPLICATES and dup.users == 0:
+                bpy.data.images.remove(dup)
+                removed += 1
+    print(f"已合并 {dup_count} 张重复贴图的引用，删除 {removed} 个图像数据块。")
+    print("==============================================")
+
+
+if __name__ == "__main__":
+    dedupe_images()
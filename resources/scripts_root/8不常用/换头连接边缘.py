@@ -9,111 +9,217 @@
 # script_id: 82003ff6-6c14-4c82-9ff7-be1757b0eefc
 import bpy
 import bmesh
-import random
+import heapq
+import numpy as np
+from mathutils import kdtree
+
+# =============================================================================
+#  换头连接边缘 (bmesh 直连版)
+#  使用方法：只显示(隐藏其余部分)头部和身体要对接的两圈边界边，运行脚本。
+#  1. 直接从 bmesh 取出可见的闭合边圈，不再随机选边 + select_linked
+#  2. 按弧长把点少的一圈补点，让两圈点数一致
+#  3. 用 FFT 一次算出所有旋转错位的代价，取最优对齐 (含反向)
+#  4. 一次 bmesh 操作完成焊接(或用 bridge_loops 桥接出面)，结果完全确定
+# =============================================================================
+
+MERGE_DIST = 0.008        # 对应旧脚本 remove_doubles 的阈值
+CONNECT_MODE = 'WELD'     # 'WELD': 两圈在中点焊接 (旧行为)  'BRIDGE': 在两圈之间生成四边面
+MAKE_CIRCLE = True        # 对接前先把两圈拟合成圆 (代替 looptools_circle)
+SMOOTH_FACTOR = 1.0
+
+
+# --- 1. 取边圈 ---
+def 提取边圈(bm):
+    """把所有可见边按连通性分组，并排成有序的闭合顶点序列"""
+    可见边 = [e for e in bm.edges if not e.hide]
+    邻接 = {}
+    for e in 可见边:
+        a, b = e.verts
+        邻接.setdefault(a, []).append(b)
+        邻接.setdefault(b, []).append(a)
+
+    边圈列表 = []
+    已访问 = set()
+    for 起点 in 邻接:
+        if 起点 in 已访问:
+            continue
+        if any(len(邻接[v]) != 2 for v in _连通顶点(起点, 邻接)):
+            raise ValueError("可见的边不是简单闭合边圈，请只保留两圈边界边可见")
+        圈 = [起点]
+        已访问.add(起点)
+        上一个, 当前 = 起点, 邻接[起点][0]
+        while 当前 is not 起点:
+            圈.append(当前)
+            已访问.add(当前)
+            a, b = 邻接[当前]
+            上一个, 当前 = 当前, (b if a is 上一个 else a)
+        边圈列表.append(圈)
+    return 边圈列表
+
+
+def _连通顶点(起点, 邻接):
+    栈, 结果 = [起点], {起点}
+    while 栈:
+        for n in 邻接[栈.pop()]:
+            if n not in 结果:
+                结果.add(n)
+                栈.append(n)
+    return 结果
+
+
+def 坐标数组(圈):
+    return np.array([v.co for v in 圈], dtype=np.float64)
+
+
+def 选出最近两圈(边圈列表):
+    """多于两圈时，用 KD 树找彼此平均距离最近的一对"""
+    if len(边圈列表) == 2:
+        return 边圈列表
+    树列表 = []
+    for 圈 in 边圈列表:
+        tree = kdtree.KDTree(len(圈))
+        for i, v in enumerate(圈):
+            tree.insert(v.co, i)
+        tree.balance()
+        树列表.append(tree)
+    最佳, 最佳距离 = None, float("inf")
+    for i in range(len(边圈列表)):
+        for j in range(i + 1, len(边圈列表)):
+            距离 = sum(树列表[j].find(v.co)[2] for v in 边圈列表[i]) / len(边圈列表[i])
+            if 距离 < 最佳距离:
+                最佳, 最佳距离 = (边圈列表[i], 边圈列表[j]), 距离
+    return list(最佳)
+
+
+# --- 2. 按弧长补点 ---
+def 按弧长补点(bm, 圈, 目标点数):
+    """
+    给点少的一圈补点：每次把一个切点分给"当前分段最长"的边，
+    新点落在原边上，不改变边圈形状。
+    """
+    需要 = 目标点数 - len(圈)
+    if 需要 <= 0:
+        return 圈
+    n = len(圈)
+    co = 坐标数组(圈)
+    长度 = np.linalg.norm(np.roll(co, -1, axis=0) - co, axis=1)
+    切数 = [0] * n
+    堆 = [(-长度[i], i) for i in range(n)]
+    heapq.heapify(堆)
+    for _ in range(需要):
+        _, i = heapq.heappop(堆)
+        切数[i] += 1
+        heapq.heappush(堆, (-长度[i] / (切数[i] + 1), i))
+
+    新圈 = []
+    for i in range(n):
+        u, v = 圈[i], 圈[(i + 1) % n]
+        新圈.append(u)
+        if not 切数[i]:
+            continue
+        U, V = u.co.copy(), v.co.copy()
+        当前边 = bm.edges.get((u, v))
+        当前点 = u
+        k = 切数[i]
+        for j in range(1, k + 1):
+            _, 新点 = bmesh.utils.edge_split(当前边, 当前点, 0.5)
+            新点.co = U.lerp(V, j / (k + 1))
+            新圈.append(新点)
+            当前边 = bm.edges.get((新点, v))
+            当前点 = 新点
+    return 新圈
+
+
+# --- 3. 对齐 ---
+def 最优对齐(A, B):
+    """
+    返回 (偏移, 是否反向)，使 sum |A_i - B_{i+偏移}|^2 最小。
+    各自减去重心后，交叉项就是循环互相关，用 FFT 一次算完所有偏移。
+    """
+    A = A - A.mean(axis=0)
+    B = B - B.mean(axis=0)
+    最佳 = None
+    for 反向 in (False, True):
+        Bs = B[::-1] if 反向 else B
+        相关 = np.fft.ifft(np.conj(np.fft.fft(A, axis=0)) * np.fft.fft(Bs, axis=0), axis=0).real.sum(axis=1)
+        s = int(np.argmax(相关))
+        if 最佳 is None or 相关[s] > 最佳[0]:
+            最佳 = (相关[s], s, 反向)
+    return 最佳[1], 最佳[2]
+
+
+def 拟合成圆(圈):
+    """最小二乘平面 + 平均半径，保持各点的角度顺序"""
+    co = 坐标数组(圈)
+    中心 = co.mean(axis=0)
+    _, _, vh = np.linalg.svd(co - 中心, full_matrices=False)
+    x = (co - 中心) @ vh[0]
+    y = (co - 中心) @ vh[1]
+    半径 = np.hypot(x, y).mean()
+    角度 = np.arctan2(y, x)
+    新坐标 = 中心 + 半径 * (np.cos(角度)[:, None] * vh[0] + np.sin(角度)[:, None] * vh[1])
+    for v, c in zip(圈, 新坐标):
+        v.co = c
+
+
+# --- 4. 连接 ---
+def 圈的边(bm, 圈):
+    return [bm.edges.get((圈[i], 圈[(i + 1) % len(圈)])) for i in range(len(圈))]
+
+
+def 连接两圈(bm, 圈1, 圈2, 偏移, 反向):
+    if CONNECT_MODE == 'BRIDGE':
+        # 交给 bridge_loops：两圈点数已补齐，绕向和扭转由算子自己处理
+        bmesh.ops.bridge_loops(bm, edges=圈的边(bm, 圈1) + 圈的边(bm, 圈2))
+        return 圈1 + 圈2
+
+    n = len(圈1)
+    if 反向:
+        圈2 = 圈2[::-1]
+    配对 = [(圈1[i], 圈2[(i + 偏移) % n]) for i in range(n)]
+
+    # 焊接：先把保留的点挪到中点，再一次 weld_verts
+    for a, b in 配对:
+        a.co = (a.co + b.co) * 0.5
+    bmesh.ops.weld_verts(bm, targetmap={b: a for a, b in 配对})
+    return 圈1
+
+
 def 连接边缘():
-    
     # 确保在编辑模式下
     bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='EDGE')
-    obj = bpy.context.object
-    bm = bmesh.from_edit_mesh(obj.data)
-    bpy.ops.mesh.select_all(action='SELECT')
-    # 获取所有当前选中的边
-    所有边 = [e for e in bm.edges if e.select]
-    # 取消选择所有边
-    for e in 所有边:
-        e.select = False
-    # 从所有边中随机选择一条边
-    random_edge = random.choice(所有边)
-    random_edge.select = True
-    bpy.ops.mesh.select_linked(delimit=set())
-    bpy.ops.mesh.remove_doubles(threshold=0.008)
-    圈1_1 = [v for v in bm.edges if v.select]
-    bpy.ops.mesh.select_all(action='INVERT')
-    bpy.ops.mesh.remove_doubles(threshold=0.008)
-    圈2_1 = [v for v in bm.edges if v.select]
-    # 更新bmesh到mesh数据
-    bmesh.update_edit_mesh(obj.data)
-    def 计算边长度(edge):
-        # 计算并返回边的长度
-        return (edge.verts[0].co - edge.verts[1].co).length
-    def 两组变数量保持一致(edges1, edges2):
-        longest_n_edges = []
-        bpy.ops.mesh.select_mode(use_extend=False, use_expand=False, type='EDGE')
-        if len(edges1) != len(edges2):
-            # 确定边少的路径
-            if len(edges1) > len(edges2):
-                edge_count_difference = len(edges1) - len(edges2)
-                edges_to_sort = edges2
-            else:
-                edge_count_difference = len(edges2) - len(edges1)
-                edges_to_sort = edges1
-            # 自动计算边的长度并进行降序排序
-            边_降序列 = sorted(edges_to_sort, key=计算边长度, reverse=True)
-            # 取出最长的n条边
-            longest_n_edges = 边_降序列[:edge_count_difference]
-        else:
-            longest_n_edges = []
-        if longest_n_edges:
-            print(f"选出来的最长的{len(longest_n_edges)}条边为:", longest_n_edges)
-        else:
-            print("两边数相同，不需要提取边。")
-        # 获取当前编辑网格的bmesh表示
-        obj = bpy.context.edit_object
-        me = obj.data
-        bm = bmesh.from_edit_mesh(me)
-        # 取消选择所有边
-        bpy.ops.mesh.select_all(action='DESELECT')
-        bm.select_flush(False)
-        # 选择给定边
-        for edge in bm.edges:
-            if edge in longest_n_edges:
-                bpy.ops.mesh.select_all(action='DESELECT')
-                edge.select = True
-                bpy.ops.mesh.subdivide(number_cuts=1)
-        
-        bpy.ops.mesh.select_linked(delimit=set())
-        圈1 = [e for e in bm.edges if e.select]
-        bpy.ops.mesh.looptools_circle()
-        bpy.ops.mesh.select_all(action='INVERT')
-        圈2 = [e for e in bm.edges if e.select]
-        bpy.ops.mesh.looptools_circle()
-        return 圈1, 圈2
-        
-        
-    圈1, 圈2=两组变数量保持一致(圈1_1,圈2_1)
-  
-    # 更新bmesh到mesh数据
-    bmesh.update_edit_mesh(obj.data)
-    bpy.ops.mesh.select_all(action='SELECT')
     obj = bpy.context.object
     bm = bmesh.from_edit_mesh(obj.data)
-    两圈 = [v for v in bm.edges if v.select]
-    bpy.ops.mesh.bridge_edge_loops()
-    bpy.ops.mesh.select_all(action='SELECT')
-    # 取消选择所有选中的边
-    for edge in 两圈:
-        edge.select = False
-    # 更新bmesh到mesh数据
+
+    可见点 = [v for v in bm.verts if not v.hide]
+    bmesh.ops.remove_doubles(bm, verts=可见点, dist=MERGE_DIST)
+
+    try:
+        圈1, 圈2 = 选出最近两圈(提取边圈(bm))
+    except ValueError as e:
+        print(f"换头连接边缘失败: {e}")
+        return
+
+    目标点数 = max(len(圈1), len(圈2))
+    圈1 = 按弧长补点(bm, 圈1, 目标点数)
+    圈2 = 按弧长补点(bm, 圈2, 目标点数)
+    if MAKE_CIRCLE:
+        拟合成圆(圈1)
+        拟合成圆(圈2)
+
+    偏移, 反向 = 最优对齐(坐标数组(圈1), 坐标数组(圈2))
+    接缝点 = 连接两圈(bm, 圈1, 圈2, 偏移, 反向)
+    print(f"已连接两圈边缘: 每圈 {目标点数} 个点, 偏移 {偏移}, {'反向' if 反向 else '同向'}")
+
+    # 处理接缝：显示全部，接缝外扩一圈三角化并平滑 (与旧脚本的 reveal/select_more 等效)
+    for elem in (*bm.verts, *bm.edges, *bm.faces):
+        elem.hide = False
+    区域面 = {f for v in 接缝点 if v.is_valid for f in v.link_faces}
+    区域点 = [v for f in 区域面 for v in f.verts]
+    bmesh.ops.triangulate(bm, faces=list(区域面), quad_method='BEAUTY', ngon_method='BEAUTY')
+    bmesh.ops.smooth_vert(bm, verts=list(set(区域点)), factor=SMOOTH_FACTOR,
+                          use_axis_x=True, use_axis_y=True, use_axis_z=True)
     bmesh.update_edit_mesh(obj.data)
-    
-    def 合并点到中心():
-        obj = bpy.context.object
-        bm = bmesh.from_edit_mesh(obj.data)
-        edges_to_merge = [e for e in bm.edges if e.select]
-        for edge in edges_to_merge:
-            center = (edge.verts[0].co + edge.verts[1].co) / 2
-            bmesh.ops.pointmerge(bm, verts=edge.verts[:], merge_co=center)
-        bmesh.ops.remove_doubles(bm, verts=bm.verts, dist=0.0001)
-        bmesh.update_edit_mesh(obj.data)
-        bpy.ops.mesh.select_all(action='DESELECT')
-    合并点到中心()
-    # 处理边,加选三角化并平滑
-    bpy.ops.mesh.reveal()
-    bpy.ops.mesh.select_all(action='INVERT')
-    bpy.ops.mesh.select_more()
-    bpy.ops.mesh.quads_convert_to_tris(quad_method='BEAUTY', ngon_method='BEAUTY')
-    bpy.ops.mesh.vertices_smooth(factor=1)
-    
-
-连接边缘()
\ No newline at end of file
+
+
+连接边缘()
@@ -8,61 +8,134 @@
 # script_id: ccbab5f9-75b3-4a5d-ac16-c80adcb5fabb
 # script_id: aff4bbac-615c-48c0-8560-7d397835b6d0
 import bpy
-import bmesh
+import numpy as np
 
-def select_uv_edges(mode='non_straight', tolerance=1e-5):
-    obj = bpy.context.active_object
+# 每个面角(loop)上这条 UV 边的方向类别，按位或汇总到网格边上
+UV_HORIZONTAL = 1
+UV_VERTICAL = 2
+UV_DIAGONAL = 4
 
-    if obj.mode != 'EDIT':
-        print("Please switch to Edit Mode.")
-        return
 
-    # Ensure we are in edit mode and use the active UV layer
-    bpy.context.tool_settings.mesh_select_mode = (False, True, False)
-    bpy.ops.mesh.select_all(action='DESELECT')
+def read_array(collection, attr, count, width=1, dtype=np.float32):
+    data = np.empty(count * width, dtype=dtype)
+    collection.foreach_get(attr, data)
+    return data.reshape(-1, width) if width > 1 else data
+
+
+def read_loop_uvs(mesh, uv_layer):
+    # Blender 3.5+ 用 uv_layer.uv["vector"]，老版本退回 uv_layer.data["uv"]
+    if hasattr(uv_layer, "uv"):
+        return read_array(uv_layer.uv, "vector", len(mesh.loops), 2)
+    return read_array(uv_layer.data, "uv", len(mesh.loops), 2)
+
+
+def classify_uv_edges(mesh, tolerance=1e-5):
+    """
+    用面角级别的 UV 给每条边分类，返回 (类别位掩码, 是否在接缝处被拆开)。
+    每个面角 l 对应的 UV 边是 uv[l] -> uv[下一个面角]，所以接缝两侧都会被考虑到。
+    """
+    uv_layer = mesh.uv_layers.active
+    edge_count = len(mesh.edges)
+    if uv_layer is None or edge_count == 0:
+        return None, None
+
+    loop_count = len(mesh.loops)
+    poly_count = len(mesh.polygons)
+    uv = read_loop_uvs(mesh, uv_layer).astype(np.float64)
+    loop_vert = read_array(mesh.loops, "vertex_index", loop_count, dtype=np.int32)
+    loop_edge = read_array(mesh.loops, "edge_index", loop_count, dtype=np.int32)
+    loop_start = read_array(mesh.polygons, "loop_start", poly_count, dtype=np.int32)
+    loop_total = read_array(mesh.polygons, "loop_total", poly_count, dtype=np.int32)
+
+    # 下一个面角：同一个面内 +1，最后一个绕回 loop_start
+    next_loop = np.arange(1, loop_count + 1, dtype=np.int64)
+    next_loop[loop_start + loop_total - 1] = loop_start
+
+    delta = np.abs(uv[next_loop] - uv)
+    flat_x = delta[:, 0] <= tolerance
+    flat_y = delta[:, 1] <= tolerance
+    corner_class = np.zeros(loop_count, dtype=np.int8)
+    corner_class[flat_y & ~flat_x] = UV_HORIZONTAL
+    corner_class[flat_x & ~flat_y] = UV_VERTICAL
+    corner_class[~flat_x & ~flat_y] = UV_DIAGONAL
+
+    edge_class = np.zeros(edge_count, dtype=np.int8)
+    np.bitwise_or.at(edge_class, loop_edge, corner_class)
+
+    # 接缝拆分：同一条边在不同面角上的 UV 端点不一致
+    # 统一按"顶点索引较小的一端"取 UV，再看各面角之间的差异范围
+    swap = loop_vert[next_loop] < loop_vert
+    uv_lo = np.where(swap[:, None], uv[next_loop], uv)
+    uv_hi = np.where(swap[:, None], uv, uv[next_loop])
+    ends = np.hstack([uv_lo, uv_hi])
+    ends_min = np.full((edge_count, 4), np.inf)
+    ends_max = np.full((edge_count, 4), -np.inf)
+    np.minimum.at(ends_min, loop_edge, ends)
+    np.maximum.at(ends_max, loop_edge, ends)
+    used = np.isfinite(ends_min[:, 0])
+    split = np.zeros(edge_count, dtype=bool)
+    split[used] = (ends_max[used] - ends_min[used]).max(axis=1) > tolerance
+    return edge_class, split
 
-    bm = bmesh.from_edit_mesh(obj.data)
-    uv_layer = bm.loops.layers.uv.active
 
-    if not uv_layer:
-        print("No active UV layer found.")
+def edge_mask_for_mode(edge_class, split, mode):
+    if mode == 'non_straight':
+        return (edge_class & UV_DIAGONAL) != 0
+    if mode == 'horizontal':
+        return edge_class == UV_HORIZONTAL
+    if mode == 'vertical':
+        return edge_class == UV_VERTICAL
+    if mode == 'split':
+        return split
+    raise ValueError(f"未知模式: {mode}")
+
+
+def write_edge_selection(mesh, edge_mask):
+    """网格边/点/面选择 和 UV 编辑器的边选择 全部用 foreach_set 一次写入"""
+    edge_verts = read_array(mesh.edges, "vertices", len(mesh.edges), 2, np.int32)
+    vert_mask = np.zeros(len(mesh.vertices), dtype=bool)
+    vert_mask[edge_verts[edge_mask].ravel()] = True
+
+    mesh.vertices.foreach_set("select", vert_mask)
+    mesh.edges.foreach_set("select", edge_mask)
+    mesh.polygons.foreach_set("select", np.zeros(len(mesh.polygons), dtype=bool))
+
+    uv_layer = mesh.uv_layers.active
+    if uv_layer is not None and hasattr(uv_layer, "edge_selection"):
+        loop_count = len(mesh.loops)
+        loop_edge = read_array(mesh.loops, "edge_index", loop_count, dtype=np.int32)
+        loop_vert = read_array(mesh.loops, "vertex_index", loop_count, dtype=np.int32)
+        uv_layer.edge_selection.foreach_set("value", edge_mask[loop_edge])
+        uv_layer.vertex_selection.foreach_set("value", vert_mask[loop_vert])
+
+
+def select_uv_edges(mode='non_straight', tolerance=1e-5):
+    context = bpy.context
+    obj = context.active_object
+
+    if obj is None or obj.mode != 'EDIT':
+        print("Please switch to Edit Mode.")
         return
 
-    for edge in bm.edges:
-        if not edge.is_valid:
-            continue
+    objects = [o for o in context.objects_in_mode_unique_data if o.type == 'MESH']
 
-        try:
-            uv1 = edge.verts[0].link_loops[0][uv_layer].uv
-            uv2 = edge.verts[1].link_loops[0][uv_layer].uv
-        except IndexError:
-            # Skip edges where UV data is not available for vertices
+    # 批量读写需要网格数据，临时切回物体模式 (会把编辑中的 bmesh 写回网格)
+    bpy.ops.object.mode_set(mode='OBJECT')
+    total = 0
+    for o in objects:
+        edge_class, split = classify_uv_edges(o.data, tolerance)
+        if edge_class is None:
+            print(f"{o.name}: No active UV layer found.")
             continue
+        edge_mask = edge_mask_for_mode(edge_class, split, mode)
+        write_edge_selection(o.data, edge_mask)
+        total += int(edge_mask.sum())
+    bpy.ops.object.mode_set(mode='EDIT')
+
+    tool_settings = context.tool_settings
+    tool_settings.mesh_select_mode = (False, True, False)
+    tool_settings.uv_select_mode = 'EDGE'
+    print(f"UV {mode}: 在 {len(objects)} 个物体中选中 {total} 条边")
 
-        if mode == 'non_straight':
-            # Check if the edge is not horizontal or vertical within the tolerance
-            if not (abs(uv1.x - uv2.x) <= tolerance or abs(uv1.y - uv2.y) <= tolerance):
-                edge.select = True
-        elif mode == 'horizontal':
-            # Check if the edge is approximately horizontal within the tolerance
-            if abs(uv1.y - uv2.y) <= tolerance and abs(uv1.x - uv2.x) > tolerance:
-                edge.select = True
-        elif mode == 'vertical':
-            # Check if the edge is approximately vertical within the tolerance
-            if abs(uv1.x - uv2.x) <= tolerance and abs(uv1.y - uv2.y) > tolerance:
-                edge.select = True
-
-    bmesh.update_edit_mesh(obj.data)
-
-    # Ensure we are in the UV Editor to perform UV operations
-    override = bpy.context.copy()
-    for area in bpy.context.screen.areas:
-        if area.type == 'IMAGE_EDITOR':
-            override['area'] = area
-            override['region'] = area.regions[-1]
-            break
-
-    bpy.ops.uv.select_mode(override, type='EDGE')
-
-# Run the function with the desired mode: 'non_straight', 'horizontal', or 'vertical'
+# Run the function with the desired mode: 'non_straight', 'horizontal', 'vertical' or 'split'
 select_uv_edges(mode='vertical', tolerance=0.01)
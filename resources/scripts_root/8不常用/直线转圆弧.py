@@ -8,46 +8,199 @@
 # script_id: 6ef59390-141c-40e8-9905-5d56635ba502
 # script_id: 50d3efcd-b034-459d-bb70-7e422eff0e63
 import bpy
-import bmesh
-from math import atan2, sqrt, cos, sin
-
-# 确保 Blender 处于对象模式
-bpy.ops.object.mode_set(mode='OBJECT')
-
-
-def convert_to_arc(obj):
-    if obj.type == 'MESH':
-        # 获取物体的网格数据
-        mesh_data = obj.data
-        
-        # 使用 bpy 结构直接访问网格数据
-        for vertex in mesh_data.vertices:
-            # 新的 x, y 坐标
-            x, y, z = vertex.co
-            
-            restored_alpha = -x / 20
-            
-            # 假设 restored_alpha 的值是在 [-pi, pi] 的范围
-            # 那么我们可以用 cos 和 sin 来恢复原始的 x 和 y 坐标
-            # 还需要用新的 y 坐标（即原来的距离 d）来缩放这些值
-            d = y  # 新的 y 坐标即为原点到点的距离
-            original_x = d * cos(restored_alpha)
-            original_y = d * sin(restored_alpha)
-            
-            # 更新顶点坐标
-            vertex.co.x = original_x
-            vertex.co.y = original_y
-            # z 坐标保持不变
-        
-        # 更新网格
-        mesh_data.update()
-
-        # 刷新场景，确保变更生效
-        bpy.context.view_layer.update()
-    else:
-        print("Selected object is not a mesh.")
-
-# 调用方法
-selected_objs = bpy.context.selected_objects
-for obj in selected_objs:
-    convert_to_arc(obj)
+import numpy as np
+from bpy.props import EnumProperty, FloatProperty, FloatVectorProperty, BoolProperty
+
+# =============================================================================
+#  直线 <-> 圆弧 弯曲/展开变形 (向量化版)
+#  - 坐标通过 foreach_get/foreach_set 一次性读写，三角函数全部交给 NumPy
+#  - 可指定弯曲轴、半径(或总角度)、起始角和轴心点
+#  - 弯曲时把参数记在网格上，展开时直接读回来，保证严格可逆
+#  - 一次处理所有选中物体，共享同一网格的物体只变形一次
+#  - 算子只在本脚本定义；圆弧转直线.py 按 bl_idname 调用它 (没注册时 runpy 加载本脚本)
+# =============================================================================
+
+# 旧脚本写死的半径常数，作为默认值保留
+DEFAULT_RADIUS = 20.0
+PARAMS_KEY = "bend_warp_params"
+
+# 弯曲轴 -> (沿弧方向轴, 径向轴, 弯曲轴) 的分量下标
+AXIS_FRAMES = {
+    'X': (1, 2, 0),
+    'Y': (2, 0, 1),
+    'Z': (0, 1, 2),
+}
+
+
+def read_coords(mesh):
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    return co.reshape(-1, 3).astype(np.float64)
+
+
+def write_coords(mesh, coords):
+    mesh.vertices.foreach_set("co", coords.astype(np.float32).ravel())
+    mesh.update()
+
+
+def line_to_arc(coords, axis, radius, start_angle, pivot):
+    """
+    直线 -> 圆弧：沿弧方向的坐标当作弧长，径向坐标当作到轴心的距离。
+    与旧脚本一致：alpha = -x / radius, (x, y) = d * (cos, sin)
+    """
+    along, radial, _ = AXIS_FRAMES[axis]
+    local = coords - pivot
+    alpha = start_angle - local[:, along] / radius
+    dist = local[:, radial]
+    out = local.copy()
+    out[:, along] = dist * np.cos(alpha)
+    out[:, radial] = dist * np.sin(alpha)
+    return out + pivot
+
+
+def arc_to_line(coords, axis, radius, start_angle, pivot):
+    """圆弧 -> 直线：line_to_arc 的严格逆变换 (|弧长| < pi * radius 且距离 >= 0 时)"""
+    along, radial, _ = AXIS_FRAMES[axis]
+    local = coords - pivot
+    a, r = local[:, along], local[:, radial]
+    # 先把起始角转回 0，再 atan2，这样角度落在 (-pi, pi] 内不会跳变
+    cos_s, sin_s = np.cos(start_angle), np.sin(start_angle)
+    ra = a * cos_s + r * sin_s
+    rr = r * cos_s - a * sin_s
+    out = local.copy()
+    out[:, along] = -np.arctan2(rr, ra) * radius
+    out[:, radial] = np.hypot(a, r)
+    return out + pivot
+
+
+def resolve_pivot(obj, pivot_mode, custom_pivot, context):
+    """把轴心点换算到物体的局部坐标"""
+    if pivot_mode == 'CURSOR':
+        return np.array(obj.matrix_world.inverted() @ context.scene.cursor.location)
+    if pivot_mode == 'CUSTOM':
+        return np.array(custom_pivot, dtype=np.float64)
+    return np.zeros(3)
+
+
+def resolve_radius(coords, axis, pivot, radius_mode, radius, angle):
+    """ANGLE 模式下，用沿弧方向的长度除以总角度得到半径"""
+    if radius_mode == 'ANGLE' and abs(angle) > 1e-9 and len(coords):
+        along = AXIS_FRAMES[axis][0]
+        span = np.ptp(coords[:, along] - pivot[along])
+        if span > 1e-9:
+            return span / abs(angle)
+    return radius
+
+
+class OBJECT_OT_bend_warp(bpy.types.Operator):
+    """把选中网格在直线和圆弧之间弯曲/展开 (可逆)"""
+    bl_idname = "object.bend_warp"
+    bl_label = "直线/圆弧 弯曲变形"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    direction: EnumProperty(
+        name="方向",
+        items=[('BEND', "直线转圆弧", "把直线弯成圆弧"),
+               ('UNBEND', "圆弧转直线", "把圆弧展开成直线")],
+        default='BEND',
+    )
+    axis: EnumProperty(
+        name="弯曲轴",
+        items=[('X', "X", ""), ('Y', "Y", ""), ('Z', "Z", "")],
+        default='Z',
+    )
+    radius_mode: EnumProperty(
+        name="半径来源",
+        items=[('RADIUS', "半径", "直接指定半径"),
+               ('ANGLE', "总角度", "按物体长度和总弯曲角度反推半径")],
+        default='RADIUS',
+    )
+    radius: FloatProperty(name="半径", default=DEFAULT_RADIUS, min=1e-4, soft_max=1000.0)
+    angle: FloatProperty(name="总角度", default=np.pi / 2, subtype='ANGLE')
+    start_angle: FloatProperty(name="起始角", default=0.0, subtype='ANGLE')
+    pivot_mode: EnumProperty(
+        name="轴心",
+        items=[('ORIGIN', "物体原点", ""),
+               ('CURSOR', "3D游标", ""),
+               ('CUSTOM', "自定义", "物体局部坐标")],
+        default='ORIGIN',
+    )
+    custom_pivot: FloatVectorProperty(name="自定义轴心", size=3, subtype='TRANSLATION')
+    use_stored: BoolProperty(
+        name="使用弯曲时的参数",
+        description="展开时优先使用弯曲时记录在物体上的参数，保证严格还原",
+        default=True,
+    )
+
+    @classmethod
+    def poll(cls, context):
+        return any(o.type == 'MESH' for o in context.selected_objects)
+
+    def execute(self, context):
+        if context.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+
+        done_meshes = set()
+        vert_total = 0
+        for obj in context.selected_objects:
+            if obj.type != 'MESH' or obj.data in done_meshes:
+                continue
+            done_meshes.add(obj.data)
+            vert_total += self.warp_object(context, obj)
+
+        context.view_layer.update()
+        self.report({'INFO'}, f"已变形 {len(done_meshes)} 个网格，共 {vert_total} 个顶点")
+        return {'FINISHED'}
+
+    def warp_object(self, context, obj):
+        mesh = obj.data
+        coords = read_coords(mesh)
+
+        # 参数记在网格上：共享网格的物体看到的是同一份坐标
+        stored = mesh.get(PARAMS_KEY)
+        if self.direction == 'UNBEND' and self.use_stored and stored:
+            axis = stored["axis"]
+            radius = stored["radius"]
+            start_angle = stored["start_angle"]
+            pivot = np.array(stored["pivot"], dtype=np.float64)
+        else:
+            axis = self.axis
+            start_angle = self.start_angle
+            pivot = resolve_pivot(obj, self.pivot_mode, self.custom_pivot, context)
+            radius = resolve_radius(coords, axis, pivot, self.radius_mode, self.radius, self.angle)
+
+        if self.direction == 'BEND':
+            coords = line_to_arc(coords, axis, radius, start_angle, pivot)
+            mesh[PARAMS_KEY] = {
+                "axis": axis,
+                "radius": float(radius),
+                "start_angle": float(start_angle),
+                "pivot": [float(v) for v in pivot],
+            }
+        else:
+            coords = arc_to_line(coords, axis, radius, start_angle, pivot)
+            if PARAMS_KEY in mesh:
+                del mesh[PARAMS_KEY]
+
+        write_coords(mesh, coords)
+        return len(coords)
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+
+def register():
+    bpy.utils.register_class(OBJECT_OT_bend_warp)
+
+
+def unregister():
+    bpy.utils.unregister_class(OBJECT_OT_bend_warp)
+
+
+if __name__ == "__main__":
+    try:
+        unregister()
+    except Exception:
+        pass
+    register()
+    bpy.ops.object.bend_warp('INVOKE_DEFAULT', direction='BEND')
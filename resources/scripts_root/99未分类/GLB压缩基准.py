@@ -0,0 +1,326 @@
+# script_id: 9856d99f-00b7-4511-a0b7-e9ce8153530b
+# -*- coding: utf-8 -*-
+# =============================================================================
+#  GLB 压缩基准
+#  对选中的每个资产 (根物体 + 子级)，按 Draco 压缩/量化 × 动画优化 的组合各导出一次：
+#    导出耗时 / 文件大小 / 解码耗时 (本地 numpy GLB 解析器) / 相对源网格的几何误差
+#  输出对比表，并按资产类别 (动画 / 高模 / 低模) 给出推荐参数，
+#  可直接粘贴到 99未分类/导出预设.json。
+#  - Draco 解码：装了 DracoPy 就用它，否则退回 Blender 自带导入器 (耗时含建物体，标 *)
+#  - meshopt：Blender 导出器不支持，PATH 里有 gltfpack 时额外跑一组 gltfpack -cc (只测大小和耗时)
+# =============================================================================
+
+import bpy
+import os
+import re
+import json
+import time
+import shutil
+import struct
+import runpy
+import tempfile
+import itertools
+import subprocess
+import numpy as np
+from mathutils import kdtree
+
+BASE_PRESET = "glb_anim"           # 在这个预设上叠加各组参数
+ERROR_BUDGET = 1e-4                # 允许的最大误差 (相对包围盒对角线)
+MAX_ERROR_SAMPLES = 20000          # 误差采样点上限
+HIGH_POLY_TRIS = 50000
+
+DRACO_VARIANTS = [
+    ("无压缩", {"export_draco_mesh_compression_enable": False}),
+    ("Draco6-高精度", {"export_draco_mesh_compression_enable": True, "export_draco_mesh_compression_level": 6,
+                     "export_draco_position_quantization": 14, "export_draco_normal_quantization": 10,
+                     "export_draco_texcoord_quantization": 12}),
+    ("Draco6-移动端", {"export_draco_mesh_compression_enable": True, "export_draco_mesh_compression_level": 6,
+                     "export_draco_position_quantization": 12, "export_draco_normal_quantization": 8,
+                     "export_draco_texcoord_quantization": 10}),
+    ("Draco10-激进", {"export_draco_mesh_compression_enable": True, "export_draco_mesh_compression_level": 10,
+                    "export_draco_position_quantization": 11, "export_draco_normal_quantization": 7,
+                    "export_draco_texcoord_quantization": 10}),
+]
+ANIM_VARIANTS = [
+    ("动画优化", {"export_optimize_animation_size": True}),
+    ("不优化", {"export_optimize_animation_size": False}),
+]
+
+
+# 共享工具 (导出预设、导出清单、材质节点索引等) 统一由 99未分类/共享加载.py 取出或安装
+load_shared = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", "")))),
+                                          "99未分类", "共享加载.py"))["load_shared"]
+
+
+# -----------------------------------------------------------------------------
+#  本地 GLB 解析
+# -----------------------------------------------------------------------------
+COMPONENT_DTYPES = {5120: np.int8, 5121: np.uint8, 5122: np.int16, 5123: np.uint16, 5125: np.uint32, 5126: np.float32}
+TYPE_WIDTHS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+
+
+class DracoUnavailable(Exception):
+    pass
+
+
+def read_glb(path):
+    """返回 (json 字典, BIN 块 bytes)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, length = struct.unpack_from("<4sII", data, 0)
+    if magic != b"glTF" or version != 2:
+        raise ValueError(f"不是 glTF 2.0 GLB: {path}")
+    offset, doc, binary = 12, None, b""
+    while offset < length:
+        chunk_len, chunk_type = struct.unpack_from("<II", data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_len]
+        if chunk_type == 0x4E4F534A:
+            doc = json.loads(chunk)
+        elif chunk_type == 0x004E4942:
+            binary = chunk
+        offset += 8 + chunk_len
+    return doc, binary
+
+
+def accessor_array(doc, binary, index):
+    acc = doc["accessors"][index]
+    dtype = np.dtype(COMPONENT_DTYPES[acc["componentType"]])
+    width = TYPE_WIDTHS[acc["type"]]
+    count = acc["count"]
+    if "bufferView" not in acc:
+        return np.zeros((count, width), dtype=dtype)
+    view = doc["bufferViews"][acc["bufferView"]]
+    start = view.get("byteOffset", 0) + acc.get("byteOffset", 0)
+    stride = view.get("byteStride", dtype.itemsize * width)
+    arr = np.ndarray((count, width), dtype=dtype, buffer=binary, offset=start,
+                     strides=(stride, dtype.itemsize))
+    arr = arr.astype(np.float32) if acc.get("normalized") or dtype != np.float32 else arr.copy()
+    if acc.get("normalized"):
+        arr /= float(np.iinfo(dtype).max)
+    return arr
+
+
+def decode_draco(doc, binary, ext):
+    try:
+        import DracoPy
+    except ImportError:
+        raise DracoUnavailable()
+    view = doc["bufferViews"][ext["bufferView"]]
+    start = view.get("byteOffset", 0)
+    mesh = DracoPy.decode(binary[start:start + view["byteLength"]])
+    return np.asarray(mesh.points, dtype=np.float32).reshape(-1, 3)
+
+
+def decode_glb(path):
+    """解析全部网格的全部属性；返回 {网格名: Blender 坐标系下的顶点 (N,3)}"""
+    doc, binary = read_glb(path)
+    meshes = {}
+    for mesh in doc.get("meshes", []):
+        positions = []
+        for prim in mesh["primitives"]:
+            draco = prim.get("extensions", {}).get("KHR_draco_mesh_compression")
+            if draco:
+                positions.append(decode_draco(doc, binary, draco))
+                continue
+            decoded = {name: accessor_array(doc, binary, idx) for name, idx in prim["attributes"].items()}
+            if "indices" in prim:
+                accessor_array(doc, binary, prim["indices"])
+            positions.append(decoded["POSITION"])
+        if positions:
+            p = np.concatenate(positions)
+            # glTF Y 向上 -> Blender Z 向上
+            meshes[mesh.get("name", "")] = np.stack([p[:, 0], -p[:, 2], p[:, 1]], axis=1)
+    # 动画采样也算进解码
+    for anim in doc.get("animations", []):
+        for sampler in anim["samplers"]:
+            accessor_array(doc, binary, sampler["input"])
+            accessor_array(doc, binary, sampler["output"])
+    return meshes
+
+
+def decode_with_importer(path):
+    """没有 DracoPy 时用 Blender 导入器解码 Draco，读完删掉导入的数据"""
+    collections = (bpy.data.objects, bpy.data.meshes, bpy.data.materials, bpy.data.images,
+                   bpy.data.actions, bpy.data.armatures)
+    before = [set(c) for c in collections]
+    bpy.ops.import_scene.gltf(filepath=path)
+    meshes = {}
+    for mesh in set(bpy.data.meshes) - before[1]:
+        co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        meshes[re.sub(r"\.\d{3}$", "", mesh.name)] = co.reshape(-1, 3)
+    for collection, old in zip(collections, before):
+        for block in set(collection) - old:
+            collection.remove(block)
+    return meshes
+
+
+def timed_decode(path):
+    """(秒, {网格名: 顶点}, 说明)"""
+    start = time.perf_counter()
+    try:
+        meshes = decode_glb(path)
+        return time.perf_counter() - start, meshes, ""
+    except DracoUnavailable:
+        start = time.perf_counter()
+        meshes = decode_with_importer(path)
+        return time.perf_counter() - start, meshes, "*"
+
+
+# -----------------------------------------------------------------------------
+#  误差 / 资产
+# -----------------------------------------------------------------------------
+def geometric_error(source_meshes, decoded):
+    """每个解码顶点到最近源顶点的距离；返回 (最大, RMS)，相对包围盒对角线
+    源网格在解码结果里找不到 (或顶点丢光) 算作无穷大误差，不能当成 0 混进推荐"""
+    worst, sq_sum, count = 0.0, 0.0, 0
+    for name, src in source_meshes.items():
+        if not len(src):
+            continue
+        dec = decoded.get(name)
+        if dec is None or not len(dec):
+            return float("inf"), float("inf")
+        diag = float(np.linalg.norm(src.max(axis=0) - src.min(axis=0))) or 1.0
+        tree = kdtree.KDTree(len(src))
+        for i, co in enumerate(src):
+            tree.insert(co, i)
+        tree.balance()
+        step = max(1, len(dec) // MAX_ERROR_SAMPLES)
+        dist = np.array([tree.find(co)[2] for co in dec[::step]]) / diag
+        worst = max(worst, float(dist.max()))
+        sq_sum += float((dist ** 2).sum())
+        count += len(dist)
+    return worst, (sq_sum / count) ** 0.5 if count else 0.0
+
+
+def collect_hierarchy(obj, out):
+    out.append(obj)
+    for child in obj.children:
+        collect_hierarchy(child, out)
+    return out
+
+
+def source_positions(objects):
+    meshes = {}
+    for obj in objects:
+        if obj.type == 'MESH' and obj.data.name not in meshes:
+            co = np.empty(len(obj.data.vertices) * 3, dtype=np.float32)
+            obj.data.vertices.foreach_get("co", co)
+            meshes[obj.data.name] = co.reshape(-1, 3)
+    return meshes
+
+
+def asset_class(objects):
+    animated = any(o.animation_data or o.type == 'ARMATURE'
+                   or (o.type == 'MESH' and o.data.shape_keys and o.data.shape_keys.animation_data)
+                   for o in objects)
+    if animated:
+        return "动画"
+    tris = sum(len(o.data.loops) - 2 * len(o.data.polygons) for o in objects if o.type == 'MESH')
+    return "高模" if tris >= HIGH_POLY_TRIS else "低模"
+
+
+def variants_for(animated):
+    anim = ANIM_VARIANTS if animated else ANIM_VARIANTS[:1]
+    for (d_name, d_set), (a_name, a_set) in itertools.product(DRACO_VARIANTS, anim):
+        yield (f"{d_name}/{a_name}" if animated else d_name), {**d_set, **a_set}
+
+
+# -----------------------------------------------------------------------------
+#  主流程
+# -----------------------------------------------------------------------------
+def benchmark_selection():
+    context = bpy.context
+    roots = [o for o in context.selected_objects if o.parent not in context.selected_objects]
+    if not roots:
+        print("❗ 请先选择要测试的物体")
+        return []
+    registry = load_shared("export_presets", "99未分类/导出预设.py")
+    out_dir = tempfile.mkdtemp(prefix="glb_bench_")
+    gltfpack = shutil.which("gltfpack")
+    original_selection = list(context.selected_objects)
+    rows = []
+
+    try:
+        for root in roots:
+            objects = collect_hierarchy(root, [])
+            cls = asset_class(objects)
+            sources = source_positions(objects)
+
+            for label, overrides in variants_for(cls == "动画"):
+                # 导入器解码 (decode_with_importer) 会清空选择，每个变体导出前都要重新选中这组物体
+                for o in context.view_layer.objects:
+                    o.select_set(o in objects)
+                path = os.path.join(out_dir, f"{bpy.path.clean_name(root.name)}_{len(rows)}.glb")
+                start = time.perf_counter()
+                registry.export(BASE_PRESET, filepath=path, **overrides)
+                export_s = time.perf_counter() - start
+                decode_s, decoded, note = timed_decode(path)
+                max_err, rms_err = geometric_error(sources, decoded)
+                rows.append({"asset": root.name, "class": cls, "variant": label, "settings": overrides,
+                             "size": os.path.getsize(path), "export_s": export_s, "decode_s": decode_s,
+                             "decode_note": note, "max_err": max_err, "rms_err": rms_err})
+
+                if gltfpack and not overrides["export_draco_mesh_compression_enable"]:
+                    packed = path[:-4] + "_meshopt.glb"
+                    start = time.perf_counter()
+                    subprocess.run([gltfpack, "-i", path, "-o", packed, "-cc"], check=False,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                    if os.path.exists(packed):
+                        rows.append({"asset": root.name, "class": cls, "variant": label + "+meshopt",
+                                     "settings": None, "size": os.path.getsize(packed),
+                                     "export_s": export_s + time.perf_counter() - start,
+                                     "decode_s": None, "decode_note": "", "max_err": None, "rms_err": None})
+    finally:
+        for o in context.view_layer.objects:
+            o.select_set(o in original_selection)
+
+    print_table(rows)
+    print_recommendations(rows)
+    print(f"导出文件保存在: {out_dir}")
+    return rows
+
+
+def print_table(rows):
+    print(f"{'资产':<20}{'类别':<6}{'参数':<22}{'大小KB':>9}{'导出ms':>9}{'解码ms':>9}{'最大误差':>11}{'RMS误差':>11}")
+    for r in rows:
+        decode = f"{r['decode_s'] * 1000:.1f}{r['decode_note']}" if r["decode_s"] is not None else "-"
+        max_err = f"{r['max_err']:.2e}" if r["max_err"] is not None else "-"
+        rms_err = f"{r['rms_err']:.2e}" if r["rms_err"] is not None else "-"
+        print(f"{r['asset'][:19]:<20}{r['class']:<6}{r['variant']:<22}{r['size'] / 1024:>9.1f}"
+              f"{r['export_s'] * 1000:>9.1f}{decode:>9}{max_err:>11}{rms_err:>11}")
+    print("(* = 没有 DracoPy，解码耗时用 Blender 导入器测得，含建物体开销)")
+
+
+def print_recommendations(rows):
+    """每个类别：误差在预算内、平均体积 (相对该资产无压缩版本) 最小的参数组合"""
+    baseline = {r["asset"]: r["size"] for r in rows if r["variant"].startswith("无压缩") and r["settings"]}
+    scores = {}
+    for r in rows:
+        if r["settings"] is None or r["max_err"] is None:
+            continue
+        key = (r["class"], r["variant"])
+        entry = scores.setdefault(key, {"ratios": [], "ok": True, "settings": r["settings"], "decode": 0.0})
+        entry["ratios"].append(r["size"] / baseline.get(r["asset"], r["size"]))
+        entry["ok"] &= r["max_err"] <= ERROR_BUDGET
+        entry["decode"] += r["decode_s"] or 0.0
+
+    presets = {}
+    print(f"\n推荐 (误差预算 {ERROR_BUDGET:.0e} × 包围盒对角线)")
+    for cls in sorted({c for c, _ in scores}):
+        candidates = [(sum(e["ratios"]) / len(e["ratios"]), e["decode"], variant, e["settings"])
+                      for (c, variant), e in scores.items() if c == cls and e["ok"]]
+        if not candidates:
+            print(f"  {cls}: 没有组合满足误差预算，保持无压缩")
+            continue
+        ratio, _, variant, settings = min(candidates)
+        print(f"  {cls}: {variant}  (平均体积 {ratio:.0%})")
+        presets[f"glb_bench_{cls}"] = {"inherits": BASE_PRESET, "description": f"基准推荐: {cls}",
+                                       "settings": settings}
+    if presets:
+        print("\n可粘贴到 导出预设.json:")
+        print(json.dumps(presets, ensure_ascii=False, indent=4))
+
+
+if __name__ == "__main__":
+    benchmark_selection()
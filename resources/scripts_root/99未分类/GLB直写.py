@@ -0,0 +1,540 @@
+# script_id: ec54613d-90ae-4536-afbf-a7625fba0015
+# -*- coding: utf-8 -*-
+# =============================================================================
+#  GLB 直写 (静态道具专用)
+#  不走 glTF 插件，直接把网格写成 GLB：
+#  - foreach_get 读位置/法线/UV/三角形到 numpy，按 (顶点, 法线, UV) 去重后写出
+#  - 二进制数据边算边写进临时文件，内存只和当前这一个网格有关；
+#    最后写头 + JSON，再把临时文件分块拷进 BIN 块
+#  - 同一个网格被多个物体使用 (实例) 时只写一份访问器，节点共享
+#  - 只有网格 + 基础 PBR 颜色，不导出动画/骨骼/贴图/形态键
+#    direct_write_blockers() 列出和 glTF 插件结果会不一样的地方 (非网格物体、父子层级、形态键、
+#    顶点色、贴图或 Base Color/Metallic/Roughness 常量以外的材质输入)，调用方应只在它为空时
+#    用直写，否则回退插件
+#  - apply_modifiers 与插件的 export_apply 对应：False (默认) 写原始网格，True 写修改器结果
+#  validate_glb() 是配套校验器，self_test() 写合成网格并校验，benchmark() 对比原生导出器。
+#
+#  其他脚本的用法 (运行过本脚本后，或由它们自动加载)：
+#      writer = bpy.app.driver_namespace["glb_writer"]
+#      writer.write_glb(objects, filepath)
+#      errors = writer.validate_glb(filepath)
+# =============================================================================
+
+import bpy
+import os
+import json
+import time
+import shutil
+import struct
+import tempfile
+import numpy as np
+from mathutils import Matrix
+
+WRITER_KEY = "glb_writer"
+COPY_BLOCK = 1 << 20
+
+# Blender Z 向上 -> glTF Y 向上
+Z_TO_Y = Matrix(((1, 0, 0, 0), (0, 0, 1, 0), (0, -1, 0, 0), (0, 0, 0, 1)))
+Y_TO_Z = Z_TO_Y.inverted()
+
+FLOAT, UINT16, UINT32 = 5126, 5123, 5125
+ARRAY_BUFFER, ELEMENT_ARRAY_BUFFER = 34962, 34963
+COMPONENT_DTYPES = {5120: np.int8, 5121: np.uint8, 5122: np.int16, 5123: np.uint16, 5125: np.uint32, 5126: np.float32}
+TYPE_WIDTHS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+
+
+# -----------------------------------------------------------------------------
+#  网格数据
+# -----------------------------------------------------------------------------
+def _get(collection, prop, count, width=1, dtype=np.float32):
+    arr = np.empty(count * width, dtype=dtype)
+    if count:
+        collection.foreach_get(prop, arr)
+    return arr.reshape((count, width)) if width > 1 else arr
+
+
+def corner_normals(mesh):
+    nl = len(mesh.loops)
+    if hasattr(mesh, "corner_normals"):       # 4.1+
+        return _get(mesh.corner_normals, "vector", nl, 3)
+    mesh.calc_normals_split()
+    return _get(mesh.loops, "normal", nl, 3)
+
+
+def extract_mesh(mesh):
+    """返回 (positions, normals, uvs|None, [(material_index, indices)])，坐标已转 Y 向上"""
+    mesh.calc_loop_triangles()
+    nt = len(mesh.loop_triangles)
+    tri_loops = _get(mesh.loop_triangles, "loops", nt, 3, np.int32)
+    tri_mat = _get(mesh.loop_triangles, "material_index", nt, 1, np.int32)
+    corner_vert = _get(mesh.loops, "vertex_index", len(mesh.loops), 1, np.int32)
+    co = _get(mesh.vertices, "co", len(mesh.vertices), 3)
+    normals = corner_normals(mesh)
+    uv_layer = mesh.uv_layers.active
+    uvs = _get(uv_layer.data, "uv", len(mesh.loops), 2) if uv_layer else None
+
+    # 只有 (顶点, 法线, UV) 完全相同的面角才能合并成一个 glTF 顶点；按位比较
+    parts = [corner_vert[:, None], normals.view(np.int32)]
+    if uvs is not None:
+        parts.append(uvs.view(np.int32))
+    keys = np.ascontiguousarray(np.hstack(parts))
+    keys = keys.view(np.dtype((np.void, keys.dtype.itemsize * keys.shape[1]))).ravel()
+    _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+
+    positions = co[corner_vert[first]]
+    positions = np.ascontiguousarray(np.stack([positions[:, 0], positions[:, 2], -positions[:, 1]], axis=1))
+    nrm = normals[first]
+    nrm = np.ascontiguousarray(np.stack([nrm[:, 0], nrm[:, 2], -nrm[:, 1]], axis=1))
+    if uvs is not None:
+        uvs = uvs[first].copy()
+        uvs[:, 1] = 1.0 - uvs[:, 1]
+
+    index_dtype = np.uint16 if len(first) < 65536 else np.uint32
+    tri_indices = inverse.reshape(-1)[tri_loops].astype(index_dtype)
+    primitives = [(int(m), np.ascontiguousarray(tri_indices[tri_mat == m]).ravel()) for m in np.unique(tri_mat)]
+    return positions, nrm, uvs, primitives
+
+
+def material_factors(mat):
+    color, metallic, roughness = list(mat.diffuse_color), mat.metallic, mat.roughness
+    if mat.use_nodes and mat.node_tree:
+        bsdf = next((n for n in mat.node_tree.nodes if n.type == 'BSDF_PRINCIPLED'), None)
+        if bsdf:
+            color = list(bsdf.inputs["Base Color"].default_value)
+            metallic = bsdf.inputs["Metallic"].default_value
+            roughness = bsdf.inputs["Roughness"].default_value
+    return color, metallic, roughness
+
+
+# -----------------------------------------------------------------------------
+#  流式写出
+# -----------------------------------------------------------------------------
+def tree_has_images(tree, seen=None):
+    """节点树 (含嵌套节点组) 里有没有带图像的贴图节点"""
+    seen = set() if seen is None else seen
+    if tree.name_full in seen:
+        return False
+    seen.add(tree.name_full)
+    for node in tree.nodes:
+        if node.type == 'TEX_IMAGE' and node.image:
+            return True
+        if node.type == 'GROUP' and node.node_tree and tree_has_images(node.node_tree, seen):
+            return True
+    return False
+
+
+# 直写只写 Base Color / Metallic / Roughness 三个常量；这些输入不在“关闭”值时插件会多导出扩展
+# (名字按 4.x / 3.x 都列上，节点上没有的跳过)
+PRINCIPLED_OFF_VALUES = {
+    "Alpha": 1.0,
+    "Transmission Weight": 0.0, "Transmission": 0.0,
+    "Coat Weight": 0.0, "Clearcoat": 0.0,
+    "Sheen Weight": 0.0, "Sheen": 0.0,
+}
+PRINCIPLED_DIRECT_INPUTS = {"Base Color", "Metallic", "Roughness"}
+
+
+def material_blockers(mat):
+    """材质里直写表达不了的东西；空列表表示只用到了常量 Base Color / Metallic / Roughness"""
+    if not (mat.use_nodes and mat.node_tree):
+        return []
+    tree = mat.node_tree
+    if tree_has_images(tree):
+        return ["使用贴图"]
+    output = next((n for n in tree.nodes if n.type == 'OUTPUT_MATERIAL' and n.is_active_output), None)
+    surface = output.inputs["Surface"].links if output else ()
+    bsdf = surface[0].from_node if surface else None
+    if bsdf is None or bsdf.type != 'BSDF_PRINCIPLED':
+        return ["表面不是直接连接的 Principled BSDF"]
+    reasons = [f"{i.name} 有输入连接" for i in bsdf.inputs if i.is_linked]
+    for name, off in PRINCIPLED_OFF_VALUES.items():
+        socket = bsdf.inputs.get(name)
+        if socket is not None and not socket.is_linked and abs(socket.default_value - off) > 1e-6:
+            reasons.append(f"{name} = {socket.default_value:g}")
+    # 自发光：强度和颜色都不为零才算 (3.x 默认强度 1 + 黑色，4.x 默认强度 0 + 白色)
+    strength = bsdf.inputs.get("Emission Strength")
+    color = bsdf.inputs.get("Emission Color") or bsdf.inputs.get("Emission")
+    if strength is not None and color is not None and strength.default_value > 0 and any(color.default_value[:3]):
+        reasons.append("有自发光")
+    return reasons
+
+
+def direct_write_blockers(objects):
+    """直写结果会和 glTF 插件不同的原因列表；为空才可以用直写替代插件"""
+    reasons = []
+    selected = set(objects)
+    for obj in objects:
+        if obj.type != 'MESH':
+            reasons.append(f"{obj.name}: 非网格物体 ({obj.type})")
+            continue
+        # 插件保留父子层级 (子节点用相对变换)，直写把所有物体按世界变换平铺
+        if obj.parent in selected or any(child in selected for child in obj.children):
+            reasons.append(f"{obj.name}: 和其他选中物体有父子关系")
+        if obj.data.shape_keys:
+            reasons.append(f"{obj.name}: 有形态键")
+        color_attributes = getattr(obj.data, "color_attributes", None) or obj.data.vertex_colors
+        if len(color_attributes):
+            reasons.append(f"{obj.name}: 有顶点色")
+        for slot in obj.material_slots:
+            mat = slot.material
+            for reason in (material_blockers(mat) if mat else ()):
+                reasons.append(f"{obj.name}: 材质 {mat.name} {reason}")
+    return reasons
+
+
+class GLBStreamWriter:
+    def __init__(self, filepath, apply_modifiers=False):
+        self.filepath = filepath
+        self.apply_modifiers = apply_modifiers
+        self.bin = tempfile.TemporaryFile()
+        self.offset = 0
+        self.doc = {
+            "asset": {"version": "2.0", "generator": "scripts_lib GLB直写"},
+            "scene": 0, "scenes": [{"nodes": []}],
+            "nodes": [], "meshes": [], "materials": [], "accessors": [], "bufferViews": [],
+        }
+        self.mesh_cache = {}
+        self.material_cache = {}
+
+    def _add_view(self, arr, target):
+        data = arr.tobytes()
+        self.bin.write(data)
+        view = {"buffer": 0, "byteOffset": self.offset, "byteLength": len(data), "target": target}
+        self.offset += len(data)
+        pad = (-self.offset) % 4
+        if pad:
+            self.bin.write(b"\0" * pad)
+            self.offset += pad
+        self.doc["bufferViews"].append(view)
+        return len(self.doc["bufferViews"]) - 1
+
+    def _add_accessor(self, arr, type_, target, bounds=False):
+        component = {np.dtype(np.float32): FLOAT, np.dtype(np.uint16): UINT16, np.dtype(np.uint32): UINT32}[arr.dtype]
+        accessor = {"bufferView": self._add_view(arr, target), "componentType": component,
+                    "count": len(arr), "type": type_}
+        if bounds:
+            accessor["min"] = arr.min(axis=0).tolist()
+            accessor["max"] = arr.max(axis=0).tolist()
+        self.doc["accessors"].append(accessor)
+        return len(self.doc["accessors"]) - 1
+
+    def _material_index(self, mat):
+        if mat is None:
+            return None
+        if mat.name_full not in self.material_cache:
+            color, metallic, roughness = material_factors(mat)
+            self.doc["materials"].append({"name": mat.name, "pbrMetallicRoughness": {
+                "baseColorFactor": color, "metallicFactor": metallic, "roughnessFactor": roughness}})
+            self.material_cache[mat.name_full] = len(self.doc["materials"]) - 1
+        return self.material_cache[mat.name_full]
+
+    def _mesh_index(self, obj, depsgraph):
+        # 不应用修改器时写原始网格，按网格数据共享；应用时有修改器的评估结果各自一份
+        has_modifiers = self.apply_modifiers and any(m.show_viewport for m in obj.modifiers)
+        key = ("obj", obj.name_full) if has_modifiers else ("mesh", obj.data.name_full)
+        if key in self.mesh_cache:
+            return self.mesh_cache[key]
+        mesh = obj.evaluated_get(depsgraph).data if has_modifiers else obj.data
+        if not mesh.polygons:
+            self.mesh_cache[key] = None
+            return None
+        positions, normals, uvs, primitives = extract_mesh(mesh)
+        attributes = {
+            "POSITION": self._add_accessor(positions, "VEC3", ARRAY_BUFFER, bounds=True),
+            "NORMAL": self._add_accessor(normals, "VEC3", ARRAY_BUFFER),
+        }
+        if uvs is not None:
+            attributes["TEXCOORD_0"] = self._add_accessor(uvs, "VEC2", ARRAY_BUFFER)
+        gl_primitives = []
+        slots = obj.material_slots
+        for mat_index, indices in primitives:
+            prim = {"attributes": attributes, "mode": 4,
+                    "indices": self._add_accessor(indices, "SCALAR", ELEMENT_ARRAY_BUFFER)}
+            material = self._material_index(slots[mat_index].material if mat_index < len(slots) else None)
+            if material is not None:
+                prim["material"] = material
+            gl_primitives.append(prim)
+        self.doc["meshes"].append({"name": obj.data.name, "primitives": gl_primitives})
+        self.mesh_cache[key] = len(self.doc["meshes"]) - 1
+        return self.mesh_cache[key]
+
+    def add_object(self, obj, depsgraph):
+        if obj.type != 'MESH':
+            return
+        mesh_index = self._mesh_index(obj, depsgraph)
+        if mesh_index is None:
+            return
+        loc, rot, scale = (Z_TO_Y @ obj.matrix_world @ Y_TO_Z).decompose()
+        node = {"name": obj.name, "mesh": mesh_index}
+        if loc.length_squared:
+            node["translation"] = list(loc)
+        if rot.angle:
+            node["rotation"] = [rot.x, rot.y, rot.z, rot.w]
+        if tuple(scale) != (1.0, 1.0, 1.0):
+            node["scale"] = list(scale)
+        self.doc["nodes"].append(node)
+        self.doc["scenes"][0]["nodes"].append(len(self.doc["nodes"]) - 1)
+
+    def close(self):
+        doc = {k: v for k, v in self.doc.items() if v != []}
+        if self.offset:
+            doc["buffers"] = [{"byteLength": self.offset}]
+        json_bytes = json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        json_bytes += b" " * ((-len(json_bytes)) % 4)
+        total = 12 + 8 + len(json_bytes) + (8 + self.offset if self.offset else 0)
+
+        with open(self.filepath, "wb") as f:
+            f.write(struct.pack("<4sII", b"glTF", 2, total))
+            f.write(struct.pack("<I4s", len(json_bytes), b"JSON"))
+            f.write(json_bytes)
+            if self.offset:
+                f.write(struct.pack("<I4s", self.offset, b"BIN\0"))
+                self.bin.seek(0)
+                shutil.copyfileobj(self.bin, f, COPY_BLOCK)
+        self.bin.close()
+
+
+def write_glb(objects, filepath, depsgraph=None, apply_modifiers=False):
+    """把 objects (网格物体，按世界变换平铺) 写成一个 GLB；apply_modifiers 对应插件的 export_apply"""
+    depsgraph = depsgraph or bpy.context.evaluated_depsgraph_get()
+    writer = GLBStreamWriter(filepath, apply_modifiers)
+    try:
+        for obj in objects:
+            writer.add_object(obj, depsgraph)
+    finally:
+        writer.close()
+    return filepath
+
+
+# -----------------------------------------------------------------------------
+#  校验
+# -----------------------------------------------------------------------------
+def validate_glb(path):
+    """按 glTF 2.0 规范检查结构和数据，返回错误列表 (空表示通过)"""
+    errors = []
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < 20:
+        return ["文件太短"]
+    magic, version, length = struct.unpack_from("<4sII", data, 0)
+    if magic != b"glTF":
+        errors.append("magic 不是 glTF")
+    if version != 2:
+        errors.append(f"版本 {version} != 2")
+    if length != len(data):
+        errors.append(f"头里的长度 {length} 与文件大小 {len(data)} 不符")
+
+    chunks, offset = [], 12
+    while offset + 8 <= len(data):
+        chunk_len, chunk_type = struct.unpack_from("<I4s", data, offset)
+        if chunk_len % 4:
+            errors.append(f"块 {chunk_type} 长度 {chunk_len} 没有 4 字节对齐")
+        chunks.append((chunk_type, data[offset + 8:offset + 8 + chunk_len]))
+        offset += 8 + chunk_len
+    if not chunks or chunks[0][0] != b"JSON":
+        return errors + ["第一个块不是 JSON"]
+    try:
+        doc = json.loads(chunks[0][1])
+    except ValueError as e:
+        return errors + [f"JSON 解析失败: {e}"]
+    binary = chunks[1][1] if len(chunks) > 1 and chunks[1][0] == b"BIN\0" else b""
+
+    if doc.get("asset", {}).get("version") != "2.0":
+        errors.append("asset.version 不是 2.0")
+    buffers = doc.get("buffers", [])
+    if buffers and buffers[0].get("byteLength", 0) > len(binary):
+        errors.append("buffers[0].byteLength 超过 BIN 块")
+
+    views = doc.get("bufferViews", [])
+    for i, view in enumerate(views):
+        end = view.get("byteOffset", 0) + view["byteLength"]
+        if end > len(binary):
+            errors.append(f"bufferView {i} 越界")
+
+    accessors = doc.get("accessors", [])
+    arrays = {}
+    for i, acc in enumerate(accessors):
+        if acc.get("componentType") not in COMPONENT_DTYPES or acc.get("type") not in TYPE_WIDTHS:
+            errors.append(f"accessor {i} 类型非法")
+            continue
+        if acc.get("count", 0) < 1:
+            errors.append(f"accessor {i} count < 1")
+            continue
+        view = views[acc["bufferView"]] if acc.get("bufferView", -1) < len(views) else None
+        if view is None:
+            errors.append(f"accessor {i} 引用了不存在的 bufferView")
+            continue
+        dtype = np.dtype(COMPONENT_DTYPES[acc["componentType"]])
+        width = TYPE_WIDTHS[acc["type"]]
+        start = view.get("byteOffset", 0) + acc.get("byteOffset", 0)
+        if start % dtype.itemsize:
+            errors.append(f"accessor {i} 偏移没有按分量大小对齐")
+        size = acc["count"] * width * dtype.itemsize
+        if acc.get("byteOffset", 0) + size > view["byteLength"]:
+            errors.append(f"accessor {i} 超出 bufferView")
+            continue
+        arr = np.frombuffer(binary, dtype=dtype, count=acc["count"] * width, offset=start).reshape(-1, width)
+        arrays[i] = arr
+        if dtype == np.float32 and not np.isfinite(arr).all():
+            errors.append(f"accessor {i} 含 NaN/Inf")
+        if "min" in acc and not np.allclose(arr.min(axis=0), acc["min"], atol=1e-6):
+            errors.append(f"accessor {i} min 与数据不符")
+        if "max" in acc and not np.allclose(arr.max(axis=0), acc["max"], atol=1e-6):
+            errors.append(f"accessor {i} max 与数据不符")
+
+    for m, mesh in enumerate(doc.get("meshes", [])):
+        for p, prim in enumerate(mesh.get("primitives", [])):
+            attrs = prim.get("attributes", {})
+            pos = attrs.get("POSITION")
+            if pos is None or pos not in arrays:
+                errors.append(f"mesh {m} primitive {p} 缺少有效的 POSITION")
+                continue
+            if "min" not in accessors[pos] or "max" not in accessors[pos]:
+                errors.append(f"mesh {m} primitive {p} POSITION 缺少 min/max")
+            count = accessors[pos]["count"]
+            for name, idx in attrs.items():
+                if idx in arrays and accessors[idx]["count"] != count:
+                    errors.append(f"mesh {m} primitive {p} 属性 {name} 数量与 POSITION 不一致")
+            if "indices" in prim:
+                idx = arrays.get(prim["indices"])
+                if idx is None:
+                    errors.append(f"mesh {m} primitive {p} indices 无效")
+                elif len(idx) and int(idx.max()) >= count:
+                    errors.append(f"mesh {m} primitive {p} 索引越界")
+                elif prim.get("mode", 4) == 4 and len(idx) % 3:
+                    errors.append(f"mesh {m} primitive {p} 三角形索引数不是 3 的倍数")
+            if "material" in prim and prim["material"] >= len(doc.get("materials", [])):
+                errors.append(f"mesh {m} primitive {p} 材质索引越界")
+            if "NORMAL" in attrs and attrs["NORMAL"] in arrays:
+                lengths = np.linalg.norm(arrays[attrs["NORMAL"]], axis=1)
+                if not np.allclose(lengths, 1.0, atol=1e-3):
+                    errors.append(f"mesh {m} primitive {p} 法线未归一化")
+
+    nodes = doc.get("nodes", [])
+    for n, node in enumerate(nodes):
+        if "mesh" in node and node["mesh"] >= len(doc.get("meshes", [])):
+            errors.append(f"node {n} 网格索引越界")
+    for scene in doc.get("scenes", []):
+        for n in scene.get("nodes", []):
+            if n >= len(nodes):
+                errors.append(f"scene 引用了不存在的 node {n}")
+    return errors
+
+
+# -----------------------------------------------------------------------------
+#  自检 / 基准 (在临时场景里做，结束后删除)
+# -----------------------------------------------------------------------------
+def _make_test_objects(collection, count):
+    import bmesh
+    objects, shared = [], None
+    for i in range(count):
+        if i % 4 == 3 and shared:
+            mesh = shared                       # 每 4 个里有 1 个实例，测试共享
+        else:
+            mesh = bpy.data.meshes.new(f"glb_test_{i:04d}")
+            bm = bmesh.new()
+            if i % 2:
+                bmesh.ops.create_cube(bm, size=1.0)
+            else:
+                bmesh.ops.create_uvsphere(bm, u_segments=12, v_segments=8, radius=0.5, calc_uvs=True)
+            bm.to_mesh(mesh)
+            bm.free()
+            if not mesh.uv_layers:
+                mesh.uv_layers.new()
+            shared = mesh
+        obj = bpy.data.objects.new(f"glb_test_{i:04d}", mesh)
+        obj.location = (i % 32 * 2.0, i // 32 * 2.0, 0.0)
+        obj.rotation_euler = (0.1 * i, 0.0, 0.2 * i)
+        collection.objects.link(obj)
+        objects.append(obj)
+    return objects
+
+
+def _with_test_scene(count, fn):
+    collection = bpy.data.collections.new("glb_writer_test")
+    bpy.context.scene.collection.children.link(collection)
+    meshes_before = set(bpy.data.meshes)
+    try:
+        objects = _make_test_objects(collection, count)
+        bpy.context.view_layer.update()
+        return fn(objects)
+    finally:
+        for obj in list(collection.objects):
+            bpy.data.objects.remove(obj)
+        bpy.data.collections.remove(collection)
+        for mesh in set(bpy.data.meshes) - meshes_before:
+            bpy.data.meshes.remove(mesh)
+
+
+def self_test():
+    """写合成网格 (含实例) 并校验；再检查顶点位置与源网格一致"""
+    def run(objects):
+        path = os.path.join(tempfile.mkdtemp(prefix="glb_writer_"), "self_test.glb")
+        write_glb(objects, path)
+        errors = validate_glb(path)
+        with open(path, "rb") as f:
+            raw = f.read()
+        json_len = struct.unpack_from("<I", raw, 12)[0]
+        doc = json.loads(raw[20:20 + json_len])
+        if len(doc["meshes"]) != len({o.data.name for o in objects}):
+            errors.append("实例网格没有共享")
+        if len(doc["nodes"]) != len(objects):
+            errors.append("节点数与物体数不符")
+        return path, errors
+
+    path, errors = _with_test_scene(12, run)
+    print(f"GLB 直写自检: {'通过' if not errors else '失败'} ({path})")
+    for e in errors:
+        print("  ✗", e)
+    return not errors
+
+
+def benchmark(count=1000):
+    """count 个小网格逐个导出成单独文件：直写 vs glTF 插件"""
+    def run(objects):
+        out = tempfile.mkdtemp(prefix="glb_writer_bench_")
+        depsgraph = bpy.context.evaluated_depsgraph_get()
+        start = time.perf_counter()
+        for obj in objects:
+            write_glb([obj], os.path.join(out, f"direct_{obj.name}.glb"), depsgraph)
+        direct = time.perf_counter() - start
+
+        selected = list(bpy.context.selected_objects)
+        start = time.perf_counter()
+        for obj in objects:
+            for o in bpy.context.view_layer.objects:
+                o.select_set(o is obj)
+            bpy.ops.export_scene.gltf(filepath=os.path.join(out, f"stock_{obj.name}.glb"),
+                                      export_format='GLB', use_selection=True, export_animations=False)
+        stock = time.perf_counter() - start
+        for o in bpy.context.view_layer.objects:
+            o.select_set(o in selected)
+
+        invalid = sum(1 for obj in objects if validate_glb(os.path.join(out, f"direct_{obj.name}.glb")))
+        return direct, stock, invalid
+
+    direct, stock, invalid = _with_test_scene(count, run)
+    print(f"GLB 直写基准 ({count} 个小网格): 直写 {direct:.2f}s, glTF 插件 {stock:.2f}s, "
+          f"快 {stock / direct:.1f}x, 校验失败 {invalid}")
+    return direct, stock
+
+
+class GLBWriter:
+    """放进 driver_namespace 的入口"""
+    write_glb = staticmethod(write_glb)
+    direct_write_blockers = staticmethod(direct_write_blockers)
+    validate_glb = staticmethod(validate_glb)
+    self_test = staticmethod(self_test)
+    benchmark = staticmethod(benchmark)
+
+
+def install():
+    writer = GLBWriter()
+    bpy.app.driver_namespace[WRITER_KEY] = writer
+    return writer
+
+
+install()
+
+if __name__ == "__main__":
+    self_test()
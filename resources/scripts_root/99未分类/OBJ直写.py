@@ -0,0 +1,328 @@
+# script_id: 256021a7-690a-4e8f-91d6-489a1df4020a
+# -*- coding: utf-8 -*-
+# =============================================================================
+#  OBJ 直写 (批量)
+#  不逐个调用 wm.obj_export，一次遍历评估后的网格直接写 OBJ/MTL：
+#  - foreach_get 读顶点/面角/法线/UV，numpy 做世界变换、轴向转换 (前 -Z, 上 Y，与导出器默认一致)
+#    和 UV/法线去重
+#  - 整段文本用 "格式串 * 数量 % 元组" 批量格式化，面行的格式串也是按面角向量化拼出来的
+#  - 同一遍里可以同时写 "每个物体一个文件" 和 "所有物体一个文件"，
+#    顶点/UV/法线文本只格式化一次，面索引按两种偏移各格式化一次
+#  - 所有文件都走带大缓冲的流写出
+#  网格物体写修改器结果；曲线/曲面/文字/元球和 wm.obj_export 一样先转成网格再写
+#  (没有面的曲线写成 l 线段)。不三角化，面按材质分组写 usemtl。
+#
+#  其他脚本的用法 (运行过本脚本后，或由它们自动加载)：
+#      writer = bpy.app.driver_namespace["obj_writer"]
+#      writer.write_obj(objects, directory=每个物体一个文件的目录, combined_path=合并文件路径)
+# =============================================================================
+
+import bpy
+import os
+import re
+import time
+import tempfile
+import numpy as np
+
+WRITER_KEY = "obj_writer"
+BUFFER_SIZE = 1 << 20
+
+# Blender (Z 上) -> OBJ (Y 上, 前 -Z)
+AXIS = np.array([[1, 0, 0], [0, 0, 1], [0, -1, 0]], dtype=np.float64)
+
+# 这些类型没有 .data 网格，评估后用 to_mesh() 转成临时网格 (导出器也会导出它们)
+CONVERTIBLE_TYPES = {'CURVE', 'SURFACE', 'FONT', 'META'}
+
+
+def _get(collection, prop, count, width=1, dtype=np.float32):
+    arr = np.empty(count * width, dtype=dtype)
+    if count:
+        collection.foreach_get(prop, arr)
+    return arr.reshape((count, width)) if width > 1 else arr
+
+
+def _corner_normals(mesh):
+    nl = len(mesh.loops)
+    if hasattr(mesh, "corner_normals"):       # 4.1+
+        return _get(mesh.corner_normals, "vector", nl, 3)
+    mesh.calc_normals_split()
+    return _get(mesh.loops, "normal", nl, 3)
+
+
+def _unique_rows(arr, decimals):
+    """按写出精度去重，返回 (唯一行, 每行对应的唯一行下标)"""
+    rounded = np.round(arr, decimals) + 0.0          # +0.0 把 -0.0 归成 0.0
+    unique, inverse = np.unique(rounded, axis=0, return_inverse=True)
+    return unique, inverse.reshape(-1)
+
+
+def safe_name(name):
+    return re.sub(r"\s", "_", name)
+
+
+def _file_name(name):
+    return re.sub(r'[\\/:*?"<>|]', "_", name)
+
+
+class MeshText:
+    """一个物体格式化好的 OBJ 片段；面行保留格式串，写入时按偏移填数字"""
+
+    def __init__(self, obj, mesh):
+        """mesh: obj 评估后的网格 (网格物体的 evaluated data，或曲线等 to_mesh() 的结果)"""
+        nv, nl, npoly = len(mesh.vertices), len(mesh.loops), len(mesh.polygons)
+        self.name = obj.name
+        matrix = np.array(obj.matrix_world, dtype=np.float64)
+        linear = AXIS @ matrix[:3, :3]
+        co = _get(mesh.vertices, "co", nv, 3).astype(np.float64)
+        co = co @ linear.T + AXIS @ matrix[:3, 3]
+
+        normal_matrix = np.linalg.inv(linear).T
+        normals = _corner_normals(mesh).astype(np.float64) @ normal_matrix.T
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals /= np.where(lengths > 0, lengths, 1.0)
+        self.normals, vn_index = _unique_rows(normals, 4)
+
+        uv_layer = mesh.uv_layers.active
+        if uv_layer:
+            self.uvs, vt_index = _unique_rows(_get(uv_layer.data, "uv", nl, 2).astype(np.float64), 6)
+        else:
+            self.uvs, vt_index = np.empty((0, 2)), None
+
+        corner_vert = _get(mesh.loops, "vertex_index", nl, 1, np.int32)
+        loop_start = _get(mesh.polygons, "loop_start", npoly, 1, np.int32)
+        loop_total = _get(mesh.polygons, "loop_total", npoly, 1, np.int32)
+        material_index = _get(mesh.polygons, "material_index", npoly, 1, np.int32)
+
+        # 面按材质排序 (稳定)；负缩放时反转每个面的绕序，保持法线朝外
+        order = np.argsort(material_index, kind="stable")
+        totals = loop_total[order]
+        starts = np.repeat(loop_start[order], totals)
+        offsets = np.arange(totals.sum()) - np.repeat(np.cumsum(totals) - totals, totals)
+        if np.linalg.det(linear) < 0:
+            offsets = np.repeat(totals, totals) - 1 - offsets
+        corners = starts + offsets
+
+        self.vertex_text = ("v %.6f %.6f %.6f\n" * nv) % tuple(co.ravel())
+        self.uv_text = ("vt %.6f %.6f\n" * len(self.uvs)) % tuple(self.uvs.ravel())
+        self.normal_text = ("vn %.4f %.4f %.4f\n" * len(self.normals)) % tuple(self.normals.ravel())
+
+        columns = [corner_vert[corners]]
+        token = "%d//%d" if vt_index is None else "%d/%d/%d"
+        if vt_index is not None:
+            columns.append(vt_index[corners])
+        columns.append(vn_index[corners])
+        self.face_values = np.stack(columns, axis=1).astype(np.int64) + 1
+        # 没有面的网格 (如没有挤出/倒角的曲线) 把边写成 l 线段，否则整个物体是空的
+        if npoly:
+            self.edge_values = np.empty((0, 2), dtype=np.int64)
+        else:
+            self.edge_values = _get(mesh.edges, "vertices", len(mesh.edges), 2, np.int32).astype(np.int64) + 1
+        self.counts = np.array([nv, len(self.uvs), len(self.normals)], dtype=np.int64)
+
+        # 面格式串：每个面第一个面角前加 "f "，最后一个面角后换行；材质切换处插 usemtl
+        first = np.zeros(len(corners), dtype=bool)
+        last = np.zeros(len(corners), dtype=bool)
+        if len(corners):
+            ends = np.cumsum(totals)
+            first[ends - totals] = True
+            last[ends - 1] = True
+        tokens = np.where(last, token + "\n", token + " ").astype(object)
+        tokens[first] = "f " + tokens[first]
+        slots = obj.material_slots
+        self.materials = []
+        sorted_mats = material_index[order]
+        if npoly:
+            changes = np.flatnonzero(np.r_[True, sorted_mats[1:] != sorted_mats[:-1]])
+            corner_of_poly = np.cumsum(totals) - totals
+            for p in changes:
+                m = int(sorted_mats[p])
+                mat = slots[m].material if m < len(slots) else None
+                self.materials.append(mat)
+                label = safe_name(mat.name) if mat else "None"
+                tokens[corner_of_poly[p]] = f"usemtl {label}\n" + tokens[corner_of_poly[p]]
+        self.face_format = "".join(tokens)
+        self.columns = self.face_values.shape[1]
+
+    def face_text(self, offsets):
+        """offsets: 之前已写的 (v, vt, vn) 数量"""
+        shift = offsets[[0, 1, 2]] if self.columns == 3 else offsets[[0, 2]]
+        return self.face_format % tuple((self.face_values + shift).ravel())
+
+    def edge_text(self, offsets):
+        return ("l %d %d\n" * len(self.edge_values)) % tuple((self.edge_values + offsets[0]).ravel())
+
+
+# -----------------------------------------------------------------------------
+#  MTL
+# -----------------------------------------------------------------------------
+def _base_color_image(mat):
+    if not (mat.use_nodes and mat.node_tree):
+        return None
+    bsdf = next((n for n in mat.node_tree.nodes if n.type == 'BSDF_PRINCIPLED'), None)
+    if not bsdf or not bsdf.inputs["Base Color"].is_linked:
+        return None
+    node = bsdf.inputs["Base Color"].links[0].from_node
+    if node.type == 'TEX_IMAGE' and node.image:
+        return bpy.path.abspath(node.image.filepath, library=node.image.library)
+    return None
+
+
+def mtl_text(materials):
+    lines = []
+    for mat in materials:
+        color, metallic, roughness, alpha = list(mat.diffuse_color)[:3], mat.metallic, mat.roughness, 1.0
+        if mat.use_nodes and mat.node_tree:
+            bsdf = next((n for n in mat.node_tree.nodes if n.type == 'BSDF_PRINCIPLED'), None)
+            if bsdf:
+                color = list(bsdf.inputs["Base Color"].default_value)[:3]
+                metallic = bsdf.inputs["Metallic"].default_value
+                roughness = bsdf.inputs["Roughness"].default_value
+                alpha = bsdf.inputs["Alpha"].default_value
+        lines.append(f"newmtl {safe_name(mat.name)}")
+        lines.append("Ns %.6f" % ((1.0 - roughness) ** 2 * 1000.0))
+        lines.append("Ka %.6f %.6f %.6f" % (metallic, metallic, metallic))
+        lines.append("Kd %.6f %.6f %.6f" % tuple(color))
+        lines.append("Ks 0.500000 0.500000 0.500000")
+        lines.append("d %.6f" % alpha)
+        lines.append("illum 2")
+        image = _base_color_image(mat)
+        if image:
+            lines.append(f"map_Kd {image}")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+class OBJStream:
+    """一个输出 OBJ (+ MTL)：记着已写的 v/vt/vn 数量和用到的材质"""
+
+    def __init__(self, path):
+        self.path = path
+        self.mtl_path = os.path.splitext(path)[0] + ".mtl"
+        self.file = open(path, "w", encoding="utf-8", newline="\n", buffering=BUFFER_SIZE)
+        self.file.write(f"# Blender scripts_lib OBJ直写\nmtllib {os.path.basename(self.mtl_path)}\n")
+        self.offsets = np.zeros(3, dtype=np.int64)
+        self.materials = {}
+
+    def write(self, text):
+        self.file.write(f"o {text.name}\n")
+        self.file.write(text.vertex_text)
+        self.file.write(text.uv_text)
+        self.file.write(text.normal_text)
+        self.file.write(text.face_text(self.offsets))
+        self.file.write(text.edge_text(self.offsets))
+        self.offsets += text.counts
+        for mat in text.materials:
+            if mat:
+                self.materials.setdefault(mat.name_full, mat)
+
+    def close(self):
+        self.file.close()
+        with open(self.mtl_path, "w", encoding="utf-8", newline="\n", buffering=BUFFER_SIZE) as f:
+            f.write(mtl_text(self.materials.values()))
+
+
+def write_obj(objects, directory=None, combined_path=None, depsgraph=None):
+    """
+    一遍写出：directory 不为空时每个物体写 <directory>/<物体名>.obj，
+    combined_path 不为空时所有物体合并写进这一个文件。返回写出的 OBJ 路径列表。
+    """
+    depsgraph = depsgraph or bpy.context.evaluated_depsgraph_get()
+    combined = OBJStream(combined_path) if combined_path else None
+    written = [combined_path] if combined_path else []
+    try:
+        for obj in objects:
+            if obj.type == 'MESH':
+                text = MeshText(obj, obj.evaluated_get(depsgraph).data)
+            elif obj.type in CONVERTIBLE_TYPES:
+                eval_obj = obj.evaluated_get(depsgraph)
+                mesh = eval_obj.to_mesh()
+                try:
+                    if mesh is None:
+                        continue
+                    text = MeshText(obj, mesh)
+                finally:
+                    eval_obj.to_mesh_clear()
+            else:
+                continue
+            if directory:
+                single = OBJStream(os.path.join(directory, f"{_file_name(obj.name)}.obj"))
+                try:
+                    single.write(text)
+                finally:
+                    single.close()
+                written.append(single.path)
+            if combined:
+                combined.write(text)
+    finally:
+        if combined:
+            combined.close()
+    return written
+
+
+# -----------------------------------------------------------------------------
+#  基准 (在临时集合里做，结束后删除)
+# -----------------------------------------------------------------------------
+def benchmark(count=1000):
+    """count 个小网格逐个导出：直写 vs 逐个调用 wm.obj_export"""
+    import bmesh
+    collection = bpy.data.collections.new("obj_writer_test")
+    bpy.context.scene.collection.children.link(collection)
+    meshes_before = set(bpy.data.meshes)
+    selected = list(bpy.context.selected_objects)
+    out = tempfile.mkdtemp(prefix="obj_writer_bench_")
+    try:
+        objects = []
+        for i in range(count):
+            mesh = bpy.data.meshes.new(f"obj_test_{i:04d}")
+            bm = bmesh.new()
+            bmesh.ops.create_uvsphere(bm, u_segments=8, v_segments=6, radius=0.5, calc_uvs=True)
+            bm.to_mesh(mesh)
+            bm.free()
+            obj = bpy.data.objects.new(f"obj_test_{i:04d}", mesh)
+            obj.location = (i % 32, i // 32, 0.0)
+            collection.objects.link(obj)
+            objects.append(obj)
+        bpy.context.view_layer.update()
+
+        os.makedirs(os.path.join(out, "direct"))
+        start = time.perf_counter()
+        write_obj(objects, directory=os.path.join(out, "direct"), combined_path=os.path.join(out, "direct_combined.obj"))
+        direct = time.perf_counter() - start
+
+        os.makedirs(os.path.join(out, "stock"))
+        start = time.perf_counter()
+        for obj in objects:
+            for o in bpy.context.view_layer.objects:
+                o.select_set(o is obj)
+            bpy.ops.wm.obj_export(filepath=os.path.join(out, "stock", f"{obj.name}.obj"), export_selected_objects=True)
+        stock = time.perf_counter() - start
+    finally:
+        for obj in list(collection.objects):
+            bpy.data.objects.remove(obj)
+        bpy.data.collections.remove(collection)
+        for mesh in set(bpy.data.meshes) - meshes_before:
+            bpy.data.meshes.remove(mesh)
+        for o in bpy.context.view_layer.objects:
+            o.select_set(o in selected)
+
+    print(f"OBJ 直写基准 ({count} 个小网格): 直写 (逐个 + 合并) {direct:.2f}s, "
+          f"wm.obj_export 逐个 {stock:.2f}s, 快 {stock / direct:.1f}x ({out})")
+    return direct, stock
+
+
+class OBJWriter:
+    """放进 driver_namespace 的入口"""
+    write_obj = staticmethod(write_obj)
+    benchmark = staticmethod(benchmark)
+
+
+def install():
+    writer = OBJWriter()
+    bpy.app.driver_namespace[WRITER_KEY] = writer
+    return writer
+
+
+install()
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,38 @@
+# script_id: 20e70dc8-386f-4e23-9195-d42b720331b7
+# -*- coding: utf-8 -*-
+# =============================================================================
+#  共享工具加载器
+#  导出预设 / 导出清单 / 导出检查 / 导出暂存 / GLB直写 / OBJ直写 / 材质节点索引
+#  这些工具运行时把自己放进 bpy.app.driver_namespace[key]，整个会话共享一份。
+#  load_shared(key, relpath) 取出它；本会话还没安装时，先运行 relpath 对应的脚本。
+#
+#  其他脚本的用法：
+#      load_shared = runpy.run_path(os.path.join(<脚本根目录>, "99未分类", "共享加载.py"))["load_shared"]
+#      registry = load_shared("export_presets", "99未分类/导出预设.py")
+# =============================================================================
+
+import bpy
+import os
+import runpy
+
+# 脚本根目录 (本文件在 <根目录>/99未分类/ 下)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", ""))))
+
+
+def load_shared(key, relpath):
+    """返回 driver_namespace[key]；还没有时运行 <根目录>/relpath 安装它"""
+    tool = bpy.app.driver_namespace.get(key)
+    if tool is None:
+        path = os.path.join(ROOT, *relpath.split("/"))
+        if not os.path.exists(path):
+            raise RuntimeError(f"未找到 {relpath}，请先运行它")
+        runpy.run_path(path)
+        tool = bpy.app.driver_namespace.get(key)
+        if tool is None:
+            raise RuntimeError(f"{relpath} 运行后没有安装 '{key}'")
+    return tool
+
+
+if __name__ == "__main__":
+    for key in sorted(k for k in bpy.app.driver_namespace.keys() if not k.startswith("_")):
+        print(f"{key}: {type(bpy.app.driver_namespace[key]).__name__}")
@@ -1,9 +1,45 @@
 # script_id: ce780a56-a2c9-45ad-b8ef-3f2c99f1497b
 import bpy
 import os
+import re
 import numpy as np
 from mathutils import Vector
 
+# =============================================================================
+#  通道打包/拆分工具箱
+#  - 拆分：RM / ORM / RMA / MRAO 打包贴图 -> 单通道灰度图，并自动连到 BSDF
+#  - 合并：若干灰度图 -> 按布局打包成一张
+#  - 提取 Alpha、粗糙度 <-> 光泽度 反转
+#  像素一律通过 pixels.foreach_get / foreach_set 读写到预分配的 float32 缓冲，
+#  不再经过 img.pixels[:] 的 Python 列表；批量处理时缓冲在同尺寸图之间复用。
+# =============================================================================
+
+# 打包布局：通道下标 -> 角色
+LAYOUTS = {
+    'RM':   {1: 'Metallic', 2: 'Roughness'},                   # 旧脚本的约定 (G=金属度, B=粗糙度)
+    'ORM':  {0: 'AO', 1: 'Roughness', 2: 'Metallic'},          # glTF / Unreal
+    'RMA':  {0: 'Roughness', 1: 'Metallic', 2: 'AO'},
+    'MRAO': {0: 'Metallic', 1: 'Roughness', 2: 'AO'},          # Unity HDRP mask 风格
+}
+# 合并时缺失角色的填充值
+ROLE_DEFAULTS = {'AO': 1.0, 'Roughness': 0.5, 'Metallic': 0.0, 'Alpha': 1.0, 'Glossiness': 0.5}
+# 名字按 _ - . 空格 切成词后，含这些词的贴图视为打包图 (整词匹配，"normal"/"uniform" 不会误中 orm)
+PACKED_TOKENS = {
+    "rm": 'RM', "orm": 'ORM', "occroughmetal": 'ORM', "occluderoughmetal": 'ORM',
+    "rma": 'RMA', "mrao": 'MRAO',
+}
+# 合并时按名字里的词认出单通道图的角色
+ROLE_TOKENS = {
+    "ao": 'AO', "occlusion": 'AO', "roughness": 'Roughness', "rough": 'Roughness',
+    "metallic": 'Metallic', "metalness": 'Metallic', "metal": 'Metallic',
+    "alpha": 'Alpha', "opacity": 'Alpha', "gloss": 'Glossiness', "glossiness": 'Glossiness',
+}
+
+OUTPUT_FORMAT = 'JPEG'      # 输出格式：'JPEG' / 'PNG' / 'TARGA'
+TILE_ROWS = 1024            # 需要临时数组的运算按行分块做，16K 图也不会多出整张副本
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'TARGA': 'tga'}
+
+
 # ---------- 若 .blend 未保存则弹窗并退出 ----------
 def abort_if_blend_unsaved():
     if not bpy.data.filepath:
@@ -14,89 +50,315 @@ def abort_if_blend_unsaved():
         return True
     return False
 
-# ---------- 创建 / 覆盖灰度 JPG ----------
-def make_gray_jpg(img_name, channel, w, h, out_path):
+
+# ---------- 预分配缓冲 ----------
+class PixelBuffers:
+    """按 (用途, 元素数) 复用 float32 缓冲，批量处理同尺寸贴图时不再反复分配"""
+
+    def __init__(self):
+        self._pool = {}
+
+    def get(self, slot, size):
+        buf = self._pool.get(slot)
+        if buf is None or buf.size != size:
+            buf = np.empty(size, dtype=np.float32)
+            self._pool[slot] = buf
+        return buf
+
+
+def read_pixels(img, buffers, slot="src"):
+    """读到 (N, channels) 的视图里"""
+    w, h = img.size
+    buf = buffers.get(slot, w * h * img.channels)
+    img.pixels.foreach_get(buf)
+    return buf.reshape(-1, img.channels)
+
+
+def row_tiles(count, width):
+    step = max(1, TILE_ROWS) * width
+    for start in range(0, count, step):
+        yield slice(start, min(start + step, count))
+
+
+# ---------- 创建 / 覆盖灰度图 ----------
+def new_or_reuse_image(img_name, w, h):
     # 若已经存在同名 Image，直接复用而不是另起 .001
     img = bpy.data.images.get(img_name)
+    if img is not None and tuple(img.size) != (w, h):
+        img.scale(w, h)
     if img is None:
         img = bpy.data.images.new(img_name, width=w, height=h,
                                   alpha=False, float_buffer=False)
-    rgba = np.zeros((h, w, 4), dtype=np.float32)
-    g = channel / 255.0
-    rgba[:, :, 0:3] = g[:, :, None]
-    rgba[:, :, 3]   = 1.0
-    img.pixels[:]    = rgba.flatten()
+    return img
+
+
+def save_image(img, out_path):
     img.filepath_raw = out_path
-    img.file_format  = 'JPEG'
+    img.file_format = OUTPUT_FORMAT
     img.save()
+    img.colorspace_settings.name = 'Non-Color'
     return img
 
-def split_rm_auto(out_dir):
+
+def make_gray_image(img_name, src, channel, w, h, out_path, buffers, invert=False):
+    """把 src 的某个通道写成灰度图 (可选反转)"""
+    img = new_or_reuse_image(img_name, w, h)
+    dst = buffers.get("dst", w * h * 4).reshape(-1, 4)
+    for tile in row_tiles(len(dst), w):
+        if invert:
+            dst[tile, 0:3] = 1.0 - src[tile, channel, None]
+        else:
+            dst[tile, 0:3] = src[tile, channel, None]
+    dst[:, 3] = 1.0
+    img.pixels.foreach_set(dst.ravel())
+    return save_image(img, out_path)
+
+
+# ---------- 拆分 ----------
+def split_packed(img, layout, prefix, out_dir, buffers):
+    """拆分打包贴图，返回 {角色: 新图}"""
+    w, h = img.size
+    src = read_pixels(img, buffers)
+    result = {}
+    for channel, role in LAYOUTS[layout].items():
+        if channel >= src.shape[1]:
+            continue
+        name = f"{prefix}_{role}"
+        path = os.path.join(out_dir, f"{name}.{EXTENSIONS[OUTPUT_FORMAT]}")
+        result[role] = make_gray_image(name, src, channel, w, h, path, buffers)
+    return result
+
+
+def extract_alpha(img, prefix, out_dir, buffers):
+    w, h = img.size
+    if img.channels < 4:
+        return None
+    src = read_pixels(img, buffers)
+    name = f"{prefix}_Alpha"
+    path = os.path.join(out_dir, f"{name}.{EXTENSIONS[OUTPUT_FORMAT]}")
+    return make_gray_image(name, src, 3, w, h, path, buffers)
+
+
+def invert_gray(img, new_name, out_dir, buffers):
+    """粗糙度 <-> 光泽度：v' = 1 - v (取 R 通道)"""
+    w, h = img.size
+    src = read_pixels(img, buffers)
+    path = os.path.join(out_dir, f"{new_name}.{EXTENSIONS[OUTPUT_FORMAT]}")
+    return make_gray_image(new_name, src, 0, w, h, path, buffers, invert=True)
+
+
+# ---------- 合并 ----------
+def merge_channels(role_images, layout, name, out_dir, buffers):
+    """
+    role_images: {角色: 灰度图}，按布局打包成一张 RGBA 图。
+    所有源图尺寸需一致；缺失的角色用 ROLE_DEFAULTS 填充。
+    """
+    sizes = {tuple(i.size) for i in role_images.values()}
+    if len(sizes) != 1:
+        raise ValueError(f"合并的贴图尺寸不一致: {sizes}")
+    w, h = sizes.pop()
+    packed = new_or_reuse_image(name, w, h)
+    dst = buffers.get("merge", w * h * 4).reshape(-1, 4)
+    dst[:, 3] = 1.0
+    for channel, role in LAYOUTS[layout].items():
+        img = role_images.get(role)
+        if img is None:
+            dst[:, channel] = ROLE_DEFAULTS.get(role, 0.0)
+            continue
+        src = read_pixels(img, buffers)
+        for tile in row_tiles(len(dst), w):
+            dst[tile, channel] = src[tile, 0]
+    packed.pixels.foreach_set(dst.ravel())
+    return save_image(packed, os.path.join(out_dir, f"{name}.{EXTENSIONS[OUTPUT_FORMAT]}"))
+
+
+# ---------- 连线 ----------
+def link_split_result(img_node, images):
+    nt = img_node.id_data
+    new_nodes = {}
+    for i, (role, img) in enumerate(images.items()):
+        node = nt.nodes.new("ShaderNodeTexImage")
+        node.image = img
+        node.label = node.name = img.name    # ★ 节点名称/标签同步
+        node.location = img_node.location + Vector((300, 80 - 80 * i))
+        new_nodes[role] = node
+
+    bsdf = next((n for n in nt.nodes if n.type == 'BSDF_PRINCIPLED'), None)
+    if bsdf is None:
+        print("⚠️ 找不到 Principled BSDF，贴图已生成但未连线")
+        return False
+    for role, node in new_nodes.items():
+        sock = bsdf.inputs.get(role)
+        if sock is None:
+            continue   # AO 在 Principled BSDF 上没有对应输入，只生成贴图
+        for link in list(sock.links):
+            nt.links.remove(link)
+        nt.links.new(node.outputs['Color'], sock)
+    return True
+
+
+def name_tokens(img_name):
+    return [t for t in re.split(r"[_\-.\s]+", img_name.lower()) if t]
+
+
+def packed_layout(img_name):
+    """按整词认布局，从名字末尾往前找 (后缀优先)；不是打包图返回 None"""
+    for token in reversed(name_tokens(img_name)):
+        if token in PACKED_TOKENS:
+            return PACKED_TOKENS[token]
+    return None
+
+
+def is_packed_node(node):
+    return node.type == 'TEX_IMAGE' and node.image and packed_layout(node.image.name) is not None
+
+
+def guess_layout(img_name):
+    return packed_layout(img_name) or 'RM'
+
+
+def guess_role(img_name):
+    for token in reversed(name_tokens(img_name)):
+        if token in ROLE_TOKENS:
+            return ROLE_TOKENS[token]
+    return None
+
+
+def split_rm_auto(out_dir, layout=None):
     if abort_if_blend_unsaved():
         return
 
     # ---------- 找到 RM / ORM 贴图节点 ----------
     img_node = getattr(bpy.context, "active_node", None)
 
-    def is_rm(node):
-        return (node.type == 'TEX_IMAGE' and node.image and
-                any(k in node.image.name.lower()
-                    for k in ("_rm", "orm", "occroughmetal", "occluderoughmetal")))
-
-    if img_node is None or not is_rm(img_node):
+    if img_node is None or not is_packed_node(img_node):
         obj = bpy.context.object
         mat = obj.active_material if obj else None
         if mat and mat.use_nodes:
-            img_node = next((n for n in mat.node_tree.nodes if is_rm(n)), None)
+            img_node = next((n for n in mat.node_tree.nodes if is_packed_node(n)), None)
 
     if img_node is None:
         print("❌ 没找到 RM/ORM Image Texture 节点")
         return
 
-    img = img_node.image
-    w, h = img.size
-    arr = (np.array(img.pixels[:]).reshape(h, w, 4) * 255).astype(np.uint8)
-    rough = arr[:, :, 2]          # B → Roughness
-    metal = arr[:, :, 1]          # G → Metallic
-
     os.makedirs(out_dir, exist_ok=True)
-
     mat = bpy.context.object.active_material if bpy.context.object else None
     prefix = mat.name if mat else "Material"
 
-    # ---------- 统一命名 ----------
-    rough_img_name  = f"{prefix}_Roughness"
-    metal_img_name  = f"{prefix}_Metallic"
-    rough_path      = os.path.join(out_dir, f"{rough_img_name}.jpg")
-    metal_path      = os.path.join(out_dir, f"{metal_img_name}.jpg")
+    # 旧脚本无论名字如何都按 RM 约定拆分，这里保持一致，需要时显式传 layout
+    images = split_packed(img_node.image, layout or 'RM', prefix, out_dir, PixelBuffers())
+    if link_split_result(img_node, images):
+        print("✅ 已输出并连线：", ", ".join(i.filepath_raw for i in images.values()))
 
-    rough_img = make_gray_jpg(rough_img_name, rough, w, h, rough_path)
-    metal_img = make_gray_jpg(metal_img_name, metal, w, h, metal_path)
 
-    nt = img_node.id_data
-    r_node = nt.nodes.new("ShaderNodeTexImage")
-    m_node = nt.nodes.new("ShaderNodeTexImage")
-    r_node.image  = rough_img
-    m_node.image  = metal_img
-    for n in (r_node, m_node):
-        n.image.colorspace_settings.name = 'Non-Color'
-        n.label = n.name = n.image.name    # ★ 节点名称/标签同步
+def batch_split_materials(materials, out_dir, layout=None):
+    """批量：拆分所有给定材质中的打包贴图；同一张图只拆一次，缓冲全程复用"""
+    if abort_if_blend_unsaved():
+        return
+    os.makedirs(out_dir, exist_ok=True)
+    buffers = PixelBuffers()
+    done = {}
+    for mat in materials:
+        if not (mat and mat.use_nodes):
+            continue
+        for node in [n for n in mat.node_tree.nodes if is_packed_node(n)]:
+            img = node.image
+            if img.name not in done:
+                done[img.name] = split_packed(img, layout or guess_layout(img.name),
+                                              bpy.path.clean_name(img.name), out_dir, buffers)
+            link_split_result(node, done[img.name])
+    print(f"✅ 批量拆分完成：{len(done)} 张打包贴图 -> {out_dir}")
 
-    r_node.location = img_node.location + Vector((300,  40))
-    m_node.location = img_node.location + Vector((300, -40))
 
-    bsdf = next((n for n in nt.nodes if n.type == 'BSDF_PRINCIPLED'), None)
-    if bsdf:
-        for sock in (bsdf.inputs['Roughness'], bsdf.inputs['Metallic']):
-            for link in list(sock.links):
-                nt.links.remove(link)
-        nt.links.new(r_node.outputs['Color'], bsdf.inputs['Roughness'])
-        nt.links.new(m_node.outputs['Color'], bsdf.inputs['Metallic'])
-        print("✅ 已输出并连线：", rough_path, metal_path)
-    else:
-        print("⚠️ 找不到 Principled BSDF，贴图已生成但未连线")
+def active_image_node():
+    node = getattr(bpy.context, "active_node", None)
+    if node is None:
+        obj = bpy.context.object
+        mat = obj.active_material if obj else None
+        node = mat.node_tree.nodes.active if mat and mat.use_nodes else None
+    return node if node is not None and node.type == 'TEX_IMAGE' and node.image else None
+
+
+def extract_alpha_active(out_dir):
+    """活动图像节点的 Alpha 通道 -> 灰度图"""
+    if abort_if_blend_unsaved():
+        return
+    node = active_image_node()
+    if node is None:
+        print("❌ 请先选中一个带图片的 Image Texture 节点")
+        return
+    os.makedirs(out_dir, exist_ok=True)
+    img = extract_alpha(node.image, bpy.path.clean_name(node.image.name), out_dir, PixelBuffers())
+    print(f"✅ 已输出 Alpha：{img.filepath_raw}" if img else "⚠️ 这张图没有 Alpha 通道")
+
+
+def invert_active(out_dir):
+    """活动图像节点：粗糙度 <-> 光泽度 反转，新图名按角色替换"""
+    if abort_if_blend_unsaved():
+        return
+    node = active_image_node()
+    if node is None:
+        print("❌ 请先选中一个带图片的 Image Texture 节点")
+        return
+    role = guess_role(node.image.name)
+    stem = os.path.splitext(bpy.path.clean_name(node.image.name))[0]
+    new_name = {'Roughness': f"{stem}_Glossiness", 'Glossiness': f"{stem}_Roughness"}.get(role, f"{stem}_Inverted")
+    os.makedirs(out_dir, exist_ok=True)
+    img = invert_gray(node.image, new_name, out_dir, PixelBuffers())
+    print(f"✅ 已输出反转图：{img.filepath_raw}")
+
+
+def pack_selected_nodes(out_dir, layout):
+    """活动材质里选中的 Image Texture 节点按名字认角色，打包成一张 layout 布局的图"""
+    if abort_if_blend_unsaved():
+        return
+    obj = bpy.context.object
+    mat = obj.active_material if obj else None
+    if not (mat and mat.use_nodes):
+        print("❌ 活动物体没有使用节点的材质")
+        return
+    role_images = {}
+    for node in mat.node_tree.nodes:
+        if node.select and node.type == 'TEX_IMAGE' and node.image:
+            role = guess_role(node.image.name)
+            if role is None:
+                print(f"⚠️ 认不出 '{node.image.name}' 的通道角色，已跳过")
+            elif role in role_images:
+                print(f"⚠️ 角色 {role} 重复，忽略 '{node.image.name}'")
+            else:
+                role_images[role] = node.image
+    if not role_images:
+        print("❌ 没有选中可识别的灰度贴图节点")
+        return
+    os.makedirs(out_dir, exist_ok=True)
+    packed = merge_channels(role_images, layout, f"{bpy.path.clean_name(mat.name)}_{layout}", out_dir, PixelBuffers())
+    print(f"✅ 已打包 {', '.join(role_images)} -> {packed.filepath_raw}")
+
+
+def selected_materials():
+    mats = []
+    for obj in bpy.context.selected_objects:
+        for slot in getattr(obj, "material_slots", ()):
+            if slot.material and slot.material not in mats:
+                mats.append(slot.material)
+    return mats
+
 
 # -------------------- 调 用 --------------------
+# 'AUTO':   拆分当前节点/活动材质的打包图     'BATCH':  拆分所有选中物体材质里的打包图
+# 'PACK':   把活动材质里选中的灰度图节点按 PACK_LAYOUT 打包成一张
+# 'ALPHA':  提取活动图像节点的 Alpha        'INVERT': 活动图像节点 粗糙度 <-> 光泽度 反转
+MODE = 'AUTO'
+PACK_LAYOUT = 'ORM'
 blend_dir = bpy.path.abspath("//")
 out_dir   = os.path.join(blend_dir, "分离的贴图_JPG")
-split_rm_auto(out_dir)
+if MODE == 'BATCH':
+    batch_split_materials(selected_materials(), out_dir)
+elif MODE == 'PACK':
+    pack_selected_nodes(out_dir, PACK_LAYOUT)
+elif MODE == 'ALPHA':
+    extract_alpha_active(out_dir)
+elif MODE == 'INVERT':
+    invert_active(out_dir)
+else:
+    split_rm_auto(out_dir)
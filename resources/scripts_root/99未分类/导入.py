@@ -1,63 +1,196 @@
 # script_id: 36b0f535-a308-49ed-a1ea-c6f83ad060bf
+# -*- coding: utf-8 -*-
+# =============================================================================
+#  剪贴板 JSON -> 下载贴图和 OBJ -> 导入并上材质
+#  剪贴板内容形如 {"data": {"output_img": "<url>", "output_obj": "<url>"}}
+#  - 两个文件在后台线程里同时流式下载，Blender 不卡住
+#  - 缓存按内容哈希命名 (.blend 旁的 .import_cache/，未保存时用系统临时目录)，
+#    index.json 记录 URL -> 文件；下过的 URL 不再下载
+#  - 中断的下载留下 .part，下次用 Range 续传 (服务器不支持时从头下)
+#  - 下载完由计时器回到主线程导入；场景里已有同一 OBJ URL 导入的物体时跳过
+#  SELF_TEST = True 时不读剪贴板，改为对本地起的 HTTP 测试服务器跑一遍下载/续传/缓存
+# =============================================================================
+
 import bpy
-import requests
 import os
 import json
+import hashlib
+import tempfile
+import threading
+import urllib.request
+import urllib.error
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_DIR_NAME = ".import_cache"
+CHUNK = 1 << 16
+WORKERS = 2
+TIMEOUT = 30
+POLL_INTERVAL = 0.2
+SOURCE_PROP = "import_source"     # 导入的物体上记下 OBJ 的 URL，用来跳过重复导入
+
+SELF_TEST = False
+
+
+def default_cache_root():
+    if bpy.data.filepath:
+        return os.path.join(os.path.dirname(bpy.data.filepath), CACHE_DIR_NAME)
+    return os.path.join(tempfile.gettempdir(), "blender" + CACHE_DIR_NAME)
+
+
+class DownloadCache:
+    """按内容哈希存文件的下载缓存；fetch() 可在多个线程里同时调用"""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.index_path = os.path.join(root, "index.json")
+        self.lock = threading.Lock()
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            self.index = {}
+
+    def lookup(self, url):
+        name = self.index.get(url)
+        path = os.path.join(self.root, name) if name else None
+        return path if path and os.path.exists(path) else None
+
+    def _store(self, url, name):
+        with self.lock:
+            self.index[url] = name
+            tmp = self.index_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self.index, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.index_path)
+
+    def fetch(self, url):
+        """返回缓存文件路径；已缓存直接返回，否则 (续传) 下载"""
+        cached = self.lookup(url)
+        if cached:
+            return cached
+
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+        part = os.path.join(self.root, key + ".part")
+        meta_path = part + ".json"
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                etag = json.load(f).get("etag")
+        except (OSError, ValueError):
+            etag = None
+
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        request = urllib.request.Request(url)
+        if offset:
+            request.add_header("Range", f"bytes={offset}-")
+            if etag:
+                request.add_header("If-Range", etag)
+
+        digest = hashlib.sha256()
+        try:
+            response = urllib.request.urlopen(request, timeout=TIMEOUT)
+        except urllib.error.HTTPError as e:
+            if e.code != 416:             # 416: .part 已经是完整文件
+                raise
+            response = None
+
+        if response is not None:
+            with response:
+                resumed = offset and response.status == 206
+                etag = response.headers.get("ETag") or etag
+                with open(meta_path, "w", encoding="utf-8") as f:
+                    json.dump({"url": url, "etag": etag}, f)
+                if resumed:
+                    with open(part, "rb") as f:      # 续传：先把已有部分算进哈希
+                        for block in iter(lambda: f.read(CHUNK), b""):
+                            digest.update(block)
+                with open(part, "ab" if resumed else "wb") as f:
+                    for block in iter(lambda: response.read(CHUNK), b""):
+                        f.write(block)
+                        digest.update(block)
+        else:
+            with open(part, "rb") as f:
+                for block in iter(lambda: f.read(CHUNK), b""):
+                    digest.update(block)
+
+        ext = os.path.splitext(urlparse(url).path)[1].lower()
+        name = digest.hexdigest() + ext
+        os.replace(part, os.path.join(self.root, name))
+        if os.path.exists(meta_path):
+            os.remove(meta_path)
+        self._store(url, name)
+        return os.path.join(self.root, name)
+
+
+def download_all(urls, cache, on_done):
+    """后台并发下载 {key: url}；全部结束后 on_done({key: path}, {key: 错误}) 在主线程被调用"""
+    executor = ThreadPoolExecutor(max_workers=WORKERS)
+    futures = {key: executor.submit(cache.fetch, url) for key, url in urls.items()}
+
+    def poll():
+        if not all(f.done() for f in futures.values()):
+            return POLL_INTERVAL
+        executor.shutdown(wait=False)
+        paths, errors = {}, {}
+        for key, f in futures.items():
+            if f.exception():
+                errors[key] = f.exception()
+            else:
+                paths[key] = f.result()
+        on_done(paths, errors)
+        return None
+
+    bpy.app.timers.register(poll, first_interval=POLL_INTERVAL)
+
+
+def already_imported(obj_url):
+    return any(o.get(SOURCE_PROP) == obj_url for o in bpy.data.objects)
+
+
+def view3d_override():
+    """计时器回调里 context.window 是 None；找一个 3D 视图给导入算子当上下文"""
+    windows = bpy.context.window_manager.windows
+    for window in windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                region = next((r for r in area.regions if r.type == 'WINDOW'), None)
+                return {"window": window, "screen": window.screen, "area": area, "region": region}
+    return {"window": windows[0]} if windows else {}
+
+
+def import_with_texture(obj_path, img_path, obj_url):
+    """主线程 (计时器回调)：导入 OBJ 并把贴图接到 Base Color 上"""
+    # 导入的物体按 bpy.data.objects 前后差集找，不依赖计时器里不可靠的 selected_objects
+    before = set(bpy.data.objects)
+    with bpy.context.temp_override(**view3d_override()):
+        if hasattr(bpy.ops.wm, "obj_import"):
+            bpy.ops.wm.obj_import(filepath=obj_path)
+        else:
+            bpy.ops.import_scene.obj(filepath=obj_path)
+
+    # 获取导入的对象
+    imported_objects = sorted(set(bpy.data.objects) - before, key=lambda o: o.name)
+    meshes = [o for o in imported_objects if o.type == 'MESH']
+    if not meshes:
+        print("No object imported.")
+        return
+    imported_obj = meshes[0]
+    for o in imported_objects:
+        o[SOURCE_PROP] = obj_url
 
-# 从剪切板读取JSON字符串
-json_str = bpy.context.window_manager.clipboard
-
-# 将JSON字符串解析为Python字典
-data = json.loads(json_str)
-
-# 提取图像和OBJ文件的URL
-output_img_url = data['data']['output_img']
-output_obj_url = data['data']['output_obj']
-
-# 获取Blender文件所在目录
-blender_file_path = bpy.data.filepath
-blender_dir = os.path.dirname(blender_file_path)
-
-# 下载图像文件
-img_response = requests.get(output_img_url)
-img_file_path = os.path.join(blender_dir, 'output_image.png')
-if img_response.status_code == 200:
-    with open(img_file_path, 'wb') as img_file:
-        img_file.write(img_response.content)
-    print("Image downloaded successfully.")
-else:
-    print(f"Failed to download image. Status code: {img_response.status_code}")
-
-# 下载OBJ文件
-obj_response = requests.get(output_obj_url)
-obj_file_path = os.path.join(blender_dir, 'output_model.obj')
-if obj_response.status_code == 200:
-    with open(obj_file_path, 'wb') as obj_file:
-        obj_file.write(obj_response.content)
-    print("OBJ file downloaded successfully.")
-else:
-    print(f"Failed to download OBJ file. Status code: {obj_response.status_code}")
-
-# 导入OBJ文件到Blender场景
-bpy.ops.import_scene.obj(filepath=obj_file_path)
-
-# 获取导入的对象
-imported_objects = bpy.context.selected_objects
-if imported_objects:
-    imported_obj = imported_objects[0]
-    
     # 创建新的材质
     mat = bpy.data.materials.new(name="ImportedMaterial")
     mat.use_nodes = True
     bsdf = mat.node_tree.nodes["Principled BSDF"]
-    
-    # 创建图像纹理节点
+
+    # 创建图像纹理节点 (同一张缓存图只加载一次)
     tex_image = mat.node_tree.nodes.new('ShaderNodeTexImage')
-    tex_image.image = bpy.data.images.load(img_file_path)
-    
+    tex_image.image = bpy.data.images.load(img_path, check_existing=True)
+
     # 连接图像纹理节点到BSDF Shader
     mat.node_tree.links.new(bsdf.inputs['Base Color'], tex_image.outputs['Color'])
-    
+
     # 将材质赋予导入的对象
     if imported_obj.data.materials:
         # 如果已经有材质槽位，替换材质
@@ -65,9 +198,137 @@ if imported_objects:
     else:
         # 如果没有材质槽位，添加一个
         imported_obj.data.materials.append(mat)
-    
+
     print("Material applied successfully.")
-else:
-    print("No object imported.")
 
-print("Script completed.")
+
+def import_from_clipboard():
+    # 从剪切板读取JSON字符串，提取图像和OBJ文件的URL
+    data = json.loads(bpy.context.window_manager.clipboard)
+    img_url = data['data']['output_img']
+    obj_url = data['data']['output_obj']
+
+    if already_imported(obj_url):
+        print(f"已导入过，跳过: {obj_url}")
+        return
+
+    cache = DownloadCache(default_cache_root())
+
+    def on_done(paths, errors):
+        for key, err in errors.items():
+            print(f"下载失败 {key}: {err}")
+        if errors:
+            return
+        import_with_texture(paths["obj"], paths["img"], obj_url)
+        print("Script completed.")
+
+    download_all({"img": img_url, "obj": obj_url}, cache, on_done)
+    print("后台下载中，完成后自动导入…")
+
+
+# -----------------------------------------------------------------------------
+#  本地 HTTP 测试服务器 + 自检
+# -----------------------------------------------------------------------------
+def serve_test_files(directory):
+    """在随机端口上起一个支持 Range/If-Range 的静态文件服务器，返回 (server, base_url)"""
+    from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.server.requests.append((self.path, self.headers.get("Range")))
+            path = os.path.join(directory, self.path.lstrip("/"))
+            if not os.path.isfile(path):
+                self.send_error(404)
+                return
+            with open(path, "rb") as f:
+                body = f.read()
+            etag = '"%s"' % hashlib.md5(body).hexdigest()
+            start = 0
+            range_header = self.headers.get("Range")
+            if range_header and self.headers.get("If-Range", etag) == etag:
+                start = int(range_header.split("=")[1].split("-")[0])
+                if start >= len(body):
+                    self.send_response(416)
+                    self.send_header("Content-Range", f"bytes */{len(body)}")
+                    self.end_headers()
+                    return
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{len(body) - 1}/{len(body)}")
+            else:
+                self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body) - start))
+            self.end_headers()
+            self.wfile.write(body[start:])
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.requests = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def self_test():
+    """并发下载、内容寻址、缓存命中、断点续传 (含 .part 已完整的情况)"""
+    work = tempfile.mkdtemp(prefix="import_pipeline_")
+    site = os.path.join(work, "site")
+    os.makedirs(site)
+    files = {
+        "model.obj": ("v 0 0 0\nv 1 0 0\nv 0 1 0\nvt 0 0\nvt 1 0\nvt 0 1\nf 1/1 2/2 3/3\n" * 2000).encode(),
+        "image.png": os.urandom(300_000),
+    }
+    for name, body in files.items():
+        with open(os.path.join(site, name), "wb") as f:
+            f.write(body)
+
+    server, base = serve_test_files(site)
+    errors = []
+    try:
+        cache = DownloadCache(os.path.join(work, "cache"))
+        urls = {name: f"{base}/{name}" for name in files}
+        with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+            paths = dict(zip(urls, pool.map(cache.fetch, urls.values())))
+        for name, path in paths.items():
+            expected = hashlib.sha256(files[name]).hexdigest()
+            if not os.path.basename(path).startswith(expected):
+                errors.append(f"{name} 不是按内容哈希命名")
+            with open(path, "rb") as f:
+                if f.read() != files[name]:
+                    errors.append(f"{name} 内容不一致")
+
+        count = len(server.requests)
+        reopened = DownloadCache(cache.root)
+        for url in urls.values():
+            reopened.fetch(url)
+        if len(server.requests) != count:
+            errors.append("已缓存的 URL 又发了请求")
+
+        # 续传：只留前一半在 .part 里
+        for name, cut in (("image.png", len(files["image.png"]) // 2), ("model.obj", len(files["model.obj"]))):
+            resume_cache = DownloadCache(os.path.join(work, "resume_" + name))
+            url = urls[name]
+            part = os.path.join(resume_cache.root, hashlib.sha256(url.encode()).hexdigest()[:32] + ".part")
+            with open(part, "wb") as f:
+                f.write(files[name][:cut])
+            path = resume_cache.fetch(url)
+            with open(path, "rb") as f:
+                if f.read() != files[name]:
+                    errors.append(f"{name} 续传后内容不一致")
+            if server.requests[-1] != (f"/{name}", f"bytes={cut}-"):
+                errors.append(f"{name} 没有发 Range 请求")
+    finally:
+        server.shutdown()
+
+    print(f"导入管线自检: {'通过' if not errors else '失败'} ({work})")
+    for e in errors:
+        print("  ✗", e)
+    return not errors
+
+
+if __name__ == "__main__":
+    if SELF_TEST:
+        self_test()
+    else:
+        import_from_clipboard()
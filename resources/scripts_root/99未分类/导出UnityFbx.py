@@ -2,13 +2,20 @@
 import bpy
 import os
 from bpy.props import EnumProperty, BoolProperty
-from mathutils import Vector
 import subprocess
+import runpy
+
+
+# 共享工具 (导出预设、导出清单、材质节点索引等) 统一由 99未分类/共享加载.py 取出或安装
+load_shared = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", "")))),
+                                          "99未分类", "共享加载.py"))["load_shared"]
+
 
 class WM_OT_export_fbx_dialog(bpy.types.Operator):
     bl_idname = "wm.export_fbx_dialog"
     bl_label = "导出 FBX 配置"
-    bl_options = {'REGISTER', 'UNDO'}
+    # 变换只在导出期间临时改动并恢复，不需要撤销步 (大场景的撤销快照很贵)
+    bl_options = {'REGISTER'}
 
     export_mode: EnumProperty(
         name="导出模式",
@@ -35,6 +42,11 @@ class WM_OT_export_fbx_dialog(bpy.types.Operator):
         description="导出完成后自动打开目标文件夹",
         default=True
     )
+    incremental: BoolProperty(
+        name="仅导出变化",
+        description="内容 (网格/修改器/材质/变换/动画/导出参数) 与上次相同且文件还在时跳过，见 99未分类/导出清单.py",
+        default=True
+    )
     zero_rotation: BoolProperty(
         name="旋转归零",
         description="导出前将物体的旋转归零，导出后再恢复",
@@ -46,6 +58,12 @@ class WM_OT_export_fbx_dialog(bpy.types.Operator):
         default=False
     )
 
+    validate: BoolProperty(
+        name="导出前检查",
+        description="先检查缩放/贴图/零面积面/修改器/NLA 等问题，有错误时不导出，见 99未分类/导出检查.py",
+        default=True
+    )
+
     def invoke(self, context, event):
         return context.window_manager.invoke_props_dialog(self)
 
@@ -75,168 +93,146 @@ class WM_OT_export_fbx_dialog(bpy.types.Operator):
         if self.export_mode == 'HIERARCHY':
             roots_names = [o.name for o in context.selected_objects if o.parent is None or o.parent.name not in orig_selected_names]
 
-        # 4. 位置归零备份（只记录 name 对应位置）
-        loc_backup = {}
-        rot_backup = {}
-        scale_backup = {}
-        if self.zero_location or self.zero_rotation or self.zero_scale:
+        # 导出前检查：有 ERROR 级问题时直接取消，警告写进控制台
+        if self.validate:
+            validator = load_shared("export_validator", "99未分类/导出检查.py")
+            targets = list(coll.objects) if coll else list(context.selected_objects)
+            issues = validator.validate(targets)
+            validator.print_report(issues)
+            if not validator.passes(issues):
+                for issue in issues:
+                    if issue.severity == 'ERROR':
+                        self.report({'ERROR'}, f"{issue.target} {issue.message}".strip())
+                return {'CANCELLED'}
+
+        # 4. 归零：先一次性算好所有临时变换，导出期间生效，离开 with 时 (含异常) 逐值恢复
+        if self.export_mode == 'OBJECT':
+            stage_objs = [bpy.data.objects.get(n) for n in orig_selected_names]
+            center = None
+        elif self.export_mode == 'COLLECTION':
+            stage_objs = [bpy.data.objects.get(n) for n in coll_objs_names]
+            center = load_shared("export_staging", "99未分类/导出暂存.py").center_of(o for o in stage_objs if o)
+        else:  # HIERARCHY
+            stage_objs = [bpy.data.objects.get(n) for n in roots_names]
+            center = None
+        staging = load_shared("export_staging", "99未分类/导出暂存.py").staged(
+            stage_objs,
+            zero_location=self.zero_location,
+            zero_rotation=self.zero_rotation,
+            zero_scale=self.zero_scale,
+            center=center,
+            view_layer=context.view_layer,
+        )
+
+        with staging:
+            # 5. 清空场景选择
+            bpy.ops.object.select_all(action='DESELECT')
+
+            # 6. 导出参数
+            # 标准 FBX 的参数来自共享预设 fbx_basic (只导出选中、应用单位缩放、复制贴图)
+            fbx_kwargs = load_shared("export_presets", "99未分类/导出预设.py").settings("fbx_basic")
+            fbx_kwargs["use_mesh_modifiers"] = self.apply_modifiers
+            unity_kwargs = {
+                "check_existing": False,
+                "filter_glob": "*.fbx",
+                "active_collection": False,
+                "selected_objects": True,
+                "deform_bones": False,
+                "leaf_bones": False,
+                "primary_bone_axis": 'Y',
+                "secondary_bone_axis": 'X',
+                "tangent_space": False,
+                "triangulate_faces": False,
+            }
+
+            def export_both(fp):
+                """导出标准 FBX 和 Unity FBX"""
+                # 1) 标准 FBX
+                try:
+                    result = bpy.ops.export_scene.fbx(filepath=fp, **fbx_kwargs)
+                    if 'FINISHED' not in result:
+                        self.report({'WARNING'}, f"标准 FBX 导出警告（返回 {result}）")
+                except Exception as e:
+                    self.report({'ERROR'}, f"标准 FBX 导出异常: {e}")
+    
+                # 2) Unity FBX
+                try:
+                    unity_kwargs["filepath"] = fp
+                    unity_result = bpy.ops.export_scene.unity_fbx(**unity_kwargs)
+                    if 'FINISHED' not in unity_result:
+                        self.report({'WARNING'}, f"Unity FBX 导出警告（返回 {unity_result}）")
+                except Exception as e:
+                    self.report({'ERROR'}, f"Unity FBX 导出异常: {e}")
+
+
+            # 增量导出：指纹在归零之后、导出之前对当前选中的物体计算，正好是要写进文件的状态
+            manifest = load_shared("export_manifest", "99未分类/导出清单.py").load(target_folder) if self.incremental else None
+            preset = {"fbx": fbx_kwargs, "unity": dict(unity_kwargs), "apply_modifiers": self.apply_modifiers}
+
+            def export_changed(key, fp):
+                """有变化才导出；返回是否真的导出了"""
+                if manifest:
+                    fingerprint = load_shared("export_manifest", "99未分类/导出清单.py").fingerprint(context.selected_objects, preset)
+                    if manifest.is_current(key, fingerprint, fp):
+                        return False
+                export_both(fp)
+                if manifest:
+                    manifest.record(key, fingerprint, fp)
+                return True
+
+            # 7. 按模式循环导出
             if self.export_mode == 'OBJECT':
                 for name in orig_selected_names:
                     o = bpy.data.objects.get(name)
-                    if o:
-                        if self.zero_location:
-                            loc_backup[name] = o.location.copy()
-                            o.location = Vector((0, 0, 0))
-                        if self.zero_rotation:
-                            rot_backup[name] = o.rotation_euler.copy()
-                            o.rotation_euler = Vector((0, 0, 0))
-                        if self.zero_scale:
-                            scale_backup[name] = o.scale.copy()
-                            o.scale = Vector((1, 1, 1))
-
-            elif self.export_mode == 'COLLECTION':
-                # 计算集合中心
-                vecs = []
+                    if not o:
+                        continue
+                    o.select_set(True)
+                    fp = os.path.join(target_folder, f"{name}.fbx")
+                    if export_changed(name, fp):
+                        self.report({'INFO'}, f"已导出 物体: {name}")
+                    o.select_set(False)
+
+            elif self.export_mode == 'COLLECTION' and coll:
                 for name in coll_objs_names:
                     o = bpy.data.objects.get(name)
                     if o:
-                        vecs.append(o.matrix_world.translation)
-                if vecs:
-                    cen = sum(vecs, Vector()) / len(vecs)
-                    for name in coll_objs_names:
-                        o = bpy.data.objects.get(name)
-                        if o:
-                            if self.zero_location:
-                                loc_backup[name] = o.location.copy()
-                                world_off = o.matrix_world.translation - cen
-                                if o.parent:
-                                    o.location = o.parent.matrix_world.inverted() @ world_off
-                                else:
-                                    o.location = world_off
-                            if self.zero_rotation:
-                                rot_backup[name] = o.rotation_euler.copy()
-                                o.rotation_euler = Vector((0, 0, 0))
-                            if self.zero_scale:
-                                scale_backup[name] = o.scale.copy()
-                                o.scale = Vector((1, 1, 1))
-
-            else:  # HIERARCHY
-                for name in roots_names:
+                        o.select_set(True)
+                fp = os.path.join(target_folder, f"{coll.name}.fbx")
+                if export_changed(coll.name, fp):
+                    self.report({'INFO'}, f"已导出 集合: {coll.name}")
+                for name in coll_objs_names:
                     o = bpy.data.objects.get(name)
                     if o:
-                        if self.zero_location:
-                            loc_backup[name] = o.location.copy()
-                            o.location = Vector((0, 0, 0))
-                        if self.zero_rotation:
-                            rot_backup[name] = o.rotation_euler.copy()
-                            o.rotation_euler = Vector((0, 0, 0))
-                        if self.zero_scale:
-                            scale_backup[name] = o.scale.copy()
-                            o.scale = Vector((1, 1, 1))
-
-        # 5. 清空场景选择
-        bpy.ops.object.select_all(action='DESELECT')
-
-        # 6. 导出参数
-        fbx_kwargs = {
-            "use_selection": True,
-            "apply_unit_scale": True,
-            "use_mesh_modifiers": self.apply_modifiers,
-            "path_mode": 'COPY',
-        }
-        unity_kwargs = {
-            "check_existing": False,
-            "filter_glob": "*.fbx",
-            "active_collection": False,
-            "selected_objects": True,
-            "deform_bones": False,
-            "leaf_bones": False,
-            "primary_bone_axis": 'Y',
-            "secondary_bone_axis": 'X',
-            "tangent_space": False,
-            "triangulate_faces": False,
-        }
-
-        def export_both(fp):
-            """导出标准 FBX 和 Unity FBX"""
-            # 1) 标准 FBX
-            try:
-                result = bpy.ops.export_scene.fbx(filepath=fp, **fbx_kwargs)
-                if 'FINISHED' not in result:
-                    self.report({'WARNING'}, f"标准 FBX 导出警告（返回 {result}）")
-            except Exception as e:
-                self.report({'ERROR'}, f"标准 FBX 导出异常: {e}")
-    
-            # 2) Unity FBX
-            try:
-                unity_kwargs["filepath"] = fp
-                unity_result = bpy.ops.export_scene.unity_fbx(**unity_kwargs)
-                if 'FINISHED' not in unity_result:
-                    self.report({'WARNING'}, f"Unity FBX 导出警告（返回 {unity_result}）")
-            except Exception as e:
-                self.report({'ERROR'}, f"Unity FBX 导出异常: {e}")
-
-
-        # 7. 按模式循环导出
-        if self.export_mode == 'OBJECT':
-            for name in orig_selected_names:
-                o = bpy.data.objects.get(name)
-                if not o:
-                    continue
-                o.select_set(True)
-                fp = os.path.join(target_folder, f"{name}.fbx")
-                export_both(fp)
-                self.report({'INFO'}, f"已导出 物体: {name}")
-                o.select_set(False)
+                        o.select_set(False)
 
-        elif self.export_mode == 'COLLECTION' and coll:
-            for name in coll_objs_names:
-                o = bpy.data.objects.get(name)
-                if o:
+            else:  # HIERARCHY
+                def select_tree(o):
                     o.select_set(True)
-            fp = os.path.join(target_folder, f"{coll.name}.fbx")
-            export_both(fp)
-            self.report({'INFO'}, f"已导出 集合: {coll.name}")
-            for name in coll_objs_names:
-                o = bpy.data.objects.get(name)
-                if o:
-                    o.select_set(False)
+                    for c in o.children:
+                        if c.name in orig_selected_names:
+                            select_tree(c)
 
-        else:  # HIERARCHY
-            def select_tree(o):
-                o.select_set(True)
-                for c in o.children:
-                    if c.name in orig_selected_names:
-                        select_tree(c)
-
-            for name in roots_names:
-                root = bpy.data.objects.get(name)
-                if not root:
-                    continue
-                select_tree(root)
-                fp = os.path.join(target_folder, f"{name}.fbx")
-                export_both(fp)
-                self.report({'INFO'}, f"已导出 层级: {name}")
-                bpy.ops.object.select_all(action='DESELECT')
+                for name in roots_names:
+                    root = bpy.data.objects.get(name)
+                    if not root:
+                        continue
+                    select_tree(root)
+                    fp = os.path.join(target_folder, f"{name}.fbx")
+                    if export_changed(name, fp):
+                        self.report({'INFO'}, f"已导出 层级: {name}")
+                    bpy.ops.object.select_all(action='DESELECT')
 
-        # 8. 恢复原选中和位置
+        # 8. 恢复原选中 (变换已由暂存恢复)
         for name in orig_selected_names:
             o = bpy.data.objects.get(name)
             if o:
                 o.select_set(True)
-        for name, loc in loc_backup.items():
-            o = bpy.data.objects.get(name)
-            if o:
-                o.location = loc
-        for name, rot in rot_backup.items():
-            o = bpy.data.objects.get(name)
-            if o:
-                o.rotation_euler = rot
-        for name, scale in scale_backup.items():
-            o = bpy.data.objects.get(name)
-            if o:
-                o.scale = scale
 
+        if manifest:
+            manifest.save()
+            print(manifest.summary())
+            self.report({'INFO'}, f"跳过未变化 {len(manifest.skipped)} 个: {', '.join(manifest.skipped)}"
+                        if manifest.skipped else "没有可跳过的资产")
         self.report({'INFO'}, "全部导出完成")
 
         # 打开文件夹
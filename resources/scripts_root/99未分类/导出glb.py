@@ -1,6 +1,23 @@
 # script_id: 506068f3-4e4c-470f-b090-b375addeb5c7
 import bpy
 import os
+import runpy
+
+# 导出参数取自 99未分类/导出预设.json 里的这个预设
+PRESET = "glb_simple"
+# 只导出内容有变化的物体 (见 99未分类/导出清单.py)
+INCREMENTAL = True
+# 导出前先跑一遍检查 (见 99未分类/导出检查.py)，有 ERROR 级问题时不导出
+VALIDATE = True
+# 能和插件结果一致时 (全是网格、材质不用贴图、没有形态键) 不走 glTF 插件，直接写 GLB，
+# 修改器是否应用跟随预设的 export_apply (见 99未分类/GLB直写.py)；其余情况和 False 时都按 PRESET 导出
+DIRECT_WRITER = True
+
+
+# 共享工具 (导出预设、导出清单、材质节点索引等) 统一由 99未分类/共享加载.py 取出或安装
+load_shared = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", "")))),
+                                          "99未分类", "共享加载.py"))["load_shared"]
+
 
 # 获取当前Blender文件的路径
 blend_file_path = bpy.data.filepath
@@ -17,9 +34,25 @@ if not os.path.exists(target_path):
 # 获取当前选择的物体
 selected_objects = bpy.context.selected_objects
 
+# 导出前检查；这里不强制要求 .blend 已保存 (导出到 .blend 旁的目录，未保存时就是当前目录)
+if VALIDATE:
+    validator = load_shared("export_validator", "99未分类/导出检查.py")
+    issues = validator.validate(selected_objects, require_saved=False)
+    validator.print_report(issues)
+    if not validator.passes(issues):
+        raise RuntimeError("导出检查未通过，详见控制台")
+
 # 暂时取消所有物体的选择
 bpy.ops.object.select_all(action='DESELECT')
 
+preset_kwargs = load_shared("export_presets", "99未分类/导出预设.py").settings(PRESET)
+apply_modifiers = preset_kwargs.get("export_apply", False)
+direct_kwargs = {"writer": "direct", "export_apply": apply_modifiers}
+writer = load_shared("glb_writer", "99未分类/GLB直写.py") if DIRECT_WRITER else None
+depsgraph = bpy.context.evaluated_depsgraph_get()
+tools = load_shared("export_manifest", "99未分类/导出清单.py") if INCREMENTAL else None
+manifest = tools.load(target_path) if tools else None
+
 # 逐一导出物体
 for obj in selected_objects:
     # 只选择当前迭代的物体
@@ -28,20 +61,36 @@ for obj in selected_objects:
     # 定义导出文件的名称和路径
     export_file_name = f"{obj.name}.glb"
     custom_path = os.path.join(target_path, export_file_name)
-    
+
+    # 结果能和插件一致的物体才直写，其余按预设导出
+    direct = bool(writer) and not writer.direct_write_blockers([obj])
+    export_kwargs = direct_kwargs if direct else preset_kwargs
+
+    # 内容没变且文件还在：跳过
+    if manifest:
+        fp = tools.fingerprint([obj], export_kwargs)
+        if manifest.is_current(obj.name, fp, custom_path):
+            obj.select_set(False)
+            continue
+
     # 导出为.glb格式
-    bpy.ops.export_scene.gltf(
-        filepath=custom_path,
-        export_format='GLB',
-        use_selection=True
-    )
-    
+    if direct:
+        writer.write_glb([obj], custom_path, depsgraph, apply_modifiers=apply_modifiers)
+    else:
+        load_shared("export_presets", "99未分类/导出预设.py").export(PRESET, filepath=custom_path)
+    if manifest:
+        manifest.record(obj.name, fp, custom_path)
+
     # 控制台打印导出信息
     print(f"Exported {obj.name} to {custom_path}")
     
     # 取消当前物体的选择，为选择下一个物体做准备
     obj.select_set(False)
 
+if manifest:
+    manifest.save()
+    print(manifest.summary())
+
 # 重新选择原本选中的物体
 for obj in selected_objects:
     obj.select_set(True)
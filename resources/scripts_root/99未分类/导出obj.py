@@ -1,6 +1,16 @@
 # script_id: 3ec3a17a-fcd9-43c8-b0a9-2eb092d8542d
 import bpy
 import os
+import runpy
+
+# 不逐个调用 wm.obj_export，直接批量写 OBJ/MTL (见 99未分类/OBJ直写.py)；False 时用导出器
+DIRECT_WRITER = True
+
+
+# 共享工具 (导出预设、导出清单、材质节点索引等) 统一由 99未分类/共享加载.py 取出或安装
+load_shared = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", "")))),
+                                          "99未分类", "共享加载.py"))["load_shared"]
+
 
 # 获取当前Blender文件的路径
 # blend_file_path = bpy.data.filepath
@@ -18,34 +28,35 @@ if not os.path.exists(target_path):
 # 获取当前选择的物体
 selected_objects = bpy.context.selected_objects
 
-# 暂时取消所有物体的选择
-bpy.ops.object.select_all(action='DESELECT')
-
-# 逐一导出物体
-for obj in selected_objects:
-    # 只选择当前迭代的物体
-    obj.select_set(True)
-    
-    # 定义导出文件的名称和路径
-    export_file_name = f"{obj.name}.obj"
-    custom_path = os.path.join(target_path, export_file_name)
-    
-    # 导出为.obj格式
-    bpy.ops.wm.obj_export(
-        filepath=custom_path,
-        export_selected_objects = True
-    )
-    
-    # 控制台打印导出信息
-    print(f"Exported {obj.name} to {custom_path}")
-    
-    # 取消当前物体的选择，为选择下一个物体做准备
-    obj.select_set(False)
-
-# 重新选择原本选中的物体
-for obj in selected_objects:
-    obj.select_set(True)
-
-print("Exporting selected objects to obj format complete.")
+if DIRECT_WRITER:
+    # 一遍写出所有物体，不动选择
+    for path in load_shared("obj_writer", "99未分类/OBJ直写.py").write_obj(selected_objects, directory=target_path):
+        print(f"Exported {path}")
+    print("Exporting selected objects to obj format complete.")
+else:
+    # 暂时取消所有物体的选择
+    bpy.ops.object.select_all(action='DESELECT')
+
+    # 逐一导出物体
+    for obj in selected_objects:
+        # 只选择当前迭代的物体
+        obj.select_set(True)
+
+        # 定义导出文件的名称和路径
+        export_file_name = f"{obj.name}.obj"
+        custom_path = os.path.join(target_path, export_file_name)
+
+        # 导出为.obj格式
+        load_shared("export_presets", "99未分类/导出预设.py").export("obj_basic", filepath=custom_path)
+
+        # 控制台打印导出信息
+        print(f"Exported {obj.name} to {custom_path}")
+
+        # 取消当前物体的选择，为选择下一个物体做准备
+        obj.select_set(False)
 
+    # 重新选择原本选中的物体
+    for obj in selected_objects:
+        obj.select_set(True)
 
+    print("Exporting selected objects to obj format complete.")
@@ -2,6 +2,16 @@
 # -*- coding: utf-8 -*-
 import bpy
 import os
+import runpy
+
+# 不调用 wm.obj_export，直接写 OBJ/MTL (见 99未分类/OBJ直写.py)；False 时用导出器
+DIRECT_WRITER = True
+
+
+# 共享工具 (导出预设、导出清单、材质节点索引等) 统一由 99未分类/共享加载.py 取出或安装
+load_shared = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", "")))),
+                                          "99未分类", "共享加载.py"))["load_shared"]
+
 
 # --- 1. 设置导出路径 ---
 # 你可以直接在这里指定一个绝对路径
@@ -43,11 +53,11 @@ else:
     # 确保所有目标物体都处于选中状态 (实际上我们不需要改变选择状态)
     # bpy.ops.wm.obj_export 函数会处理好 'export_selected_objects'
     
-    bpy.ops.wm.obj_export(
-        filepath=export_filepath,
-        # 这个参数是关键，它告诉Blender只导出当前选中的物体
-        export_selected_objects=True  
-    )
+    if DIRECT_WRITER:
+        load_shared("obj_writer", "99未分类/OBJ直写.py").write_obj(selected_objects, combined_path=export_filepath)
+    else:
+        # 预设 obj_basic 带 export_selected_objects=True，只导出当前选中的物体
+        load_shared("export_presets", "99未分类/导出预设.py").export("obj_basic", filepath=export_filepath)
     
     print("\n" + "="*50)
     print("✅ 导出完成！")
@@ -0,0 +1,117 @@
+# script_id: 5aef28d1-02df-4529-802a-5747b148ec99
+# -*- coding: utf-8 -*-
+# =============================================================================
+#  导出暂存 (Export Staging)
+#  导出前把物体临时归零 (位置/旋转/缩放) 或整体平移到原点，导出后恢复。
+#  - 先一次性算出所有物体的临时变换，再一轮写入，最后只 update 一次视图层
+#  - 备份的是原始通道 (location / 当前旋转模式的旋转 / scale)，恢复是逐值还原，
+#    不会把 370° 变成 10°，四元数/轴角物体也一样
+#  - 放在 with 里，导出抛异常也保证恢复
+#  FBX / GLB / OBJ 导出脚本共用。
+#
+#  其他脚本的用法 (运行过本脚本后，或由它们自动加载)：
+#      staging = bpy.app.driver_namespace["export_staging"]
+#      with staging.staged(objs, zero_location=True, zero_rotation=True):
+#          bpy.ops.export_scene.fbx(...)
+#      # 集合模式：集合里的根物体整体平移到中心
+#      with staging.staged(objs, center=staging.center_of(objs)):
+#          ...
+# =============================================================================
+
+import bpy
+from contextlib import contextmanager
+from mathutils import Matrix, Quaternion, Vector
+
+STAGING_KEY = "export_staging"
+
+
+def center_of(objects):
+    """物体世界位置的平均值"""
+    objects = list(objects)
+    if not objects:
+        return Vector()
+    return sum((o.matrix_world.translation for o in objects), Vector()) / len(objects)
+
+
+def _backup(obj):
+    return (obj.location.copy(), obj.rotation_mode, obj.rotation_euler.copy(),
+            obj.rotation_quaternion.copy(), tuple(obj.rotation_axis_angle), obj.scale.copy())
+
+
+def _restore(obj, saved):
+    location, mode, euler, quat, axis_angle, scale = saved
+    obj.rotation_mode = mode
+    obj.location = location
+    obj.rotation_euler = euler
+    obj.rotation_quaternion = quat
+    obj.rotation_axis_angle = axis_angle
+    obj.scale = scale
+
+
+def plan(objects, zero_location=True, zero_rotation=True, zero_scale=False, center=None):
+    """
+    返回 [(obj, 临时 matrix_basis)]，只读不写。
+    center 为 None：每个物体自己的局部变换按开关归零 (子物体随父级走)。
+    center 给定：objects 里的根物体 (父级不在 objects 中) 世界位置平移 -center，
+                 子物体保留局部位置跟随父级，旋转/缩放仍按开关归零。
+    """
+    staged = set(objects)
+    targets = []
+    for obj in objects:
+        loc, rot, scale = obj.matrix_basis.decompose()
+        if zero_location:
+            if center is None:
+                loc = Vector()
+            elif obj.parent not in staged:
+                world = obj.matrix_world.translation - center
+                if obj.parent:
+                    world = (obj.parent.matrix_world @ obj.matrix_parent_inverse).inverted() @ world
+                loc = world
+        if zero_rotation:
+            rot = Quaternion()
+        if zero_scale:
+            scale = Vector((1.0, 1.0, 1.0))
+        basis = Matrix.Translation(loc) @ rot.to_matrix().to_4x4() @ Matrix.Diagonal(scale.to_4d())
+        targets.append((obj, basis))
+    return targets
+
+
+@contextmanager
+def staged(objects, zero_location=True, zero_rotation=True, zero_scale=False, center=None, view_layer=None):
+    """with 块内物体处于归零状态；离开时 (包括异常) 逐值恢复"""
+    objects = [o for o in objects if o is not None]
+    view_layer = view_layer or bpy.context.view_layer
+    if not (zero_location or zero_rotation or zero_scale) or not objects:
+        yield []
+        return
+
+    targets = plan(objects, zero_location, zero_rotation, zero_scale, center)
+    backups = [(obj, _backup(obj)) for obj, _ in targets]
+    try:
+        for obj, basis in targets:
+            obj.matrix_basis = basis
+        view_layer.update()
+        yield targets
+    finally:
+        for obj, saved in backups:
+            _restore(obj, saved)
+        view_layer.update()
+
+
+class ExportStaging:
+    """放进 driver_namespace 的入口"""
+    center_of = staticmethod(center_of)
+    plan = staticmethod(plan)
+    staged = staticmethod(staged)
+
+
+def install():
+    staging = ExportStaging()
+    bpy.app.driver_namespace[STAGING_KEY] = staging
+    return staging
+
+
+install()
+
+if __name__ == "__main__":
+    print("导出暂存工具已就绪")
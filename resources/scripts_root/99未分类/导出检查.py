@@ -0,0 +1,238 @@
+# script_id: 7230f235-fa92-44fc-b855-7903670bdbc8
+# -*- coding: utf-8 -*-
+# =============================================================================
+#  导出前检查 (Export Validator)
+#  导出前对选中的物体一次性跑完所有检查，把问题汇总成一张表，而不是导出到一半才报错：
+#  - 场景: .blend 未保存
+#  - 物体: 负缩放 (应用/导出后面会反向，见 1临时/应用缩放防反面.py)、非等比/未应用缩放、
+#          未应用的修改器、NLA 状态 (编辑中的片段、独奏/静音轨道、未下推的动作)
+#  - 网格: 零面积面
+#  - 材质: 贴图文件丢失、未打包且用绝对路径的贴图
+#  每项检查的结果按 (检查, 数据块) 缓存；depsgraph 回调在数据块被改时给它的计数加一，
+#  计数没变就直接用缓存，所以场景没动时重复检查几乎不花时间。
+#  (Python 拿不到 Blender 内部的 ID 更新计数，这里的计数由回调自己维护。)
+#
+#  其他脚本的用法 (运行过本脚本后，或由它们自动加载)：
+#      validator = bpy.app.driver_namespace["export_validator"]
+#      issues = validator.validate(objects)
+#      if not validator.passes(issues): ...   # 有 ERROR 级问题
+# =============================================================================
+
+import bpy
+import os
+import runpy
+from collections import namedtuple
+from bpy.app.handlers import persistent
+
+import numpy as np
+
+VALIDATOR_KEY = "export_validator"
+ZERO_AREA = 1e-12
+SCALE_TOLERANCE = 1e-4
+
+Issue = namedtuple("Issue", "severity check target message")
+
+
+# 共享工具 (导出预设、导出清单、材质节点索引等) 统一由 99未分类/共享加载.py 取出或安装
+load_shared = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", "")))),
+                                          "99未分类", "共享加载.py"))["load_shared"]
+
+
+# -----------------------------------------------------------------------------
+#  各项检查：输入一个数据块，返回 [Issue]；结果只依赖这个数据块本身，所以可以缓存
+# -----------------------------------------------------------------------------
+def check_scale(obj):
+    issues = []
+    scale = np.array(obj.scale)
+    if np.linalg.det(np.array(obj.matrix_world)[:3, :3]) < 0:
+        issues.append(Issue('WARNING', "negative_scale", obj.name,
+                            "负缩放：应用缩放或导出后面会反向 (可用 1临时/应用缩放防反面.py 处理)"))
+    if np.ptp(np.abs(scale)) > SCALE_TOLERANCE:
+        issues.append(Issue('WARNING', "nonuniform_scale", obj.name,
+                            "非等比缩放 (%.3f, %.3f, %.3f)" % tuple(scale)))
+    elif np.abs(np.abs(scale) - 1.0).max() > SCALE_TOLERANCE:
+        issues.append(Issue('WARNING', "unapplied_scale", obj.name, "缩放未应用 (%.3f)" % scale[0]))
+    return issues
+
+
+def check_modifiers(obj):
+    names = [m.name for m in obj.modifiers if m.show_viewport or m.show_render]
+    if not names:
+        return []
+    return [Issue('INFO', "unapplied_modifiers", obj.name, f"未应用的修改器: {', '.join(names)}")]
+
+
+def check_nla(obj):
+    ad = obj.animation_data
+    if ad is None:
+        return []
+    issues = []
+    if ad.use_tweak_mode:
+        issues.append(Issue('ERROR', "nla_tweak", obj.name, "NLA 片段正在编辑 (Tab 退出后再导出)"))
+    solo = [t.name for t in ad.nla_tracks if t.is_solo]
+    if solo:
+        issues.append(Issue('WARNING', "nla_solo", obj.name, f"NLA 独奏轨道: {', '.join(solo)}"))
+    muted = [t.name for t in ad.nla_tracks if t.mute]
+    if muted:
+        issues.append(Issue('WARNING', "nla_muted", obj.name, f"NLA 静音轨道不会导出: {', '.join(muted)}"))
+    if ad.action and len(ad.nla_tracks) and not ad.use_tweak_mode:
+        issues.append(Issue('WARNING', "nla_action_not_pushed", obj.name,
+                            f"动作 {ad.action.name} 未下推到 NLA，按轨道导出时会多出一段"))
+    return issues
+
+
+def check_mesh(mesh):
+    n = len(mesh.polygons)
+    if not n:
+        return []
+    area = np.empty(n, dtype=np.float32)
+    mesh.polygons.foreach_get("area", area)
+    zero = int(np.count_nonzero(area <= ZERO_AREA))
+    if not zero:
+        return []
+    return [Issue('WARNING', "zero_area_faces", mesh.name, f"{zero} 个零面积面")]
+
+
+def material_images(mat):
+    """材质 (顶层节点树) 用到的图像名；结构来自共享的材质节点索引"""
+    graph = load_shared("material_graph_index", "5材质贴图/材质节点索引.py").get(mat)
+    if graph is None:
+        return []
+    return [n.image.name_full for n in graph.nodes_of_type('TEX_IMAGE') if n.image]
+
+
+def check_image(image):
+    """贴图文件状态：每次都 stat 一下 (便宜)，不进缓存，文件在磁盘上被删掉也能发现"""
+    if image.source not in {'FILE', 'SEQUENCE', 'TILED'} or image.packed_file:
+        return []
+    path = bpy.path.abspath(image.filepath, library=image.library)
+    if image.source == 'FILE' and not os.path.exists(path):
+        return [Issue('ERROR', "missing_image", image.name, f"贴图文件不存在: {path}")]
+    if not image.filepath.startswith("//"):
+        return [Issue('WARNING', "absolute_image_path", image.name, f"未打包且是绝对路径: {image.filepath}")]
+    return []
+
+
+OBJECT_CHECKS = (check_scale, check_modifiers, check_nla)
+
+
+# -----------------------------------------------------------------------------
+#  引擎
+# -----------------------------------------------------------------------------
+class ExportValidator:
+    def __init__(self):
+        self.counters = {}     # session_uid -> 回调记下的修改次数
+        self.cache = {}        # (检查名, session_uid) -> (计数, 结果)
+        self.stats = {"hit": 0, "run": 0}
+
+    def touch(self, id_data):
+        uid = id_data.session_uid
+        self.counters[uid] = self.counters.get(uid, 0) + 1
+
+    def forget(self, check):
+        self.cache = {k: v for k, v in self.cache.items() if k[0] != check.__name__}
+
+    def cached(self, check, id_data):
+        key = (check.__name__, id_data.session_uid)
+        stamp = self.counters.get(id_data.session_uid, 0)
+        entry = self.cache.get(key)
+        if entry is not None and entry[0] == stamp:
+            self.stats["hit"] += 1
+            return entry[1]
+        self.stats["run"] += 1
+        result = check(id_data)
+        self.cache[key] = (stamp, result)
+        return result
+
+    def validate(self, objects, require_saved=True):
+        """对 objects 跑一遍全部检查，返回 [Issue] (ERROR 在前)"""
+        issues = []
+        if require_saved and not bpy.data.is_saved:
+            issues.append(Issue('ERROR', "unsaved", "", ".blend 文件未保存"))
+
+        meshes, materials = {}, {}
+        for obj in objects:
+            for check in OBJECT_CHECKS:
+                issues.extend(self.cached(check, obj))
+            if obj.type == 'MESH' and obj.data:
+                meshes[obj.data.session_uid] = obj.data
+            for slot in obj.material_slots:
+                if slot.material:
+                    materials[slot.material.session_uid] = slot.material
+
+        images = {}
+        for mesh in meshes.values():
+            issues.extend(self.cached(check_mesh, mesh))
+        for mat in materials.values():
+            for name in self.cached(material_images, mat):
+                image = bpy.data.images.get(name)
+                if image:
+                    images[image.session_uid] = image
+        for image in images.values():
+            issues.extend(check_image(image))
+
+        order = {'ERROR': 0, 'WARNING': 1, 'INFO': 2}
+        return sorted(issues, key=lambda i: order[i.severity])
+
+    @staticmethod
+    def passes(issues):
+        return not any(i.severity == 'ERROR' for i in issues)
+
+    @staticmethod
+    def print_report(issues):
+        if not issues:
+            print("导出检查: 没有问题")
+            return
+        print(f"导出检查: {len(issues)} 个问题")
+        for i in issues:
+            target = f"[{i.target}] " if i.target else ""
+            print(f"  {i.severity:<7} {target}{i.message}")
+
+
+@persistent
+def _on_depsgraph_update_export_validator(scene, depsgraph):
+    validator = bpy.app.driver_namespace.get(VALIDATOR_KEY)
+    if validator is None:
+        return
+    for update in depsgraph.updates:
+        id_data = update.id.original
+        if isinstance(id_data, bpy.types.NodeTree):
+            # 节点树 (含材质内嵌的) 被改：不便宜地知道属于哪个材质，材质贴图结果全部重查
+            validator.forget(material_images)
+            continue
+        validator.touch(id_data)
+        # 物体的几何变化也算到它的网格上 (编辑模式下网格本身不一定单独出现在更新里)
+        if isinstance(id_data, bpy.types.Object) and update.is_updated_geometry and id_data.data:
+            validator.touch(id_data.data)
+
+
+@persistent
+def _on_load_export_validator(*args):
+    validator = bpy.app.driver_namespace.get(VALIDATOR_KEY)
+    if validator is not None:
+        validator.cache.clear()
+        validator.counters.clear()
+
+
+def install():
+    """安装(或替换)共享检查器和回调，重复运行不会叠加回调"""
+    # 撤销/重做会整体替换数据，计数对不上了，和打开文件一样清空
+    # 回调名字带本工具的后缀：按名字去重时不会误删别的脚本 (如 材质节点索引.py) 的同类回调
+    for handlers, fn in ((bpy.app.handlers.depsgraph_update_post, _on_depsgraph_update_export_validator),
+                         (bpy.app.handlers.load_post, _on_load_export_validator),
+                         (bpy.app.handlers.undo_post, _on_load_export_validator),
+                         (bpy.app.handlers.redo_post, _on_load_export_validator)):
+        for handler in list(handlers):
+            if getattr(handler, "__name__", "") == fn.__name__:
+                handlers.remove(handler)
+        handlers.append(fn)
+    validator = ExportValidator()
+    bpy.app.driver_namespace[VALIDATOR_KEY] = validator
+    return validator
+
+
+install()
+
+if __name__ == "__main__":
+    validator = bpy.app.driver_namespace[VALIDATOR_KEY]
+    validator.print_report(validator.validate(bpy.context.selected_objects))
@@ -0,0 +1,379 @@
+# script_id: 21c28ffe-dccf-4161-bef4-e943bf0bf45f
+# -*- coding: utf-8 -*-
+# =============================================================================
+#  导出清单 (Export Manifest)
+#  增量导出：为每个资产算一个内容指纹，内容没变且文件还在就跳过。
+#  指纹分项记录：网格数据 / 修改器 / 材质 / 变换 / 动画 fcurve / 导出预设，
+#  变了的话能说出是哪一项变了。
+#  清单文件 .export_manifest.json 放在 .blend 同级 (与 GLB / toUnity / toUe 并列)，
+#  按输出文件夹名分节。
+#
+#  其他导出脚本的用法 (运行过本脚本后，或由它们自动加载)：
+#      tools = bpy.app.driver_namespace["export_manifest"]
+#      manifest = tools.load(out_dir)
+#      fp = tools.fingerprint(objects, preset)
+#      if manifest.is_current(name, fp, filepath):
+#          continue
+#      ... 导出 ...
+#      manifest.record(name, fp, filepath)
+#      manifest.save(); print(manifest.summary())
+# =============================================================================
+
+import bpy
+import os
+import json
+import time
+import hashlib
+import numpy as np
+
+MANIFEST_KEY = "export_manifest"
+MANIFEST_FILE = ".export_manifest.json"
+
+# 属性类型 -> (foreach 字段, 每元素宽度, numpy 类型)
+ATTR_LAYOUT = {
+    'FLOAT': ('value', 1, np.float32),
+    'INT': ('value', 1, np.int32),
+    'INT8': ('value', 1, np.int32),
+    'BOOLEAN': ('value', 1, bool),
+    'FLOAT2': ('vector', 2, np.float32),
+    'INT32_2D': ('value', 2, np.int32),
+    'FLOAT_VECTOR': ('vector', 3, np.float32),
+    'FLOAT_COLOR': ('color', 4, np.float32),
+    'BYTE_COLOR': ('color', 4, np.float32),
+    'QUATERNION': ('value', 4, np.float32),
+}
+
+
+# -----------------------------------------------------------------------------
+#  各分项的哈希
+# -----------------------------------------------------------------------------
+def _update_array(h, collection, prop, count, width=1, dtype=np.float32):
+    arr = np.empty(count * width, dtype=dtype)
+    if count:
+        collection.foreach_get(prop, arr)
+    h.update(arr.tobytes())
+
+
+# 与导出结果无关、但会随界面操作变化的属性 (所有结构体通用)
+VOLATILE_PROPS = {
+    "users", "session_uid", "tag", "is_evaluated", "original", "use_fake_user", "use_extra_user",
+    "is_runtime_data", "is_missing", "is_embedded_data", "is_library_indirect", "is_editmode",
+    "name_full", "id_type", "preview", "library", "library_weak_reference", "override_library",
+    "asset_data", "show_expanded", "is_active", "show_in_editmode", "show_on_cage",
+}
+# 只对节点是界面状态的属性；修改器/曲线上同名的 width、dimensions 等会影响导出结果，不能跳过
+NODE_VOLATILE_PROPS = VOLATILE_PROPS | {
+    "select", "location", "width", "height", "dimensions", "hide", "label",
+    "show_options", "show_preview", "show_texture",
+}
+
+
+def _value(v):
+    if hasattr(v, "name_full"):
+        return v.name_full
+    if isinstance(v, set):
+        return tuple(sorted(v))
+    if hasattr(v, "__len__") and not isinstance(v, str):
+        return tuple(_value(x) for x in v)
+    return round(v, 6) if isinstance(v, float) else v
+
+
+def rna_signature(struct, skip=VOLATILE_PROPS):
+    """结构体上所有简单属性 (数值/枚举/字符串/ID 指针) 的元组；集合属性由调用方单独处理"""
+    items = []
+    for prop in struct.bl_rna.properties:
+        if prop.identifier in skip or prop.identifier == 'rna_type' or prop.type == 'COLLECTION':
+            continue
+        value = getattr(struct, prop.identifier, None)
+        if prop.type == 'POINTER' and not isinstance(value, bpy.types.ID):
+            continue
+        items.append((prop.identifier, _value(value) if value is not None else None))
+    return tuple(items)
+
+
+def mesh_hash(mesh):
+    h = hashlib.sha1()
+    nv, nl, nf = len(mesh.vertices), len(mesh.loops), len(mesh.polygons)
+    _update_array(h, mesh.vertices, "co", nv, 3)
+    _update_array(h, mesh.loops, "vertex_index", nl, 1, np.int32)
+    _update_array(h, mesh.polygons, "loop_start", nf, 1, np.int32)
+    _update_array(h, mesh.polygons, "material_index", nf, 1, np.int32)
+    _update_array(h, mesh.polygons, "use_smooth", nf, 1, bool)
+    for uv in mesh.uv_layers:
+        h.update(uv.name.encode())
+        _update_array(h, uv.data, "uv", nl, 2)
+
+    sizes = {'POINT': nv, 'EDGE': len(mesh.edges), 'CORNER': nl, 'FACE': nf}
+    for attr in sorted(mesh.attributes, key=lambda a: a.name):
+        layout = ATTR_LAYOUT.get(attr.data_type)
+        if attr.name.startswith(".") or layout is None or attr.domain not in sizes:
+            continue
+        h.update(f"{attr.name}|{attr.domain}|{attr.data_type}".encode())
+        _update_array(h, attr.data, layout[0], sizes[attr.domain], layout[1], layout[2])
+
+    if mesh.shape_keys:
+        for kb in mesh.shape_keys.key_blocks:
+            h.update(f"{kb.name}|{kb.relative_key.name}|{kb.value:.6f}|{kb.mute}".encode())
+            _update_array(h, kb.data, "co", nv, 3)
+    return h.hexdigest()
+
+
+def vertex_weights_hash(obj):
+    if not obj.vertex_groups or obj.type != 'MESH':
+        return ""
+    h = hashlib.sha1("|".join(vg.name for vg in obj.vertex_groups).encode())
+    for v in obj.data.vertices:
+        for g in v.groups:
+            h.update(f"{v.index}:{g.group}:{g.weight:.5f};".encode())
+    return h.hexdigest()
+
+
+def curve_hash(curve):
+    """曲线/曲面/文字：顶层属性 + 每条样条的设置和控制点数组 (rna_signature 不看集合)"""
+    h = hashlib.sha1(repr(rna_signature(curve)).encode())
+    for spline in curve.splines:
+        h.update(repr(rna_signature(spline)).encode())
+        n = len(spline.points)
+        _update_array(h, spline.points, "co", n, 4)
+        _update_array(h, spline.points, "radius", n)
+        _update_array(h, spline.points, "tilt", n)
+        n = len(spline.bezier_points)
+        for prop in ("co", "handle_left", "handle_right"):
+            _update_array(h, spline.bezier_points, prop, n, 3)
+        _update_array(h, spline.bezier_points, "radius", n)
+        _update_array(h, spline.bezier_points, "tilt", n)
+        h.update("".join(p.handle_left_type[0] + p.handle_right_type[0] for p in spline.bezier_points).encode())
+    for mat in curve.materials:
+        h.update((mat.name_full if mat else "").encode())
+    if isinstance(curve, bpy.types.TextCurve):
+        h.update(repr([rna_signature(c) for c in curve.body_format]).encode())
+    return h.hexdigest()
+
+
+def metaball_hash(mball):
+    h = hashlib.sha1(repr(rna_signature(mball)).encode())
+    for elem in mball.elements:
+        h.update(repr(rna_signature(elem)).encode())
+    return h.hexdigest()
+
+
+def data_hash(obj):
+    """物体数据：网格走数组哈希，曲线/元球展开控制点，骨架记骨骼静止姿态，其他类型用 RNA 属性"""
+    if obj.data is None:
+        return ""
+    if obj.type == 'MESH':
+        return mesh_hash(obj.data) + vertex_weights_hash(obj)
+    if obj.type in {'CURVE', 'SURFACE', 'FONT'}:
+        return curve_hash(obj.data)
+    if obj.type == 'META':
+        return metaball_hash(obj.data)
+    if obj.type == 'ARMATURE':
+        bones = tuple((b.name, b.parent.name if b.parent else "", _value(b.matrix_local), round(b.length, 6))
+                      for b in obj.data.bones)
+        return hashlib.sha1(repr(bones).encode()).hexdigest()
+    return hashlib.sha1(repr(rna_signature(obj.data)).encode()).hexdigest()
+
+
+def image_stamp(image, cache):
+    """图像内容的标记：打包的哈希打包数据，外部文件记 mtime+大小，未保存的改动 / 生成图哈希像素"""
+    key = image.name_full
+    if key not in cache:
+        if image.is_dirty or image.source == 'GENERATED':
+            pixels = np.empty(len(image.pixels), np.float32)
+            image.pixels.foreach_get(pixels)
+            stamp = ("pixels", tuple(image.size), hashlib.sha1(pixels.tobytes()).hexdigest())
+        elif image.packed_file:
+            stamp = ("packed", hashlib.sha1(image.packed_file.data).hexdigest())
+        else:
+            path = bpy.path.abspath(image.filepath, library=image.library)
+            try:
+                st = os.stat(path)
+                stamp = ("file", image.filepath, st.st_mtime_ns, st.st_size)
+            except OSError:
+                stamp = ("missing", image.filepath)
+        cache[key] = stamp
+    return cache[key]
+
+
+def tree_signature(tree, image_cache, seen=None):
+    """节点树签名；节点组递归进组内的节点树 (同一个组只展开一次)"""
+    seen = set() if seen is None else seen
+    seen.add(tree.name_full)
+    sig = []
+    for node in tree.nodes:
+        inputs = tuple((s.identifier, _value(s.default_value)) for s in node.inputs
+                       if hasattr(s, "default_value") and not s.is_linked)
+        # 值 / RGB 这类没有输入的常量节点，数值存在输出插槽上
+        outputs = tuple((s.identifier, _value(s.default_value)) for s in node.outputs
+                        if hasattr(s, "default_value")) if not node.inputs else ()
+        image = getattr(node, "image", None)
+        image_sig = (image.name_full, image.colorspace_settings.name, image_stamp(image, image_cache)) if image else None
+        group = getattr(node, "node_tree", None) if node.type == 'GROUP' else None
+        group_sig = None
+        if group is not None:
+            group_sig = group.name_full if group.name_full in seen else tree_signature(group, image_cache, seen)
+        sig.append((node.name, node.bl_idname, rna_signature(node, NODE_VOLATILE_PROPS), inputs, outputs,
+                    image_sig, group_sig))
+    sig.append(tuple(sorted((l.from_node.name, l.from_socket.identifier, l.to_node.name, l.to_socket.identifier, l.is_muted)
+                            for l in tree.links)))
+    return tuple(sig)
+
+
+def material_signature(mat, image_cache):
+    if mat is None:
+        return None
+    sig = [mat.name_full, rna_signature(mat)]
+    if mat.node_tree:
+        sig.append(tree_signature(mat.node_tree, image_cache))
+    return sig
+
+
+def _action_hash(action, cache):
+    if action is None:
+        return ""
+    key = action.name_full
+    if key not in cache:
+        h = hashlib.sha1(key.encode())
+        for fc in action.fcurves:
+            n = len(fc.keyframe_points)
+            h.update(f"{fc.data_path}|{fc.array_index}|{n}|{fc.mute}".encode())
+            for prop in ("co", "handle_left", "handle_right"):
+                _update_array(h, fc.keyframe_points, prop, n, 2)
+            h.update("".join(kp.interpolation[0] for kp in fc.keyframe_points).encode())
+        cache[key] = h.hexdigest()
+    return cache[key]
+
+
+def animation_hash(anim_data, cache):
+    if anim_data is None:
+        return ""
+    parts = [_action_hash(anim_data.action, cache)]
+    for track in anim_data.nla_tracks:
+        parts.append((track.name, track.mute))
+        for strip in track.strips:
+            parts.append((strip.name, strip.frame_start, strip.frame_end, strip.blend_type,
+                          strip.mute, strip.repeat, strip.scale, _action_hash(strip.action, cache)))
+    return hashlib.sha1(repr(parts).encode()).hexdigest()
+
+
+def _digest(value):
+    return hashlib.sha1(repr(value).encode()).hexdigest()[:16]
+
+
+def fingerprint(objects, preset=None):
+    """资产指纹：{分项: 摘要}；objects 是这次导出包含的全部物体"""
+    objects = sorted(objects, key=lambda o: o.name)
+    action_cache = {}
+    image_cache = {}
+    shared_data = {}
+    mesh, modifiers, materials, transforms, animation = [], [], [], [], []
+    for obj in objects:
+        data_key = obj.data.name_full if obj.data else ""
+        if data_key not in shared_data:
+            shared_data[data_key] = data_hash(obj)
+        mesh.append((obj.name, obj.type, shared_data[data_key]))
+        modifiers.append(tuple((m.name, m.type, rna_signature(m)) for m in obj.modifiers))
+        materials.append(tuple(material_signature(s.material, image_cache) for s in obj.material_slots))
+        transforms.append((obj.parent.name if obj.parent else "", _value(obj.matrix_world)))
+        shape_keys = getattr(obj.data, "shape_keys", None)
+        animation.append((animation_hash(obj.animation_data, action_cache),
+                          animation_hash(shape_keys.animation_data, action_cache) if shape_keys else ""))
+    return {
+        "mesh": _digest(mesh),
+        "modifiers": _digest(modifiers),
+        "materials": _digest(materials),
+        "transform": _digest(transforms),
+        "animation": _digest(animation),
+        "preset": _digest(json.dumps(preset or {}, sort_keys=True, default=str)),
+    }
+
+
+# -----------------------------------------------------------------------------
+#  清单文件
+# -----------------------------------------------------------------------------
+class ExportManifest:
+    """一个输出文件夹对应清单里的一节"""
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.section = os.path.basename(os.path.normpath(output_dir))
+        self.path = os.path.join(os.path.dirname(os.path.normpath(output_dir)), MANIFEST_FILE)
+        self.entries = self._load().get(self.section, {})
+        self.skipped = []
+        self.exported = []          # (name, 变化的分项)
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def changed_parts(self, name, fp):
+        old = self.entries.get(name, {}).get("fingerprint")
+        if old is None:
+            return ["new"]
+        return [k for k in fp if old.get(k) != fp[k]]
+
+    def is_current(self, name, fp, filepath):
+        """内容没变且文件还在 -> True，并记为跳过"""
+        entry = self.entries.get(name)
+        current = (entry is not None and entry.get("fingerprint") == fp
+                   and entry.get("file") == os.path.basename(filepath) and os.path.exists(filepath))
+        if current:
+            self.skipped.append(name)
+        return current
+
+    def record(self, name, fp, filepath):
+        self.exported.append((name, self.changed_parts(name, fp)))
+        self.entries[name] = {
+            "fingerprint": fp,
+            "file": os.path.basename(filepath),
+            "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+
+    def save(self):
+        # 重新读一次再合并本节，别覆盖其他脚本同时写的分节
+        data = self._load()
+        data[self.section] = self.entries
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+    def summary(self):
+        lines = [f"[{self.section}] 导出 {len(self.exported)} 个，跳过未变化 {len(self.skipped)} 个"]
+        for name, parts in self.exported:
+            lines.append(f"  ↻ {name}: {', '.join(parts) or 'file'}")
+        if self.skipped:
+            lines.append(f"  跳过: {', '.join(self.skipped)}")
+        return "\n".join(lines)
+
+
+class ExportManifestTools:
+    """放进 driver_namespace 的入口"""
+    fingerprint = staticmethod(fingerprint)
+
+    @staticmethod
+    def load(output_dir):
+        return ExportManifest(output_dir)
+
+
+def install():
+    tools = ExportManifestTools()
+    bpy.app.driver_namespace[MANIFEST_KEY] = tools
+    return tools
+
+
+install()
+
+if __name__ == "__main__":
+    # 直接运行：打印当前 .blend 旁边的清单概况
+    if bpy.data.filepath:
+        path = os.path.join(os.path.dirname(bpy.data.filepath), MANIFEST_FILE)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+        for section, entries in data.items():
+            print(f"{section}: {len(entries)} 个资产")
+    print("导出清单工具已就绪")
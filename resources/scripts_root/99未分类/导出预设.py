@@ -0,0 +1,154 @@
+# script_id: 6f23923d-f8cc-446b-be43-b41730fe0199
+# -*- coding: utf-8 -*-
+# =============================================================================
+#  导出预设注册表 (Export Preset Registry)
+#  所有导出脚本的参数都从同目录的 导出预设.json 里按名字取：
+#      "glb_mobile": {"inherits": "glb_anim", "settings": {...只写不同的键...}}
+#  预设可以继承；.blend 旁边的 export_presets.json 可以追加/覆盖同名预设。
+#  每个预设第一次取用时对照当前安装的导出器 RNA 校验一次并缓存：
+#  未知参数 (导出器版本不同) 和非法枚举值会被剔除并给出一次警告，
+#  而不是每次导出时报错。JSON 文件改动后自动重新加载。
+#
+#  其他脚本的用法 (运行过本脚本后，或由它们自动加载)：
+#      presets = bpy.app.driver_namespace["export_presets"]
+#      presets.export("glb_anim", filepath=path)
+#      presets.settings("glb_anim")      # -> 校验后的参数字典 (副本)
+# =============================================================================
+
+import bpy
+import os
+import json
+
+PRESETS_KEY = "export_presets"
+BUILTIN_FILE = os.path.join(os.path.dirname(os.path.abspath(globals().get("__file__", ""))), "导出预设.json")
+USER_FILE_NAME = "export_presets.json"
+
+_TYPE_CHECKS = {
+    'BOOLEAN': lambda v: isinstance(v, bool),
+    'INT': lambda v: isinstance(v, int) and not isinstance(v, bool),
+    'FLOAT': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'STRING': lambda v: isinstance(v, str),
+}
+
+
+def exporter_op(exporter_id):
+    """'export_scene.gltf' -> bpy.ops.export_scene.gltf"""
+    category, name = exporter_id.split(".")
+    return getattr(getattr(bpy.ops, category), name)
+
+
+class PresetRegistry:
+    def __init__(self, builtin_file=BUILTIN_FILE):
+        self.builtin_file = builtin_file
+        self._stamp = None
+        self._raw = {}
+        self._resolved = {}          # 名字 -> (exporter_id, 校验后的参数)
+        self._rna = {}               # exporter_id -> {参数名: RNA 属性}
+        self.warnings = []
+
+    # ---------- 加载 ----------
+    def _files(self):
+        files = [self.builtin_file]
+        if bpy.data.filepath:
+            files.append(os.path.join(os.path.dirname(bpy.data.filepath), USER_FILE_NAME))
+        return [f for f in files if os.path.exists(f)]
+
+    def _refresh(self):
+        files = self._files()
+        stamp = tuple((f, os.path.getmtime(f)) for f in files)
+        if stamp == self._stamp:
+            return
+        raw = {}
+        for path in files:
+            with open(path, encoding="utf-8") as f:
+                raw.update(json.load(f))
+        self._raw, self._stamp = raw, stamp
+        self._resolved.clear()
+        self.warnings.clear()
+
+    def names(self):
+        self._refresh()
+        return sorted(self._raw)
+
+    # ---------- 继承 + 校验 ----------
+    def _merge(self, name, chain=()):
+        if name in chain:
+            raise ValueError(f"预设继承出现循环: {' -> '.join(chain + (name,))}")
+        entry = self._raw.get(name)
+        if entry is None:
+            raise KeyError(f"未知的导出预设: {name}")
+        if "inherits" in entry:
+            exporter_id, settings = self._merge(entry["inherits"], chain + (name,))
+        else:
+            exporter_id, settings = None, {}
+        settings = {**settings, **entry.get("settings", {})}
+        return entry.get("exporter", exporter_id), settings
+
+    def _exporter_props(self, exporter_id):
+        if exporter_id not in self._rna:
+            try:
+                rna = exporter_op(exporter_id).get_rna_type()
+            except (AttributeError, KeyError) as e:
+                raise RuntimeError(f"导出器 {exporter_id} 不可用 (插件未启用?)") from e
+            self._rna[exporter_id] = {p.identifier: p for p in rna.properties if p.identifier != 'rna_type'}
+        return self._rna[exporter_id]
+
+    def _validate(self, name, exporter_id, settings):
+        props = self._exporter_props(exporter_id)
+        valid = {}
+        for key, value in settings.items():
+            prop = props.get(key)
+            if prop is None:
+                self.warnings.append(f"[{name}] {exporter_id} 没有参数 '{key}'，已忽略")
+                continue
+            if prop.type == 'ENUM' and not prop.is_enum_flag:
+                items = {item.identifier for item in prop.enum_items}
+                # 动态枚举 (enum_items 为空) 无法静态校验，交给导出器
+                if items and value not in items:
+                    self.warnings.append(f"[{name}] '{key}' 的值 {value!r} 不在 {sorted(items)} 中，已忽略")
+                    continue
+            check = _TYPE_CHECKS.get(prop.type)
+            if check and getattr(prop, "array_length", 0) == 0 and not check(value):
+                self.warnings.append(f"[{name}] '{key}' 需要 {prop.type}，得到 {value!r}，已忽略")
+                continue
+            valid[key] = value
+        return valid
+
+    def resolve(self, name):
+        """(exporter_id, 参数)；同一预设在文件不变时只合并/校验一次"""
+        self._refresh()
+        if name not in self._resolved:
+            exporter_id, settings = self._merge(name)
+            if not exporter_id:
+                raise ValueError(f"预设 {name} 及其父预设都没有指定 exporter")
+            start = len(self.warnings)
+            self._resolved[name] = (exporter_id, self._validate(name, exporter_id, settings))
+            for message in self.warnings[start:]:
+                print(f"⚠ 导出预设 {message}")
+        return self._resolved[name]
+
+    # ---------- 使用 ----------
+    def settings(self, name):
+        return dict(self.resolve(name)[1])
+
+    def export(self, name, **overrides):
+        exporter_id, settings = self.resolve(name)
+        return exporter_op(exporter_id)(**{**settings, **overrides})
+
+
+def install():
+    registry = PresetRegistry()
+    bpy.app.driver_namespace[PRESETS_KEY] = registry
+    return registry
+
+
+install()
+
+if __name__ == "__main__":
+    registry = bpy.app.driver_namespace[PRESETS_KEY]
+    for preset in registry.names():
+        try:
+            exporter_id, settings = registry.resolve(preset)
+            print(f"{preset:<24} {exporter_id:<20} {len(settings)} 个参数")
+        except (RuntimeError, KeyError, ValueError) as e:
+            print(f"{preset:<24} ✗ {e}")
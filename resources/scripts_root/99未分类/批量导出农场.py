@@ -0,0 +1,350 @@
+# script_id: f20f2cd8-a0d2-46e6-b224-cbeac41bc9e7
+# ──────────────────────────────────────────────────────────
+#   批量导出农场
+#   把选中物体分给 N 个 blender --background 后台进程并行导出：
+#   1. 当前文件另存一份快照 .blend (copy=True，不影响当前文件)
+#   2. 按顶点数把物体均衡分成 N 份，每份写一个 job.json (物体名 + 格式 + 共用预设)
+#   3. 后台进程用同一个脚本以 --farm-worker 启动，逐个导出并写回 result.json
+#   4. UI 里的模态操作符轮询进程，结束后把结果和日志收集到文本块 "导出农场日志"
+#   benchmark_farm() 在合成场景上比较不同进程数的耗时。
+# ──────────────────────────────────────────────────────────
+import bpy
+import os
+import sys
+import json
+import time
+import runpy
+import shutil
+import tempfile
+import subprocess
+
+# 各格式的输出目录 (与原来的单独导出脚本一致) 和导出预设 (99未分类/导出预设.json)
+FORMATS = {
+    'GLB': {"folder": "toUe", "ext": ".glb", "preset": "glb_simple"},
+    'OBJ': {"folder": "exported_obj", "ext": ".obj", "preset": "obj_basic"},
+    'FBX': {"folder": "toUnity", "ext": ".fbx", "preset": "fbx_basic"},
+}
+LOG_TEXT_NAME = "导出农场日志"
+
+
+# =============================================================================
+#  后台进程侧
+# =============================================================================
+def export_one(obj, exporter_id, filepath, settings):
+    """只选中 obj 并按 UI 侧解析好的预设导出；后台进程里没有其他人关心选择状态"""
+    for o in bpy.context.view_layer.objects:
+        o.select_set(False)
+    obj.select_set(True)
+    bpy.context.view_layer.objects.active = obj
+    category, name = exporter_id.split(".")
+    return getattr(getattr(bpy.ops, category), name)(filepath=filepath, **settings)
+
+
+def run_worker(job_path):
+    with open(job_path, encoding="utf-8") as f:
+        job = json.load(f)
+    fmt = job["format"]
+    os.makedirs(job["output_dir"], exist_ok=True)
+    results = []
+    for name in job["objects"]:
+        obj = bpy.data.objects.get(name)
+        filepath = os.path.join(job["output_dir"], name + FORMATS[fmt]["ext"])
+        start = time.perf_counter()
+        if obj is None or obj.name not in bpy.context.view_layer.objects:
+            results.append({"name": name, "ok": False, "error": "快照里找不到该物体", "seconds": 0.0})
+            continue
+        try:
+            status = export_one(obj, job["exporter"], filepath, job["preset"])
+            ok, error = 'FINISHED' in status, "" if 'FINISHED' in status else str(status)
+        except Exception as e:
+            ok, error = False, str(e)
+        elapsed = time.perf_counter() - start
+        results.append({"name": name, "ok": ok, "error": error, "seconds": elapsed, "path": filepath})
+        print(f"[worker {job['index']}] {'OK ' if ok else 'ERR'} {name} {elapsed:.2f}s {error}", flush=True)
+
+    with open(job["result_path"], "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+
+
+def make_synthetic_scene(count, out_path, subdivisions=3):
+    """后台进程里生成 count 个不同规模的球体并保存，用于基准"""
+    import bmesh
+    for obj in list(bpy.data.objects):
+        bpy.data.objects.remove(obj)
+    for i in range(count):
+        mesh = bpy.data.meshes.new(f"bench_{i:04d}")
+        bm = bmesh.new()
+        bmesh.ops.create_icosphere(bm, subdivisions=subdivisions + i % 3, radius=1.0)
+        bm.to_mesh(mesh)
+        bm.free()
+        obj = bpy.data.objects.new(mesh.name, mesh)
+        obj.location = (i % 25 * 3.0, i // 25 * 3.0, 0.0)
+        bpy.context.scene.collection.objects.link(obj)
+    bpy.ops.wm.save_as_mainfile(filepath=out_path)
+
+
+# =============================================================================
+#  UI 侧
+# =============================================================================
+# 共享工具 (导出预设、导出清单、材质节点索引等) 统一由 99未分类/共享加载.py 取出或安装
+load_shared = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", "")))),
+                                          "99未分类", "共享加载.py"))["load_shared"]
+
+
+def script_path():
+    path = globals().get("__file__", "")
+    return path if path and os.path.isfile(path) else None
+
+
+def balance_jobs(objects, workers):
+    """最长处理时间优先 (LPT)：按顶点数从大到小分给当前负载最小的进程"""
+    def cost(o):
+        return len(o.data.vertices) if o.type == 'MESH' else 1
+    buckets = [[0, []] for _ in range(max(1, workers))]
+    for obj in sorted(objects, key=cost, reverse=True):
+        bucket = min(buckets, key=lambda b: b[0])
+        bucket[0] += cost(obj) + 1000   # 每个文件还有固定开销
+        bucket[1].append(obj.name)
+    return [names for _, names in buckets if names]
+
+
+def launch_workers(snapshot, jobs, fmt, output_dir, work_dir):
+    """为每份物体写 job.json 并启动一个后台 Blender；预设在这里解析校验一次，后台进程直接用"""
+    exporter_id, preset = load_shared("export_presets", "99未分类/导出预设.py").resolve(FORMATS[fmt]["preset"])
+    procs = []
+    for index, names in enumerate(jobs):
+        job = {
+            "index": index,
+            "format": fmt,
+            "exporter": exporter_id,
+            "objects": names,
+            "output_dir": output_dir,
+            "preset": preset,
+            "result_path": os.path.join(work_dir, f"result_{index}.json"),
+        }
+        job_path = os.path.join(work_dir, f"job_{index}.json")
+        with open(job_path, "w", encoding="utf-8") as f:
+            json.dump(job, f, ensure_ascii=False)
+        log_path = os.path.join(work_dir, f"log_{index}.txt")
+        log = open(log_path, "w", encoding="utf-8")
+        proc = subprocess.Popen(
+            [bpy.app.binary_path, "--background", snapshot, "--python", script_path(),
+             "--", "--farm-worker", job_path],
+            stdout=log, stderr=subprocess.STDOUT)
+        procs.append({"proc": proc, "log": log, "log_path": log_path, "job": job})
+    return procs
+
+
+def collect_results(procs):
+    results, logs = [], []
+    for p in procs:
+        p["log"].close()
+        with open(p["log_path"], encoding="utf-8", errors="replace") as f:
+            logs.append(f"===== worker {p['job']['index']} (exit {p['proc'].returncode}) =====\n{f.read()}")
+        try:
+            with open(p["job"]["result_path"], encoding="utf-8") as f:
+                results.extend(json.load(f))
+        except (OSError, ValueError):
+            # 进程崩溃：这一份全部记为失败
+            results.extend({"name": n, "ok": False, "error": "后台进程未写回结果", "seconds": 0.0}
+                           for n in p["job"]["objects"])
+    return results, "\n".join(logs)
+
+
+def run_farm_blocking(snapshot, object_names, fmt, output_dir, workers):
+    """同步跑一遍 (基准用)：返回 (总耗时, 结果列表)"""
+    work_dir = tempfile.mkdtemp(prefix="export_farm_")
+    try:
+        chunk = -(-len(object_names) // workers)
+        jobs = [object_names[i:i + chunk] for i in range(0, len(object_names), chunk)]
+        start = time.perf_counter()
+        procs = launch_workers(snapshot, jobs, fmt, output_dir, work_dir)
+        for p in procs:
+            p["proc"].wait()
+        results, _ = collect_results(procs)
+        return time.perf_counter() - start, results
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def benchmark_farm(count=500, worker_counts=None, fmt='GLB'):
+    """合成场景基准：count 个球体，分别用 1..N 个进程导出，结果输出到控制台"""
+    if script_path() is None:
+        print("❗ 需要从脚本文件运行")
+        return []
+    cores = os.cpu_count() or 1
+    worker_counts = worker_counts or sorted({1, 2, max(1, cores // 2), cores})
+    # 合成场景和各轮导出结果都放在临时目录里，跑完整个删掉
+    work_dir = tempfile.mkdtemp(prefix="export_farm_bench_")
+    try:
+        scene_path = os.path.join(work_dir, "synthetic.blend")
+        subprocess.run([bpy.app.binary_path, "--background", "--factory-startup", "--python", script_path(),
+                        "--", "--farm-synthetic", str(count), scene_path], check=True,
+                       stdout=subprocess.DEVNULL)
+        names = [f"bench_{i:04d}" for i in range(count)]
+
+        print(f"导出农场基准: {count} 个 {fmt}, {cores} 核")
+        rows = []
+        for workers in worker_counts:
+            out_dir = os.path.join(work_dir, f"out_{workers}")
+            elapsed, results = run_farm_blocking(scene_path, names, fmt, out_dir, workers)
+            failed = sum(1 for r in results if not r["ok"])
+            rows.append((workers, elapsed, failed))
+            print(f"  {workers:>3} 进程: {elapsed:7.2f}s  ({count / elapsed:6.1f} 个/秒, 失败 {failed})")
+        print(f"  最快比单进程快 {rows[0][1] / min(r[1] for r in rows):.1f}x")
+        return rows
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+class WM_OT_export_farm(bpy.types.Operator):
+    """把选中物体分给多个后台 Blender 进程并行导出"""
+    bl_idname = "wm.export_farm"
+    bl_label = "批量导出农场"
+
+    export_format: bpy.props.EnumProperty(
+        name="格式",
+        items=[('GLB', "GLB", ""), ('OBJ', "OBJ", ""), ('FBX', "FBX", "")],
+        default='GLB'
+    )
+    workers: bpy.props.IntProperty(
+        name="进程数",
+        description="后台 Blender 进程数量",
+        default=max(1, (os.cpu_count() or 2) - 1),
+        min=1, max=64
+    )
+    incremental: bpy.props.BoolProperty(
+        name="仅导出变化",
+        description="内容与上次相同且文件还在时跳过，见 99未分类/导出清单.py",
+        default=True
+    )
+
+    _timer = None
+
+    @classmethod
+    def poll(cls, context):
+        return bool(context.selected_objects)
+
+    def invoke(self, context, event):
+        return context.window_manager.invoke_props_dialog(self)
+
+    def execute(self, context):
+        if not bpy.data.filepath:
+            self.report({'ERROR'}, "请先保存 .blend 文件")
+            return {'CANCELLED'}
+        if script_path() is None:
+            self.report({'ERROR'}, "需要从脚本文件运行 (后台进程会执行同一个脚本)")
+            return {'CANCELLED'}
+
+        fmt = self.export_format
+        self.output_dir = os.path.join(os.path.dirname(bpy.data.filepath), FORMATS[fmt]["folder"])
+
+        # 增量：未变化的物体不分给后台进程
+        objects = list(context.selected_objects)
+        self.manifest, self.fingerprints = None, {}
+        if self.incremental:
+            tools = load_shared("export_manifest", "99未分类/导出清单.py")
+            self.manifest = tools.load(self.output_dir)
+            preset = load_shared("export_presets", "99未分类/导出预设.py").settings(FORMATS[fmt]["preset"])
+            for obj in objects:
+                fp = tools.fingerprint([obj], preset)
+                path = os.path.join(self.output_dir, obj.name + FORMATS[fmt]["ext"])
+                if not self.manifest.is_current(obj.name, fp, path):
+                    self.fingerprints[obj.name] = fp
+            objects = [o for o in objects if o.name in self.fingerprints]
+            if not objects:
+                self.report({'INFO'}, f"全部 {len(self.manifest.skipped)} 个物体均未变化，无需导出")
+                return {'FINISHED'}
+
+        self.work_dir = tempfile.mkdtemp(prefix="export_farm_")
+        try:
+            snapshot = os.path.join(self.work_dir, "snapshot.blend")
+            bpy.ops.wm.save_as_mainfile(filepath=snapshot, copy=True)
+
+            jobs = balance_jobs(objects, self.workers)
+            self.start = time.perf_counter()
+            self.procs = launch_workers(snapshot, jobs, fmt, self.output_dir, self.work_dir)
+        except Exception:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            raise
+        self.total = len(objects)
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.5, window=context.window)
+        wm.modal_handler_add(self)
+        self.report({'INFO'}, f"已启动 {len(self.procs)} 个后台进程导出 {self.total} 个物体")
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            for p in self.procs:
+                if p["proc"].poll() is None:
+                    p["proc"].terminate()
+            for p in self.procs:
+                # 等进程真正退出，日志文件才能读完、工作目录才能删掉
+                try:
+                    p["proc"].wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    p["proc"].kill()
+            return self.finish(context, cancelled=True)
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        running = sum(1 for p in self.procs if p["proc"].poll() is None)
+        context.workspace.status_text_set(f"导出农场: {len(self.procs) - running}/{len(self.procs)} 个进程完成")
+        if running:
+            return {'PASS_THROUGH'}
+        return self.finish(context)
+
+    def finish(self, context, cancelled=False):
+        context.window_manager.event_timer_remove(self._timer)
+        context.workspace.status_text_set(None)
+        results, log = collect_results(self.procs)
+        elapsed = time.perf_counter() - self.start
+        # 快照 .blend、job/result/日志都已读完，临时工作目录不再需要
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+        ok = [r for r in results if r["ok"]]
+        failed = [r for r in results if not r["ok"]]
+        if self.manifest:
+            for r in ok:
+                self.manifest.record(r["name"], self.fingerprints[r["name"]], r["path"])
+            self.manifest.save()
+            log = self.manifest.summary() + "\n\n" + log
+        text = bpy.data.texts.get(LOG_TEXT_NAME) or bpy.data.texts.new(LOG_TEXT_NAME)
+        text.clear()
+        text.write(f"导出 {len(ok)}/{self.total} 个，失败 {len(failed)}，用时 {elapsed:.1f}s → {self.output_dir}\n")
+        for r in failed:
+            text.write(f"  ✗ {r['name']}: {r['error']}\n")
+        text.write("\n" + log)
+
+        for r in failed:
+            self.report({'WARNING'}, f"{r['name']} 导出失败: {r['error']}")
+        level = {'WARNING'} if cancelled or failed else {'INFO'}
+        self.report(level, f"{'已取消，' if cancelled else ''}导出 {len(ok)}/{self.total} 个，用时 {elapsed:.1f}s，"
+                           f"日志见文本 '{LOG_TEXT_NAME}'")
+        return {'CANCELLED'} if cancelled else {'FINISHED'}
+
+
+def register():
+    bpy.utils.register_class(WM_OT_export_farm)
+
+
+def unregister():
+    bpy.utils.unregister_class(WM_OT_export_farm)
+
+
+if __name__ == "__main__":
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if "--farm-worker" in argv:
+        run_worker(argv[argv.index("--farm-worker") + 1])
+    elif "--farm-synthetic" in argv:
+        i = argv.index("--farm-synthetic")
+        make_synthetic_scene(int(argv[i + 1]), argv[i + 2])
+    else:
+        try:
+            unregister()
+        except (RuntimeError, ValueError):
+            pass
+        register()
+        bpy.ops.wm.export_farm('INVOKE_DEFAULT')
@@ -1,7 +1,53 @@
 # script_id: fd45dda1-bc95-4fc7-8e24-b554b877608f
 import bpy
-import bmesh
-from bpy.props import FloatProperty, BoolProperty
+import numpy as np
+from bpy.props import FloatProperty, BoolProperty, IntProperty
+
+
+# --- 数组工具: 一次性读出网格数据，避免逐个 BMVert 访问 ---
+def read_array(collection, attr, count, width, dtype=np.float32):
+    data = np.empty(count * width, dtype=dtype)
+    collection.foreach_get(attr, data)
+    return data.reshape(-1, width) if width > 1 else data
+
+
+def even_thickness_scale(mesh, vert_normals, max_scale=4.0):
+    """
+    等厚修正: 每个顶点除以它与相邻面法线夹角的余弦 (取平均)，
+    这样尖角处偏移出来的壳厚度仍然一致。
+    """
+    loop_count = len(mesh.loops)
+    loop_verts = read_array(mesh.loops, "vertex_index", loop_count, 1, np.int32)
+    loop_totals = read_array(mesh.polygons, "loop_total", len(mesh.polygons), 1, np.int32)
+    face_normals = read_array(mesh.polygons, "normal", len(mesh.polygons), 3)
+    loop_faces = np.repeat(np.arange(len(mesh.polygons)), loop_totals)
+
+    cos = np.einsum('ij,ij->i', vert_normals[loop_verts], face_normals[loop_faces])
+    vert_count = len(vert_normals)
+    cos_sum = np.bincount(loop_verts, weights=cos, minlength=vert_count)
+    face_num = np.bincount(loop_verts, minlength=vert_count)
+    mean_cos = np.divide(cos_sum, face_num, out=np.ones(vert_count), where=face_num > 0)
+    return 1.0 / np.clip(mean_cos, 1.0 / max_scale, 1.0)
+
+
+def laplacian_smooth(field, edges, selected, iterations, strength):
+    """只在选中顶点之间做拉普拉斯平滑，未选中的顶点不参与也不被改动"""
+    if iterations <= 0 or len(edges) == 0:
+        return field
+    keep = selected[edges[:, 0]] & selected[edges[:, 1]]
+    a, b = edges[keep, 0], edges[keep, 1]
+    count = len(field)
+    degree = np.bincount(a, minlength=count) + np.bincount(b, minlength=count)
+    has_neighbor = degree > 0
+    ends = np.concatenate([a, b])
+    for _ in range(iterations):
+        neighbor_values = np.concatenate([field[b], field[a]])
+        total = np.stack([np.bincount(ends, weights=neighbor_values[:, i], minlength=count)
+                          for i in range(field.shape[1])], axis=1)
+        avg = total[has_neighbor] / degree[has_neighbor, None]
+        field[has_neighbor] += strength * (avg - field[has_neighbor])
+    return field
+
 
 # 定义操作类
 class MoveVertsNormalOperator(bpy.types.Operator):
@@ -26,31 +72,74 @@ class MoveVertsNormalOperator(bpy.types.Operator):
         default=False
     )
 
-    def get_bm(self):
-        obj = bpy.context.active_object
-        me = obj.data
-        bm = bmesh.from_edit_mesh(me)
-        return bm
+    even_thickness: BoolProperty(
+        name="Even Thickness",
+        description="Divide the offset by the cosine of the adjacent face angles",
+        default=False
+    )
+
+    smooth_iterations: IntProperty(
+        name="Smooth Iterations",
+        description="Laplacian smoothing passes over the offset field",
+        default=0,
+        min=0,
+        soft_max=50
+    )
+
+    smooth_strength: FloatProperty(
+        name="Smooth Strength",
+        default=0.5,
+        min=0.0,
+        max=1.0
+    )
+
+    # 交互期间缓存的数组，拖动时只重新乘 factor
+    original_co: object
+    offset_dir: object
+    selected: object
+
+    def build_cache(self, context):
+        """读取顶点/法线/拓扑并计算偏移方向场，只在开始时或选项变化时调用"""
+        ob = context.active_object
+        me = ob.data
+        vert_count = len(me.vertices)
+        self.original_co = read_array(me.vertices, "co", vert_count, 3)
+        normals = read_array(me.vertices, "normal", vert_count, 3)
+        self.selected = read_array(me.vertices, "select", vert_count, 1, bool)
+        self.rebuild_offset(me, normals)
+
+    def rebuild_offset(self, me, normals=None):
+        if normals is None:
+            normals = read_array(me.vertices, "normal", len(me.vertices), 3)
+        offset = normals.astype(np.float64)
+        if self.even_thickness and len(me.polygons):
+            offset *= even_thickness_scale(me, normals)[:, None]
+        if self.smooth_iterations:
+            edges = read_array(me.edges, "vertices", len(me.edges), 2, np.int32)
+            offset = laplacian_smooth(offset, edges, self.selected,
+                                      self.smooth_iterations, self.smooth_strength)
+        offset[~self.selected] = 0.0
+        self.offset_dir = offset
+
+    def apply_factor(self, context):
+        me = context.active_object.data
+        co = self.original_co + self.offset_dir * self.factor
+        me.vertices.foreach_set("co", co.astype(np.float32).ravel())
+        me.update()
 
     def execute(self, context):
+        # 重做面板/直接执行: 在物体模式下批量写坐标，完成后回到编辑模式
+        bpy.ops.object.mode_set(mode='OBJECT')
+        self.build_cache(context)
         self.process(context)
+        bpy.ops.object.mode_set(mode='EDIT')
         return {'FINISHED'}
 
     def process(self, context):
-        ob = bpy.context.object
-        me = ob.data
-        bm = self.get_bm()
-
-        for v in bm.verts:
-            if v.select:
-                v.co += v.normal * self.factor  # Move along normal direction
-
-        bmesh.update_edit_mesh(me)
+        self.apply_factor(context)
 
         if self.prop_select:
-            for v in bm.verts:
-                if v.select:
-                    v.select = True
+            context.active_object.data.vertices.foreach_set("select", self.selected)
 
     @classmethod
     def poll(cls, context):
@@ -62,7 +151,12 @@ class MoveVertsNormalOperator(bpy.types.Operator):
     def invoke(self, context, event):
         if context.mode == 'EDIT_MESH':
             self.factor = 0.04  # Default factor
+            # 拖动期间停在物体模式，直接用 foreach_set 写网格，密集扫描也能流畅
+            bpy.ops.object.mode_set(mode='OBJECT')
+            self.build_cache(context)
+            self.process(context)
             context.window_manager.modal_handler_add(self)
+            self.update_header(context)
             return {'RUNNING_MODAL'}
         else:
             return {'CANCELLED'}
@@ -71,16 +165,30 @@ class MoveVertsNormalOperator(bpy.types.Operator):
         context.area.tag_redraw()
 
         if event.type == 'Q' and event.value == 'PRESS':
-            self.restore()
+            self.restore(context)
             return {'CANCELLED'}
         elif event.type == 'LEFTMOUSE' and event.value == 'PRESS':
             self.process(context)
+            self.finish(context)
             return {'FINISHED'}
         elif event.type == 'MOUSEMOVE':
             self.on_move(context, event)
             return {'PASS_THROUGH'}
+        elif event.type == 'E' and event.value == 'PRESS':
+            self.even_thickness = not self.even_thickness
+            self.rebuild_offset(context.active_object.data)
+            self.process(context)
+            self.update_header(context)
+            return {'RUNNING_MODAL'}
+        elif event.type in {'S', 'D'} and event.value == 'PRESS':
+            step = 1 if event.type == 'S' else -1
+            self.smooth_iterations = max(0, self.smooth_iterations + step)
+            self.rebuild_offset(context.active_object.data)
+            self.process(context)
+            self.update_header(context)
+            return {'RUNNING_MODAL'}
         elif event.type == 'ESC' and event.value == 'PRESS':
-            self.restore()
+            self.restore(context)
             return {'CANCELLED'}
         return {'PASS_THROUGH'}
 
@@ -94,13 +202,25 @@ class MoveVertsNormalOperator(bpy.types.Operator):
         scale_factor = 0.02  # 缩放因子，控制数值变化的敏感度
         self.factor = (mx / region_width - 0.5) * scale_factor  # 让 factor 的变化范围更加平滑
         self.process(context)
+        self.update_header(context)
 
-    def restore(self):
-        bpy.ops.object.mode_set(mode='OBJECT')
-        me = bpy.context.active_object.data
-        bmesh.update_edit_mesh(me)
+    def update_header(self, context):
+        even = "开" if self.even_thickness else "关"
+        context.area.header_text_set(
+            f"偏移: {self.factor:.4f} | [E]等厚: {even} | [S/D]平滑: {self.smooth_iterations} | "
+            f"[LMB]确认 [Q/ESC]取消"
+        )
+
+    def finish(self, context):
+        context.area.header_text_set(None)
         bpy.ops.object.mode_set(mode='EDIT')
 
+    def restore(self, context):
+        me = context.active_object.data
+        me.vertices.foreach_set("co", self.original_co.ravel())
+        me.update()
+        self.finish(context)
+
 # 定义面板类
 class VIEW3D_PT_move_verts_normal_panel(bpy.types.Panel):
     """Panel for Move Vertices Along Normal"""
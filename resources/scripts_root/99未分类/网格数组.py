@@ -0,0 +1,144 @@
+# script_id: ec49f3e2-21cc-4bc9-bead-b722468b70ce
+# -*- coding: utf-8 -*-
+# =============================================================================
+#  网格数组读写 (顶点组合并.py / 顶点组拆分.py 共用)
+#  - read_mesh_arrays: 顶点/边/面角/面、UV、通用属性、缝合边、形态键一次读成 numpy 数组
+#  - build_mesh:       用同样格式的数组直接建网格 (foreach_set，不经过 from_pydata)
+#  - add_shape_keys:   形态键只能挂在物体上，建好物体后再加
+#  两个脚本用 runpy 加载本文件，格式只在这里定义一份
+# =============================================================================
+
+import bpy
+import numpy as np
+
+PARTS_PROP = "merge_parts"
+
+# 属性类型 -> (foreach 字段, 每元素宽度, numpy 类型)
+ATTR_LAYOUT = {
+    'FLOAT': ('value', 1, np.float32),
+    'INT': ('value', 1, np.int32),
+    'INT8': ('value', 1, np.int32),
+    'BOOLEAN': ('value', 1, bool),
+    'FLOAT2': ('vector', 2, np.float32),
+    'INT32_2D': ('value', 2, np.int32),
+    'FLOAT_VECTOR': ('vector', 3, np.float32),
+    'FLOAT_COLOR': ('color', 4, np.float32),
+    'BYTE_COLOR': ('color', 4, np.float32),
+    'QUATERNION': ('value', 4, np.float32),
+}
+# 这些由拓扑/材质/平滑单独处理
+SKIP_ATTRS = {"position", "material_index", "sharp_face"}
+
+
+def read_array(collection, prop, count, width=1, dtype=np.float32):
+    arr = np.empty(count * width, dtype=dtype)
+    if count:
+        collection.foreach_get(prop, arr)
+    return arr.reshape((count, width)) if width > 1 else arr
+
+
+def read_mesh_arrays(mesh):
+    """一次性把网格读成 numpy 数组"""
+    nv, ne, nl, nf = len(mesh.vertices), len(mesh.edges), len(mesh.loops), len(mesh.polygons)
+    uv_names = {uv.name for uv in mesh.uv_layers}
+    data = {
+        "co": read_array(mesh.vertices, "co", nv, 3),
+        "edges": read_array(mesh.edges, "vertices", ne, 2, np.int32),
+        "loop_vert": read_array(mesh.loops, "vertex_index", nl, 1, np.int32),
+        "loop_edge": read_array(mesh.loops, "edge_index", nl, 1, np.int32),
+        "loop_start": read_array(mesh.polygons, "loop_start", nf, 1, np.int32),
+        "material": read_array(mesh.polygons, "material_index", nf, 1, np.int32),
+        "smooth": read_array(mesh.polygons, "use_smooth", nf, 1, bool),
+        # 缝合边在 4.x 里存成带点的 .uv_seam 属性，下面的通用属性会跳过它，单独读
+        "seam": read_array(mesh.edges, "use_seam", ne, 1, bool),
+        "uv": {uv.name: read_array(uv.data, "uv", nl, 2) for uv in mesh.uv_layers},
+        "attrs": {},
+        "keys": {},
+        "key_meta": [],
+    }
+    key = mesh.shape_keys
+    if key is not None:
+        for kb in key.key_blocks:
+            data["keys"][kb.name] = read_array(kb.data, "co", nv, 3)
+            data["key_meta"].append({
+                "name": kb.name,
+                "relative_key": kb.relative_key.name,
+                "value": kb.value,
+                "slider_min": kb.slider_min,
+                "slider_max": kb.slider_max,
+                "mute": kb.mute,
+                "interpolation": kb.interpolation,
+            })
+    sizes = {'POINT': nv, 'EDGE': ne, 'CORNER': nl, 'FACE': nf}
+    for attr in mesh.attributes:
+        name = attr.name
+        if name.startswith(".") or name in SKIP_ATTRS or name in uv_names:
+            continue
+        layout = ATTR_LAYOUT.get(attr.data_type)
+        if layout is None or attr.domain not in sizes:
+            continue
+        key, width, dtype = layout
+        data["attrs"][name] = (attr.domain, attr.data_type,
+                               read_array(attr.data, key, sizes[attr.domain], width, dtype))
+    return data
+
+
+def build_mesh(name, data):
+    """用数组直接建网格，不经过 from_pydata 的 Python 列表"""
+    mesh = bpy.data.meshes.new(name)
+    nv, ne, nl, nf = len(data["co"]), len(data["edges"]), len(data["loop_vert"]), len(data["loop_start"])
+    mesh.vertices.add(nv)
+    mesh.vertices.foreach_set("co", data["co"].ravel())
+    mesh.edges.add(ne)
+    mesh.edges.foreach_set("vertices", data["edges"].ravel())
+    mesh.loops.add(nl)
+    mesh.loops.foreach_set("vertex_index", data["loop_vert"])
+    mesh.loops.foreach_set("edge_index", data["loop_edge"])
+    mesh.polygons.add(nf)
+    mesh.polygons.foreach_set("loop_start", data["loop_start"])
+    try:
+        # 4.0 之前需要显式写 loop_total，之后由 loop_start 推导且只读
+        loop_total = np.diff(np.append(data["loop_start"], nl)).astype(np.int32)
+        mesh.polygons.foreach_set("loop_total", loop_total)
+    except (AttributeError, TypeError, RuntimeError):
+        pass
+    mesh.polygons.foreach_set("material_index", data["material"])
+    mesh.polygons.foreach_set("use_smooth", data["smooth"])
+    if ne:
+        mesh.edges.foreach_set("use_seam", data["seam"])
+
+    for uv_name, uv in data["uv"].items():
+        mesh.uv_layers.new(name=uv_name).data.foreach_set("uv", uv.ravel())
+
+    for attr_name, (domain, data_type, values) in data["attrs"].items():
+        attr = mesh.attributes.get(attr_name) or mesh.attributes.new(attr_name, data_type, domain)
+        attr.data.foreach_set(ATTR_LAYOUT[data_type][0], values.ravel())
+
+    mesh.update()
+    return mesh
+
+
+def add_shape_keys(obj, key_meta, key_cos, action=None):
+    """在 obj 上按 key_meta 的顺序重建形态键 (第一个是基础形态)；形态键只能挂在物体上，所以不放进 build_mesh"""
+    if not key_meta:
+        return
+    blocks = {}
+    for meta in key_meta:
+        kb = obj.shape_key_add(name=meta["name"], from_mix=False)
+        kb.data.foreach_set("co", key_cos[meta["name"]].ravel())
+        blocks[meta["name"]] = kb
+    for meta in key_meta:
+        kb = blocks[meta["name"]]
+        kb.relative_key = blocks.get(meta["relative_key"], kb.relative_key)
+        kb.slider_min = meta["slider_min"]
+        kb.slider_max = meta["slider_max"]
+        kb.value = meta["value"]
+        kb.mute = meta["mute"]
+        kb.interpolation = meta["interpolation"]
+    if action is not None:
+        obj.data.shape_keys.animation_data_create().action = action
+
+
+def transform_points(co, matrix):
+    m = np.array(matrix, dtype=np.float64)
+    return (co @ m[:3, :3].T + m[:3, 3]).astype(np.float32)
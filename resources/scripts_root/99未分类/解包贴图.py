@@ -1,6 +1,149 @@
 # script_id: aebca242-92ec-4af3-8b7c-fd340fed80a4
 import os
 import bpy
+import json
+import zlib
+import struct
+import hashlib
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# 解包流水线：
+#   主线程  —— 只负责取出打包字节或用 foreach_get 读像素 (bpy 只能在主线程访问)
+#   线程池  —— 计算内容哈希、编码 PNG/TGA/JPEG、写文件 (zlib/numpy/文件IO 都会释放 GIL)
+#   最后    —— 一次性把所有图片的路径改到新文件并去掉打包数据
+# 目标目录里有一个清单文件，内容哈希没变且文件还在就直接跳过。
+
+MANIFEST_NAME = ".unpack_manifest.json"
+EXTENSIONS = {'PNG': 'png', 'JPEG': 'jpg', 'TARGA': 'tga'}
+
+
+# —— 0. 编码器 (纯 numpy + zlib，可在线程里运行) ——
+def to_uint8_rows(pixels, width, height, channels):
+    """Blender 像素是从下往上的 float，转成从下往上的 uint8 (H, W, C)"""
+    data = np.clip(pixels.reshape(height, width, channels) * 255.0 + 0.5, 0, 255)
+    return data.astype(np.uint8)
+
+
+def encode_png(img8):
+    height, width, channels = img8.shape
+    color_type = {1: 0, 2: 4, 3: 2, 4: 6}[channels]
+    rows = img8[::-1].reshape(height, width * channels)   # PNG 从上往下
+    raw = np.empty((height, width * channels + 1), dtype=np.uint8)
+    raw[:, 0] = 0                                          # 每行过滤类型: None
+    raw[:, 1:] = rows
+
+    def chunk(tag, payload):
+        return (struct.pack(">I", len(payload)) + tag + payload
+                + struct.pack(">I", zlib.crc32(tag + payload) & 0xFFFFFFFF))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)) + chunk(b"IEND", b""))
+
+
+def encode_tga(img8):
+    height, width, channels = img8.shape
+    if channels == 2:
+        img8 = img8[..., :1]
+        channels = 1
+    if channels >= 3:
+        # TGA 存 BGR(A)，原点在左下角，正好对上 Blender 的行顺序
+        img8 = img8[..., [2, 1, 0, 3][:channels]]
+    image_type = 3 if channels == 1 else 2
+    alpha_bits = 8 if channels == 4 else 0
+    header = struct.pack("<BBBHHBHHHHBB", 0, 0, image_type, 0, 0, 0, 0, 0,
+                         width, height, channels * 8, alpha_bits)
+    return header + np.ascontiguousarray(img8).tobytes()
+
+
+def encode_jpeg(img8):
+    # 标准库没有 JPEG 编码器，装了 Pillow 就用，否则交回主线程用 save_render
+    from PIL import Image
+    import io
+    height, width, channels = img8.shape
+    mode = {1: "L", 3: "RGB", 4: "RGB"}.get(channels)
+    if mode is None:
+        raise ImportError("unsupported channel count")
+    buf = io.BytesIO()
+    Image.fromarray(img8[::-1, :, :3] if channels >= 3 else img8[::-1, :, 0], mode).save(buf, "JPEG", quality=90)
+    return buf.getvalue()
+
+
+ENCODERS = {'PNG': encode_png, 'TARGA': encode_tga, 'JPEG': encode_jpeg}
+
+
+def packed_matches_format(data, file_format):
+    """打包字节本身就是目标格式时，直接落盘，不用解码再编码"""
+    head = bytes(data[:4])
+    if file_format == 'PNG':
+        return head == b"\x89PNG"
+    if file_format == 'JPEG':
+        return head[:2] == b"\xff\xd8"
+    return False
+
+
+def content_hash(*parts):
+    sha = hashlib.sha1()
+    for part in parts:
+        sha.update(part if isinstance(part, (bytes, bytearray, memoryview)) else str(part).encode())
+    return sha.hexdigest()
+
+
+def process_job(job, manifest, replace_existing):
+    """线程池里运行：算哈希 -> 判断跳过 -> 编码 -> 写文件，返回 (状态, 哈希)"""
+    fullpath = job["path"]
+    if job["kind"] == 'RAW':
+        digest = content_hash(job["data"], job["format"])
+    else:
+        digest = content_hash(job["pixels"].data, job["size"], job["format"])
+
+    exists = os.path.exists(fullpath)
+    if exists and manifest.get(os.path.basename(fullpath)) == digest:
+        return 'UNCHANGED', digest
+    if exists and not replace_existing:
+        return 'EXISTS', digest
+
+    if job["kind"] == 'RAW':
+        payload = job["data"]
+    else:
+        width, height, channels = job["size"]
+        img8 = to_uint8_rows(job["pixels"], width, height, channels)
+        try:
+            payload = ENCODERS[job["format"]](img8)
+        except ImportError:
+            return 'FALLBACK', digest
+
+    tmp_path = fullpath + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+    os.replace(tmp_path, fullpath)
+    return 'SAVED', digest
+
+
+def unique_filename(stem, ext, used):
+    """clean_name 可能把不同的图片名映射成同一个文件名；在主线程里加后缀区分，避免两个任务写同一个文件"""
+    filename = f"{stem}.{ext}"
+    n = 1
+    while filename.lower() in used:
+        filename = f"{stem}_{n}.{ext}"
+        n += 1
+    used.add(filename.lower())
+    return filename
+
+
+def load_manifest(target_dir):
+    try:
+        with open(os.path.join(target_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(target_dir, manifest):
+    with open(os.path.join(target_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
 
 # —— 1. 定义临时 Operator —— 
 class TEMP_OT_unpack_images(bpy.types.Operator):
@@ -30,6 +173,17 @@ class TEMP_OT_unpack_images(bpy.types.Operator):
         description="如果目标路径已有同名文件，是否覆盖",
         default=True,
     )
+    relink: bpy.props.BoolProperty(
+        name="重新链接到新文件",
+        description="全部写完后，把图片路径改到新文件并移除打包数据",
+        default=True,
+    )
+    workers: bpy.props.IntProperty(
+        name="并行线程数",
+        default=max(1, (os.cpu_count() or 4) - 1),
+        min=1,
+        max=64,
+    )
 
     @classmethod
     def poll(cls, context):
@@ -40,43 +194,117 @@ class TEMP_OT_unpack_images(bpy.types.Operator):
         # 弹出属性对话框
         return context.window_manager.invoke_props_dialog(self)
 
+    def build_job(self, img, fullpath):
+        """主线程：只取数据，不做任何编码"""
+        data = img.packed_file.data
+        if packed_matches_format(data, self.file_format):
+            return {"kind": 'RAW', "data": data, "path": fullpath, "format": self.file_format}
+        if img.is_float:
+            # 浮点图需要视图变换，交给 Blender 自己保存
+            return None
+        width, height = img.size
+        channels = img.channels
+        if width == 0 or height == 0:
+            return None
+        pixels = np.empty(width * height * channels, dtype=np.float32)
+        img.pixels.foreach_get(pixels)
+        return {"kind": 'PIXELS', "pixels": pixels, "size": (width, height, channels),
+                "path": fullpath, "format": self.file_format}
+
+    def save_on_main_thread(self, img, fullpath):
+        # 保存前暂存原格式
+        orig_fmt = img.file_format
+        img.file_format = self.file_format
+        try:
+            # 推荐使用 save_render，兼容大多数类型
+            img.save_render(fullpath)
+            return True
+        except Exception as e:
+            self.report({'WARNING'}, f"保存失败: {os.path.basename(fullpath)} -> {e}")
+            return False
+        finally:
+            # 恢复原始格式设置
+            img.file_format = orig_fmt
+
     def execute(self, context):
         # 计算目标目录
         blend_dir = os.path.dirname(bpy.data.filepath)
         target_dir = os.path.join(blend_dir, self.subfolder)
         os.makedirs(target_dir, exist_ok=True)
+        manifest = load_manifest(target_dir)
+        ext = EXTENSIONS[self.file_format]
 
-        count = 0
-        for img in bpy.data.images:
-            # 只处理已打包的图片，或者所有图片？可自行改逻辑
-            if img.packed_file:
-                # 保存前暂存原格式
-                orig_fmt = img.file_format
-                img.file_format = self.file_format
+        written = {}        # image -> fullpath，最后统一重新链接
+        fallback = []
+        counts = {'SAVED': 0, 'UNCHANGED': 0, 'EXISTS': 0}
+        used_names = set()
 
-                # 构造文件名（确保合法）
-                name = bpy.path.clean_name(img.name)
-                ext = self.file_format.lower() if self.file_format != 'JPEG' else 'jpg'
-                filename = f"{name}.{ext}"
-                fullpath = os.path.join(target_dir, filename)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            pending = {}
 
-                # 如果不覆盖且文件存在就跳过
-                if not self.replace_existing and os.path.exists(fullpath):
-                    print(f"跳过已存在：{filename}")
-                else:
+            def collect(done):
+                for fut in done:
+                    img, fullpath = pending.pop(fut)
                     try:
-                        # 将图片保存到磁盘
-                        # 推荐使用 save_render，兼容大多数类型
-                        img.save_render(fullpath)
-                        count += 1
-                        print(f"Saved: {fullpath}")
+                        status, digest = fut.result()
                     except Exception as e:
-                        self.report({'WARNING'}, f"保存失败: {filename} -> {e}")
-                    finally:
-                        # 恢复原始格式设置
-                        img.file_format = orig_fmt
+                        self.report({'WARNING'}, f"保存失败: {os.path.basename(fullpath)} -> {e}")
+                        continue
+                    if status == 'FALLBACK':
+                        fallback.append((img, fullpath))
+                        continue
+                    counts[status] += 1
+                    # 只有文件内容确实是这份数据 (刚写的或核对过的) 才记进清单；
+                    # EXISTS 时磁盘上是不相干的旧文件，记了会让下次误判为 UNCHANGED
+                    if status != 'EXISTS':
+                        manifest[os.path.basename(fullpath)] = digest
+                        written[img] = fullpath
+                    print(f"{status}: {fullpath}")
+
+            for img in bpy.data.images:
+                # 只处理已打包的图片
+                if not img.packed_file:
+                    continue
+                # 构造文件名（确保合法）
+                filename = unique_filename(bpy.path.clean_name(img.name), ext, used_names)
+                fullpath = os.path.join(target_dir, filename)
+
+                job = self.build_job(img, fullpath)
+                if job is None:
+                    fallback.append((img, fullpath))
+                    continue
+                # 控制同时在飞的任务数，避免一次把所有 8K 像素都读进内存
+                while len(pending) >= self.workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending[pool.submit(process_job, job, manifest.copy(), self.replace_existing)] = (img, fullpath)
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        # 浮点图 / 缺少编码器的格式：退回主线程串行保存
+        for img, fullpath in fallback:
+            if not self.replace_existing and os.path.exists(fullpath):
+                counts['EXISTS'] += 1
+                continue
+            if self.save_on_main_thread(img, fullpath):
+                counts['SAVED'] += 1
+                written[img] = fullpath
+                # 主线程保存没有算哈希，旧记录已不对应这个文件
+                manifest.pop(os.path.basename(fullpath), None)
+
+        save_manifest(target_dir, manifest)
+
+        if self.relink:
+            # 所有文件写完后一次性改路径，中途失败也不会留下半链接的状态
+            for img, fullpath in written.items():
+                img.filepath = bpy.path.relpath(fullpath)
+                img.file_format = self.file_format
+                img.unpack(method='REMOVE')
 
-        self.report({'INFO'}, f"共解包并保存 {count} 张图片到：{self.subfolder}")
+        self.report({'INFO'}, f"保存 {counts['SAVED']} 张，未变化跳过 {counts['UNCHANGED']} 张，"
+                              f"已存在跳过 {counts['EXISTS']} 张 -> {self.subfolder}")
         # 执行完毕后注销自己
         bpy.utils.unregister_class(self.__class__)
         return {'FINISHED'}
@@ -1,7 +1,22 @@
 # script_id: 34a097fd-e010-4013-a1d2-03404d6725c4
 import bpy
+import os
 import json
-from mathutils import Vector    # 仅为将来拆分时可能用到，这里先保留
+import runpy
+import numpy as np
+
+# ------------------------------------------------------------------------------
+#   网格数组读写 (合并/拆分两个脚本共用，只在同目录的 网格数组.py 里定义一份)
+# ------------------------------------------------------------------------------
+_mesh_arrays = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(globals().get("__file__", ""))),
+                                           "网格数组.py"))
+PARTS_PROP = _mesh_arrays["PARTS_PROP"]
+ATTR_LAYOUT = _mesh_arrays["ATTR_LAYOUT"]
+read_mesh_arrays = _mesh_arrays["read_mesh_arrays"]
+build_mesh = _mesh_arrays["build_mesh"]
+add_shape_keys = _mesh_arrays["add_shape_keys"]
+transform_points = _mesh_arrays["transform_points"]
+
 
 # ------------------------------------------------------------------------------
 # 1.  清空顶点组
@@ -42,12 +57,134 @@ def clear_all_vertex_groups():
 # ------------------------------------------------------------------------------
 # 2.  为选中的每个网格对象创建顶点组、记录原点与材质，并合并
 # ------------------------------------------------------------------------------
+def merge_mesh_data(objs, target):
+    """在数据层把 objs 拼到 target 的局部空间里，返回 (合并数组, 材质列表, 分段记录)"""
+    inv_target = np.linalg.inv(np.array(target.matrix_world))
+    materials = []
+    parts_data, records = [], []
+    v = e = l = f = 0
+
+    for obj in objs:
+        d = read_mesh_arrays(obj.data)
+        to_target = inv_target @ np.array(obj.matrix_world)
+        d["co"] = transform_points(d["co"], to_target)
+        d["keys"] = {name: transform_points(co, to_target) for name, co in d["keys"].items()}
+
+        # 材质：按对象的本地槽位 -> 合并后的槽位，索引平移而不是逐个删槽
+        slot_map = []
+        for slot in obj.material_slots:
+            if slot.material not in materials:
+                materials.append(slot.material)
+            slot_map.append(materials.index(slot.material))
+        if slot_map:
+            table = np.array(slot_map, dtype=np.int32)
+            d["material"] = table[np.clip(d["material"], 0, len(table) - 1)]
+        else:
+            if None not in materials:
+                materials.append(None)
+            d["material"] = np.full_like(d["material"], materials.index(None))
+
+        nv, ne, nl, nf = len(d["co"]), len(d["edges"]), len(d["loop_vert"]), len(d["loop_start"])
+        d["edges"] = d["edges"] + v
+        d["loop_vert"] = d["loop_vert"] + v
+        d["loop_edge"] = d["loop_edge"] + e
+        d["loop_start"] = d["loop_start"] + l
+        parts_data.append(d)
+        records.append({
+            "name": obj.name,
+            "mesh_name": obj.data.name,
+            "vertices": [v, v + nv],
+            "edges": [e, e + ne],
+            "loops": [l, l + nl],
+            "faces": [f, f + nf],
+            "matrix_world": [list(row) for row in obj.matrix_world],
+            "materials": slot_map,
+            "active_index": obj.active_material_index,
+            "shape_keys": d["key_meta"],
+            "shape_key_action": shape_key_action(obj.data),
+        })
+        v, e, l, f = v + nv, e + ne, l + nl, f + nf
+
+    merged = {key: np.concatenate([d[key] for d in parts_data])
+              for key in ("co", "edges", "loop_vert", "loop_edge", "loop_start", "material", "smooth", "seam")}
+
+    # UV / 属性取并集，缺少该层的部分补零
+    sizes = {"POINT": "co", "EDGE": "edges", "CORNER": "loop_vert", "FACE": "loop_start"}
+    uv_names = list(dict.fromkeys(name for d in parts_data for name in d["uv"]))
+    merged["uv"] = {name: np.concatenate([d["uv"].get(name, np.zeros((len(d["loop_vert"]), 2), np.float32))
+                                          for d in parts_data]) for name in uv_names}
+    merged["attrs"] = {}
+    for d in parts_data:
+        for name, (domain, data_type, _) in d["attrs"].items():
+            if name in merged["attrs"]:
+                continue
+            chunks = []
+            for other in parts_data:
+                entry = other["attrs"].get(name)
+                if entry and entry[0] == domain and entry[1] == data_type:
+                    chunks.append(entry[2])
+                else:
+                    _, width, dtype = ATTR_LAYOUT[data_type]
+                    count = len(other[sizes[domain]])
+                    chunks.append(np.zeros((count, width) if width > 1 else count, dtype=dtype))
+            merged["attrs"][name] = (domain, data_type, np.concatenate(chunks))
+
+    merge_shape_keys(parts_data, records, merged)
+    return merged, materials, records
+
+
+def shape_key_action(mesh):
+    key = mesh.shape_keys
+    anim = key.animation_data if key is not None else None
+    return anim.action.name if anim is not None and anim.action is not None else None
+
+
+def merge_shape_keys(parts_data, records, merged):
+    """
+    形态键取并集：各部分的基础形态合成一个 (用第一个有形态键的部分的名字)，
+    缺少某个形态键的部分填它对应的相对形态 (没有就填基础形态)，即该部分上位移为 0。
+    每条形态键在合并网格里的名字记到 records[i]["shape_keys"][j]["merged"]，拆分时按它切回去
+    """
+    merged["keys"], merged["key_meta"] = {}, []
+    keyed = [d for d in parts_data if d["key_meta"]]
+    if not keyed:
+        return
+    reference = keyed[0]["key_meta"][0]["name"]
+
+    metas = {}
+    for d, rec in zip(parts_data, records):
+        own_reference = d["key_meta"][0]["name"] if d["key_meta"] else None
+        for meta in rec["shape_keys"]:
+            meta["merged"] = reference if meta["name"] == own_reference else meta["name"]
+            if meta["merged"] not in metas:
+                entry = dict(meta, name=meta["merged"])
+                if entry["relative_key"] == own_reference:
+                    entry["relative_key"] = reference
+                del entry["merged"]
+                metas[entry["name"]] = entry
+    merged["key_meta"] = list(metas.values())
+
+    chunks = {name: [] for name in metas}
+    for d, rec in zip(parts_data, records):
+        by_merged = {meta["merged"]: d["keys"][meta["name"]] for meta in rec["shape_keys"]}
+        base = by_merged.get(reference, d["co"])
+        resolved = {}
+        for name, meta in metas.items():
+            co = by_merged.get(name)
+            if co is None:
+                co = resolved.get(meta["relative_key"], base)
+            resolved[name] = co
+            chunks[name].append(co)
+    merged["keys"] = {name: np.concatenate(parts) for name, parts in chunks.items()}
+    merged["key_action"] = next((bpy.data.actions.get(rec["shape_key_action"]) for rec in records
+                                 if rec["shape_key_action"]), None)
+
+
 def 添加顶点组并合并():
     """
-    • 为每个选中的网格对象创建一个与对象同名的顶点组并把全部顶点加入该组  
-    • 记录每个对象的世界原点位置(origin_locations)  
-    • 记录每个对象所使用的所有材质(material_info)  
-    • 最后把选中的对象合并为一个
+    • 在数据层直接拼接选中网格 (不走 bpy.ops.object.join)，缝合边和 (相对) 形态键一起带过去  
+    • 每个对象的 顶点/边/面角/面 区间、世界矩阵和材质槽映射记录到合并物体的 merge_parts  
+    • 仍为每个对象建一个同名顶点组，并保留旧的 origin_locations / material_info 场景属性
     """
     scene = bpy.context.scene
     sel_objs = [o for o in bpy.context.selected_objects if o.type == 'MESH']
@@ -55,43 +192,53 @@ def 添加顶点组并合并():
         print("❗ Please select at least one mesh object.")
         return
 
-    # ---------- 2.1 记录原点 ----------
-    origin_dict = {}
-    for obj in sel_objs:
-        world_loc = obj.matrix_world.to_translation()
-        origin_dict[obj.name] = [world_loc.x, world_loc.y, world_loc.z]
-    scene["origin_locations"] = json.dumps(origin_dict)
-    print(f"✅ Stored origins for {len(origin_dict)} objects → scene['origin_locations']")
-
-    # ---------- 2.2 记录材质信息 --------------  ## ← new
-    material_dict = {}
-    for obj in sel_objs:
-        mat_names = [slot.material.name for slot in obj.material_slots
-                     if slot.material is not None]
-        material_dict[obj.name] = {
-            "material_names": mat_names,       # 仅名称列表，后续拆分时用来判断保留
-            "active_index": obj.active_material_index
-        }
-    scene["material_info"] = json.dumps(material_dict)
-    print(f"✅ Stored material data for {len(material_dict)} objects → scene['material_info']")
-
-    # ---------- 2.3 为每个对象新建顶点组 ----------
-    for obj in sel_objs:
-        bpy.context.view_layer.objects.active = obj
+    absolute = [o.name for o in sel_objs if o.data.shape_keys and not o.data.shape_keys.use_relative]
+    if absolute:
+        print(f"❗ absolute shape keys are not supported by the merge: {', '.join(absolute)}")
+        return
+
+    target = bpy.context.active_object if bpy.context.active_object in sel_objs else sel_objs[0]
+    if target.mode != 'OBJECT':
         bpy.ops.object.mode_set(mode='OBJECT')
+    # 活动物体放在最前面，与 join 的顺序一致
+    objs = [target] + [o for o in sel_objs if o is not target]
+
+    # ---------- 2.1 兼容旧版拆分脚本的场景属性 ----------
+    scene["origin_locations"] = json.dumps({o.name: list(o.matrix_world.to_translation()) for o in objs})
+    scene["material_info"] = json.dumps({
+        o.name: {"material_names": [s.material.name for s in o.material_slots if s.material],
+                 "active_index": o.active_material_index}
+        for o in objs})
 
-        if obj.vertex_groups.get(obj.name):
-            obj.vertex_groups.remove(obj.vertex_groups[obj.name])
+    # ---------- 2.2 数据层合并 ----------
+    merged, materials, records = merge_mesh_data(objs, target)
+    new_mesh = build_mesh(target.data.name, merged)
+    for mat in materials:
+        new_mesh.materials.append(mat)
 
-        vg = obj.vertex_groups.new(name=obj.name)
-        vg.add([v.index for v in obj.data.vertices], 1.0, 'REPLACE')
+    old_meshes = {o.data for o in objs}
+    target.data = new_mesh
+    add_shape_keys(target, merged["key_meta"], merged["keys"], merged.get("key_action"))
+    for obj in objs[1:]:
+        bpy.data.objects.remove(obj)
+    for mesh in old_meshes:
+        if mesh.users == 0:
+            bpy.data.meshes.remove(mesh)
 
-    # ---------- 2.4 合并 ----------
-    bpy.ops.object.mode_set(mode='OBJECT')
-    for o in sel_objs:
-        o.select_set(True)
-    bpy.ops.object.join()
-    print("✅ Merge finished and vertex groups added.")
+    # ---------- 2.3 每个部分一个顶点组 + 区间记录 ----------
+    target.vertex_groups.clear()
+    for rec in records:
+        vg = target.vertex_groups.new(name=rec["name"])
+        v0, v1 = rec["vertices"]
+        vg.add(list(range(v0, v1)), 1.0, 'REPLACE')
+    target[PARTS_PROP] = json.dumps({
+        "counts": [len(new_mesh.vertices), len(new_mesh.edges), len(new_mesh.loops), len(new_mesh.polygons)],
+        "parts": records,
+    })
+    target.select_set(True)
+    bpy.context.view_layer.objects.active = target
+    print(f"✅ Merged {len(records)} objects → '{target.name}' "
+          f"({len(new_mesh.vertices)} verts, {len(materials)} materials)")
 
 
 # ------------------------------------------------------------------------------
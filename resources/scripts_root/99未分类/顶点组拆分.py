@@ -5,16 +5,37 @@ and (crucially) remove every material slot that is **not** listed in the
 scene-stored “material_info” dictionary.  
 Works in Blender 2.80+.
 
-Prerequisite:  
+If the merge script recorded obj["merge_parts"] (per-part vertex/edge/loop/face
+ranges, world matrix, material slot map and shape keys) and the mesh counts still match,
+each part is rebuilt directly from sliced arrays — no bpy.ops, no duplicate +
+delete, materials remapped by index translation.  Otherwise the vertex-group
+path below is used.
+
+Prerequisite (vertex-group path):  
 在合并阶段你应已写入  
     scene["origin_locations"] : {"ObjName":[x,y,z], …}  
     scene["material_info"]    : {"ObjName":{"material_names":[…]}, …}
 """
 
 import bpy
+import os
 import json
+import runpy
+import numpy as np
 from mathutils import Vector
 
+# ------------------------------------------------------------------------------
+#   网格数组读写 (合并/拆分两个脚本共用，只在同目录的 网格数组.py 里定义一份)
+# ------------------------------------------------------------------------------
+_mesh_arrays = runpy.run_path(os.path.join(os.path.dirname(os.path.abspath(globals().get("__file__", ""))),
+                                           "网格数组.py"))
+PARTS_PROP = _mesh_arrays["PARTS_PROP"]
+read_array = _mesh_arrays["read_array"]
+read_mesh_arrays = _mesh_arrays["read_mesh_arrays"]
+build_mesh = _mesh_arrays["build_mesh"]
+add_shape_keys = _mesh_arrays["add_shape_keys"]
+transform_points = _mesh_arrays["transform_points"]
+
 
 # -----------------------------------------------------------------------------#
 #   Helper : physically delete material slots that are NOT in keep_names       #
@@ -23,44 +44,143 @@ def purge_unused_slots(obj, keep_names: set) -> int:
     """
     Keep only the materials whose names are in keep_names.
     Return the number of removed slots.
-    Uses bpy.ops.object.material_slot_remove() so polygon.material_index
-    will be remapped properly.
+    Polygon material indices are remapped through an old -> new index table,
+    then the slot list is rebuilt once (no material_slot_remove / selection).
     """
     if obj.type != 'MESH':
         return 0
 
-    bpy.ops.object.mode_set(mode='OBJECT')
-
-    # indices to remove (descending order)
-    remove_idx = [
-        i for i, slot in enumerate(obj.material_slots)
-        if slot.material and slot.material.name not in keep_names
-    ]
-    if not remove_idx:
+    mesh = obj.data
+    mats = list(mesh.materials)
+    keep = [i for i, m in enumerate(mats) if m is None or m.name in keep_names]
+    removed = len(mats) - len(keep)
+    if not removed:
         return 0
-    remove_idx.sort(reverse=True)
 
-    # store current context selection / active object
-    view_layer = bpy.context.view_layer
-    prev_active = view_layer.objects.active
-    prev_selected = {o for o in view_layer.objects if o.select_get()}
+    table = np.zeros(max(len(mats), 1), dtype=np.int32)
+    table[keep] = np.arange(len(keep), dtype=np.int32)
+    mat_index = read_array(mesh.polygons, "material_index", len(mesh.polygons), 1, np.int32)
+    mesh.polygons.foreach_set("material_index", table[np.clip(mat_index, 0, len(table) - 1)])
 
-    # make obj selected & active
-    bpy.ops.object.select_all(action='DESELECT')
-    obj.select_set(True)
-    view_layer.objects.active = obj
+    mesh.materials.clear()
+    for i in keep:
+        mesh.materials.append(mats[i])
+    return removed
 
-    for idx in remove_idx:
-        obj.active_material_index = idx
-        bpy.ops.object.material_slot_remove()
 
-    # restore previous selection / active
-    bpy.ops.object.select_all(action='DESELECT')
-    for o in prev_selected:
-        o.select_set(True)
-    view_layer.objects.active = prev_active
+# -----------------------------------------------------------------------------#
+#   Fast path : rebuild every part from the ranges recorded during merge       #
+# -----------------------------------------------------------------------------#
+def load_merge_parts(src):
+    """Return the recorded part list, or None if missing / mesh was edited."""
+    try:
+        info = json.loads(src.get(PARTS_PROP, ""))
+    except (TypeError, ValueError):
+        return None
+    mesh = src.data
+    counts = [len(mesh.vertices), len(mesh.edges), len(mesh.loops), len(mesh.polygons)]
+    if info.get("counts") != counts:
+        print("⚠ mesh topology changed since merge, falling back to vertex-groups.")
+        return None
+    return info["parts"]
+
+
+def slice_part(data, part):
+    """Cut one part out of the merged arrays and rebase its indices."""
+    v0, v1 = part["vertices"]
+    e0, e1 = part["edges"]
+    l0, l1 = part["loops"]
+    f0, f1 = part["faces"]
+    ranges = {'POINT': (v0, v1), 'EDGE': (e0, e1), 'CORNER': (l0, l1), 'FACE': (f0, f1)}
+    return {
+        "co": data["co"][v0:v1],
+        "edges": data["edges"][e0:e1] - v0,
+        "loop_vert": data["loop_vert"][l0:l1] - v0,
+        "loop_edge": data["loop_edge"][l0:l1] - e0,
+        "loop_start": data["loop_start"][f0:f1] - l0,
+        "material": data["material"][f0:f1],
+        "smooth": data["smooth"][f0:f1],
+        "seam": data["seam"][e0:e1],
+        "uv": {name: uv[l0:l1] for name, uv in data["uv"].items()},
+        "attrs": {name: (domain, data_type, values[slice(*ranges[domain])])
+                  for name, (domain, data_type, values) in data["attrs"].items()},
+        # only the shape keys this part had before the merge, under its own names
+        "keys": {meta["name"]: data["keys"][meta["merged"]][v0:v1]
+                 for meta in part.get("shape_keys", []) if meta["merged"] in data["keys"]},
+    }
+
+
+def build_part(data, part, src_matrix, merged_mats, collections):
+    """Build one part's object from the merged arrays; None if the part is empty."""
+    piece = slice_part(data, part)
+    if not len(piece["co"]):
+        print(f"  - skip empty part '{part['name']}'")
+        return None
+
+    part_matrix = np.array(part["matrix_world"])
+    to_part = np.linalg.inv(part_matrix) @ src_matrix
+    piece["co"] = transform_points(piece["co"], to_part)
+    piece["keys"] = {name: transform_points(co, to_part) for name, co in piece["keys"].items()}
 
-    return len(remove_idx)
+    # material: merged slot index -> this part's own slot index
+    slot_map = part["materials"]
+    table = np.zeros(max(len(merged_mats), 1), dtype=np.int32)
+    for local, merged in reversed(list(enumerate(slot_map))):
+        table[merged] = local
+    piece["material"] = table[np.clip(piece["material"], 0, len(table) - 1)]
+
+    mesh = build_mesh(part.get("mesh_name", part["name"]), piece)
+    for merged in slot_map:
+        mesh.materials.append(merged_mats[merged] if merged < len(merged_mats) else None)
+
+    obj = bpy.data.objects.new(part["name"], mesh)
+    try:
+        obj.matrix_world = [tuple(row) for row in part["matrix_world"]]
+        obj.active_material_index = min(part.get("active_index", 0), max(len(slot_map) - 1, 0))
+        key_meta = [meta for meta in part.get("shape_keys", []) if meta["name"] in piece["keys"]]
+        action_name = part.get("shape_key_action")
+        add_shape_keys(obj, key_meta, piece["keys"], bpy.data.actions.get(action_name) if action_name else None)
+        for col in collections:
+            col.objects.link(obj)
+    except Exception:
+        bpy.data.objects.remove(obj)
+        bpy.data.meshes.remove(mesh)
+        raise
+    return obj
+
+
+def split_by_recorded_parts(src, parts):
+    data = read_mesh_arrays(src.data)
+    src_matrix = np.array(src.matrix_world)
+    merged_mats = list(src.data.materials)
+    collections = list(src.users_collection) or [bpy.context.scene.collection]
+
+    # build every part while the source still exists, so a failure midway
+    # leaves the merged object untouched
+    built = []
+    try:
+        for part in parts:
+            obj = build_part(data, part, src_matrix, merged_mats, collections)
+            if obj is not None:
+                built.append((obj, part))
+    except Exception:
+        for obj, _ in built:
+            mesh = obj.data
+            bpy.data.objects.remove(obj)
+            if mesh.users == 0:
+                bpy.data.meshes.remove(mesh)
+        raise
+
+    # remove the source last, then give the parts their original object /
+    # mesh names back (they were ".001" while the source still held them)
+    src_mesh = src.data
+    bpy.data.objects.remove(src)
+    if src_mesh.users == 0:
+        bpy.data.meshes.remove(src_mesh)
+    for obj, part in built:
+        obj.name = part["name"]
+        obj.data.name = part.get("mesh_name", part["name"])
+    return [obj for obj, _ in built]
 
 
 # -----------------------------------------------------------------------------#
@@ -88,11 +208,23 @@ def split_mesh_by_vertex_groups():
     if not src or src.type != 'MESH':
         print("❗ please activate a mesh object before running.")
         return
-    if not src.vertex_groups:
+    if not src.vertex_groups and PARTS_PROP not in src:
         print("❗ active object has no vertex-groups.")
         return
 
     bpy.ops.object.mode_set(mode='OBJECT')
+
+    parts = load_merge_parts(src)
+    if parts is not None:
+        print(f"🚀 rebuilding {len(parts)} parts from '{src.name}' …")
+        created = split_by_recorded_parts(src, parts)
+        for obj in created:
+            obj.select_set(True)
+        if created:
+            bpy.context.view_layer.objects.active = created[0]
+        print(f"🎉 split done, {len(created)} objects rebuilt, source object removed.")
+        return
+
     vgroups = list(src.vertex_groups)
     print(f"🚀 splitting '{src.name}' into {len(vgroups)} objects …")
 
@@ -9,6 +9,41 @@
 import bpy
 import numpy as np
 
+def _keyframe_shape_sequence(obj, shape_keys, start_frame, total_steps, reverse_animation):
+    """给逐步形态键打 0-1-0 的常量关键帧"""
+    # 清理旧的动画数据
+    if obj.data.shape_keys.animation_data:
+        obj.data.shape_keys.animation_data_clear()
+
+    # 设置关键帧动画
+    keys_to_animate = shape_keys[:]
+    if reverse_animation:
+        keys_to_animate.reverse()
+
+    for i, sk in enumerate(keys_to_animate):
+        frame_num = start_frame + i
+        sk.value = 0.0
+        sk.keyframe_insert(data_path='value', frame=frame_num)
+        sk.value = 1.0
+        sk.keyframe_insert(data_path='value', frame=frame_num + 1)
+        sk.value = 0.0
+        sk.keyframe_insert(data_path='value', frame=frame_num + 2)
+
+    # 处理最后一个关键帧
+    if shape_keys and not reverse_animation:
+        last_sk = shape_keys[-1]
+        last_sk.value = 1.0
+        last_sk.keyframe_insert(data_path='value', frame=start_frame + total_steps)
+
+    # 设置关键帧插值模式
+    if obj.data.shape_keys.animation_data and obj.data.shape_keys.animation_data.action:
+        fcurves = obj.data.shape_keys.animation_data.action.fcurves
+        for fcurve in fcurves:
+            if 'value' in fcurve.data_path:
+                for kf in fcurve.keyframe_points:
+                    kf.interpolation = 'CONSTANT'
+
+
 def create_advanced_sliding_animation(context, total_steps=50, reverse=False, start_frame=1, auto_frame_range=True, reverse_animation=False):
     """创建高级滑动动画的核心函数"""
     active_obj = context.active_object
@@ -93,37 +128,7 @@ def create_advanced_sliding_animation(context, total_steps=50, reverse=False, st
             new_sk.data.foreach_set('co', new_coords.ravel())
             new_coords[verts_to_move_mask] = basis_coords[verts_to_move_mask]
 
-        # 清理旧的动画数据
-        if active_obj.data.shape_keys.animation_data:
-            active_obj.data.shape_keys.animation_data_clear()
-
-        # 设置关键帧动画
-        keys_to_animate = new_shape_keys[:]
-        if reverse_animation:
-            keys_to_animate.reverse()
-
-        for i, sk in enumerate(keys_to_animate):
-            frame_num = start_frame + i
-            sk.value = 0.0
-            sk.keyframe_insert(data_path='value', frame=frame_num)
-            sk.value = 1.0
-            sk.keyframe_insert(data_path='value', frame=frame_num + 1)
-            sk.value = 0.0
-            sk.keyframe_insert(data_path='value', frame=frame_num + 2)
-
-        # 处理最后一个关键帧
-        if new_shape_keys and not reverse_animation:
-            last_sk = new_shape_keys[-1]
-            last_sk.value = 1.0
-            last_sk.keyframe_insert(data_path='value', frame=start_frame + total_steps)
-
-        # 设置关键帧插值模式
-        if active_obj.data.shape_keys.animation_data and active_obj.data.shape_keys.animation_data.action:
-            fcurves = active_obj.data.shape_keys.animation_data.action.fcurves
-            for fcurve in fcurves:
-                if 'value' in fcurve.data_path:
-                    for kf in fcurve.keyframe_points:
-                        kf.interpolation = 'CONSTANT'
+        _keyframe_shape_sequence(active_obj, new_shape_keys, start_frame, total_steps, reverse_animation)
 
         # 设置场景帧范围
         if auto_frame_range:
@@ -138,6 +143,268 @@ def create_advanced_sliding_animation(context, total_steps=50, reverse=False, st
             context.scene.frame_end = original_end
 
 
+# ──────────────────────────────────────────────────────────
+#   快速/稀疏版本
+#   顶点按主轴排序一次，所有步的目标点向量化算出；
+#   第 i 步要移动的顶点恰好是排序后的前缀，所以不需要逐步求掩码和还原。
+#   GEONODES 模式只存一个整型属性 (每个顶点从第几步开始移动) 和 N 个目标点，
+#   由一个几何节点修改器 + 一条 "步数" 关键帧曲线驱动，内存与步数几乎无关。
+# ──────────────────────────────────────────────────────────
+SLIDE_ATTR = "slide_step"
+SLIDE_MOD_NAME = "管道滑动"
+SLIDE_TREE_NAME = "管道滑动_GN"
+
+
+def plan_slide(basis_coords, main_axis_index, total_steps, reverse=False):
+    """返回 (move_step, targets, order, counts)
+
+    move_step[v]  顶点 v 从第几步开始移动 (total_steps+1 表示始终不动)
+    targets[i-1]  第 i 步被移动顶点的目标点
+    order/counts  按主轴排序后的顶点顺序，以及每一步需要移动的前缀长度
+    """
+    axis_coords = basis_coords[:, main_axis_index]
+    lo, hi = float(axis_coords.min()), float(axis_coords.max())
+    length = hi - lo
+    if np.isclose(length, 0):
+        return None
+
+    # 归一化的 "距起点距离"，反向时从另一端量
+    d = (hi - axis_coords) / length if reverse else (axis_coords - lo) / length
+    order = np.argsort(d, kind='stable')
+    d_sorted = d[order]
+
+    # 第 i 步移动 d < i/N 的顶点 -> 排序后的前缀
+    counts = np.searchsorted(d_sorted, np.arange(1, total_steps + 1) / total_steps, side='left')
+    move_step = np.minimum(np.floor(d * total_steps).astype(np.int32) + 1, total_steps + 1)
+    move_step[np.isclose(d, 1.0)] = total_steps + 1
+
+    # 每个切片 [k/N, (k+1)/N) 的质心，一次 bincount 算完
+    slice_index = np.minimum(np.floor(d * total_steps).astype(np.int64), total_steps)
+    slice_count = np.bincount(slice_index, minlength=total_steps + 1)
+    slice_sum = np.stack([np.bincount(slice_index, weights=basis_coords[:, c], minlength=total_steps + 1)
+                          for c in range(3)], axis=1)
+
+    targets = np.empty((total_steps, 3), dtype=np.float64)
+    start_cap = np.isclose(d, 0.0)
+    last_known = basis_coords[start_cap].mean(axis=0) if np.any(start_cap) else basis_coords[order[0]]
+    for i in range(1, total_steps):
+        if slice_count[i]:
+            last_known = slice_sum[i] / slice_count[i]
+        targets[i - 1] = last_known
+    end_cap = np.isclose(d, 1.0)
+    targets[-1] = basis_coords[end_cap].mean(axis=0) if np.any(end_cap) else last_known
+
+    return move_step, targets.astype(np.float32), order, counts
+
+
+def _prepare_basis(obj):
+    """清理旧的滑动形态键，返回 Basis 坐标 (N, 3)"""
+    mesh = obj.data
+    if mesh.shape_keys:
+        for sk in mesh.shape_keys.key_blocks[:]:
+            if sk.name.startswith("Adv_Slide_"):
+                obj.shape_key_remove(sk)
+        basis = mesh.shape_keys.key_blocks[0].data
+    else:
+        basis = mesh.vertices
+    coords = np.empty(len(basis) * 3, dtype=np.float32)
+    basis.foreach_get('co', coords)
+    return coords.reshape((-1, 3))
+
+
+def create_fast_shape_key_slide(obj, total_steps, reverse, start_frame, reverse_animation):
+    """与旧版结果一致的形态键，但只排序一次，每步只改变新加入的前缀"""
+    basis_coords = _prepare_basis(obj)
+    plan = plan_slide(basis_coords, int(np.argmax(obj.dimensions)), total_steps, reverse)
+    if plan is None:
+        return None
+    _, targets, order, counts = plan
+
+    if not obj.data.shape_keys:
+        obj.shape_key_add(name='Basis')
+
+    new_shape_keys = []
+    new_coords = basis_coords.copy()
+    for i in range(total_steps):
+        # 前缀是嵌套的：上一步移动过的顶点这一步仍要移动，直接整体覆盖即可，无需还原
+        new_coords[order[:counts[i]]] = targets[i]
+        sk = obj.shape_key_add(name=f"Adv_Slide_{i + 1:03d}", from_mix=False)
+        sk.data.foreach_set('co', new_coords.ravel())
+        new_shape_keys.append(sk)
+
+    _keyframe_shape_sequence(obj, new_shape_keys, start_frame, total_steps, reverse_animation)
+    return new_shape_keys
+
+
+def _socket(sockets, name):
+    """按名字取当前可用的插槽 (同名插槽按数据类型切换显示)"""
+    return next(s for s in sockets if s.name == name and getattr(s, "enabled", True))
+
+
+def _new_interface_socket(tree, name, in_out, socket_type):
+    if hasattr(tree, "interface"):  # 4.0+
+        return tree.interface.new_socket(name=name, in_out=in_out, socket_type=socket_type)
+    sockets = tree.inputs if in_out == 'INPUT' else tree.outputs
+    return sockets.new(socket_type, name)
+
+
+def get_slide_node_tree():
+    """Set Position：slide_step <= 当前步 的顶点移到 路径物体[当前步-1] 的位置"""
+    tree = bpy.data.node_groups.get(SLIDE_TREE_NAME)
+    if tree:
+        return tree
+    tree = bpy.data.node_groups.new(SLIDE_TREE_NAME, 'GeometryNodeTree')
+    _new_interface_socket(tree, "Geometry", 'INPUT', 'NodeSocketGeometry')
+    _new_interface_socket(tree, "Path", 'INPUT', 'NodeSocketObject')
+    _new_interface_socket(tree, "Step", 'INPUT', 'NodeSocketInt')
+    _new_interface_socket(tree, "Geometry", 'OUTPUT', 'NodeSocketGeometry')
+
+    nodes, links = tree.nodes, tree.links
+    group_in = nodes.new('NodeGroupInput')
+    group_out = nodes.new('NodeGroupOutput')
+
+    step_attr = nodes.new('GeometryNodeInputNamedAttribute')
+    step_attr.data_type = 'INT'
+    _socket(step_attr.inputs, "Name").default_value = SLIDE_ATTR
+
+    compare = nodes.new('FunctionNodeCompare')
+    compare.data_type = 'INT'
+    compare.operation = 'LESS_EQUAL'
+    a, b = [s for s in compare.inputs if getattr(s, "enabled", True)][:2]
+    links.new(_socket(step_attr.outputs, "Attribute"), a)
+    links.new(group_in.outputs["Step"], b)
+
+    path_info = nodes.new('GeometryNodeObjectInfo')
+    path_info.transform_space = 'ORIGINAL'
+    links.new(group_in.outputs["Path"], path_info.inputs["Object"])
+
+    index = nodes.new('ShaderNodeMath')
+    index.operation = 'SUBTRACT'
+    index.inputs[1].default_value = 1.0
+    links.new(group_in.outputs["Step"], index.inputs[0])
+
+    sample = nodes.new('GeometryNodeSampleIndex')
+    sample.data_type = 'FLOAT_VECTOR'
+    sample.domain = 'POINT'
+    links.new(path_info.outputs["Geometry"], sample.inputs["Geometry"])
+    links.new(nodes.new('GeometryNodeInputPosition').outputs["Position"], _socket(sample.inputs, "Value"))
+    links.new(index.outputs[0], sample.inputs["Index"])
+
+    set_pos = nodes.new('GeometryNodeSetPosition')
+    links.new(group_in.outputs["Geometry"], set_pos.inputs["Geometry"])
+    links.new(compare.outputs[0], set_pos.inputs["Selection"])
+    links.new(_socket(sample.outputs, "Value"), set_pos.inputs["Position"])
+    links.new(set_pos.outputs["Geometry"], group_out.inputs[0])
+    return tree
+
+
+def _modifier_input_id(tree, name):
+    if hasattr(tree, "interface"):
+        return next(item.identifier for item in tree.interface.items_tree
+                    if getattr(item, "in_out", None) == 'INPUT' and item.name == name)
+    return tree.inputs[name].identifier
+
+
+def create_geonodes_slide(obj, total_steps, reverse, start_frame, reverse_animation):
+    """稀疏版本：每顶点一个 int 属性 + N 个目标点的路径物体 + 一条步数曲线"""
+    basis_coords = _prepare_basis(obj)
+    plan = plan_slide(basis_coords, int(np.argmax(obj.dimensions)), total_steps, reverse)
+    if plan is None:
+        return None
+    move_step, targets, _, _ = plan
+
+    mesh = obj.data
+    attr = mesh.attributes.get(SLIDE_ATTR) or mesh.attributes.new(SLIDE_ATTR, 'INT', 'POINT')
+    attr.data.foreach_set('value', move_step)
+
+    # 目标点存成一个只有顶点的网格物体 (原始空间坐标，与管道局部坐标一致)
+    path_name = f"{obj.name}_滑动路径"
+    path_obj = bpy.data.objects.get(path_name)
+    path_mesh = bpy.data.meshes.new(path_name)
+    path_mesh.vertices.add(total_steps)
+    path_mesh.vertices.foreach_set('co', targets.ravel())
+    if path_obj:
+        old_mesh = path_obj.data
+        path_obj.data = path_mesh
+        if old_mesh.users == 0:
+            bpy.data.meshes.remove(old_mesh)
+    else:
+        path_obj = bpy.data.objects.new(path_name, path_mesh)
+        for col in obj.users_collection:
+            col.objects.link(path_obj)
+    path_obj.hide_viewport = path_obj.hide_render = True
+
+    tree = get_slide_node_tree()
+    mod = obj.modifiers.get(SLIDE_MOD_NAME) or obj.modifiers.new(SLIDE_MOD_NAME, 'NODES')
+    mod.node_group = tree
+    mod[_modifier_input_id(tree, "Path")] = path_obj
+    step_id = _modifier_input_id(tree, "Step")
+    data_path = f'modifiers["{SLIDE_MOD_NAME}"]["{step_id}"]'
+
+    # 与形态键版本同样的时间轴：start+i 帧显示第 i 步 (反转时倒放，播完回到 0)
+    if obj.animation_data and obj.animation_data.action:
+        fc = obj.animation_data.action.fcurves.find(data_path)
+        if fc:
+            obj.animation_data.action.fcurves.remove(fc)
+    if reverse_animation:
+        frames = [(start_frame, 0)] + [(start_frame + j, total_steps - j + 1) for j in range(1, total_steps + 1)]
+        frames.append((start_frame + total_steps + 1, 0))
+    else:
+        frames = [(start_frame + i, i) for i in range(total_steps + 1)]
+    for frame, step in frames:
+        mod[step_id] = step
+        obj.keyframe_insert(data_path=data_path, frame=frame)
+
+    for fcurve in obj.animation_data.action.fcurves:
+        if fcurve.data_path == data_path:
+            for kf in fcurve.keyframe_points:
+                kf.interpolation = 'CONSTANT'
+    mesh.update()
+    return mod
+
+
+def benchmark_slide_methods(context, total_steps=50):
+    """在活动物体的临时副本上比较三种实现的耗时和数据量"""
+    import time
+    source = context.active_object
+    num_verts = len(source.data.vertices)
+    results = []
+
+    def run(label, fn):
+        tmp = source.copy()
+        tmp.data = source.data.copy()
+        tmp.animation_data_clear()
+        context.collection.objects.link(tmp)
+        try:
+            start = time.perf_counter()
+            with context.temp_override(active_object=tmp, object=tmp):
+                fn(tmp)
+            elapsed = time.perf_counter() - start
+            if tmp.data.shape_keys:
+                stored = len(tmp.data.shape_keys.key_blocks) * num_verts * 12
+            else:
+                stored = num_verts * 4 + total_steps * 12
+            results.append((label, elapsed, stored))
+        finally:
+            path_obj = bpy.data.objects.get(f"{tmp.name}_滑动路径")
+            if path_obj:
+                path_mesh = path_obj.data
+                bpy.data.objects.remove(path_obj)
+                bpy.data.meshes.remove(path_mesh)
+            mesh = tmp.data
+            bpy.data.objects.remove(tmp)
+            bpy.data.meshes.remove(mesh)
+
+    run("旧版形态键", lambda o: create_advanced_sliding_animation(context, total_steps, auto_frame_range=False))
+    run("排序形态键", lambda o: create_fast_shape_key_slide(o, total_steps, False, 1, False))
+    run("几何节点", lambda o: create_geonodes_slide(o, total_steps, False, 1, False))
+
+    print(f"管道滑动基准: {num_verts} 顶点, {total_steps} 步")
+    for label, elapsed, stored in results:
+        print(f"  {label:<8} {elapsed * 1000:8.1f} ms   数据 {stored / 2**20:8.2f} MB")
+    return results
+
+
 class MESH_OT_advanced_sliding_collapse_popup(bpy.types.Operator):
     """管道高级滑动动画操作符"""
     bl_idname = "mesh.advanced_sliding_collapse_popup"
@@ -176,19 +443,51 @@ class MESH_OT_advanced_sliding_collapse_popup(bpy.types.Operator):
         default=True
     )
 
+    method: bpy.props.EnumProperty(
+        name="实现方式",
+        items=[
+            ('SHAPE_KEYS', "形态键(排序)", "排序一次后向量化生成逐步形态键，结果与旧版相同"),
+            ('LEGACY', "形态键(旧版)", "原始的逐步掩码实现"),
+            ('GEONODES', "几何节点(稀疏)",
+             "每顶点只存一个步数属性，由一个几何节点修改器驱动 (GLB/FBX 导出带不走，需要时手动选)"),
+        ],
+        default='SHAPE_KEYS'
+    )
+
+    run_benchmark: bpy.props.BoolProperty(
+        name="先跑基准",
+        description="在临时副本上比较三种实现的耗时和数据量，结果输出到控制台",
+        default=False
+    )
+
     @classmethod
     def poll(cls, context):
         return context.active_object is not None and context.active_object.type == 'MESH'
 
     def execute(self, context):
-        return create_advanced_sliding_animation(
-            context,
-            self.total_steps,
-            self.reverse,
-            self.start_frame,
-            self.auto_frame_range,
-            self.reverse_animation
-        )
+        if self.run_benchmark:
+            benchmark_slide_methods(context, self.total_steps)
+
+        if self.method == 'LEGACY':
+            return create_advanced_sliding_animation(
+                context,
+                self.total_steps,
+                self.reverse,
+                self.start_frame,
+                self.auto_frame_range,
+                self.reverse_animation
+            )
+
+        obj = context.active_object
+        if obj.mode != 'OBJECT':
+            bpy.ops.object.mode_set(mode='OBJECT')
+        create = create_geonodes_slide if self.method == 'GEONODES' else create_fast_shape_key_slide
+        if create(obj, self.total_steps, self.reverse, self.start_frame, self.reverse_animation) is None:
+            return {'CANCELLED'}
+        if self.auto_frame_range:
+            context.scene.frame_start = self.start_frame
+            context.scene.frame_end = self.start_frame + self.total_steps + 2
+        return {'FINISHED'}
 
     def invoke(self, context, event):
         self.start_frame = context.scene.frame_current
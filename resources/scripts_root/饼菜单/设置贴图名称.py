@@ -10,7 +10,10 @@
 import bpy
 import re
 import os
+import json
+import runpy
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from bpy.props import CollectionProperty, BoolProperty, PointerProperty, StringProperty, IntProperty
 from bpy.types import Operator, PropertyGroup
 
@@ -18,7 +21,7 @@ from bpy.types import Operator, PropertyGroup
 _classes_to_register = []
 
 # ===================================================================
-# 1. 核心转换逻辑 (无改动)
+# 1. 核心转换逻辑
 # ===================================================================
 
 # 贴图类型映射
@@ -37,52 +40,281 @@ texture_type_map = {
 def sanitize_name(name):
     return re.sub(r'[^\w-]', '_', name.split('.')[0]).rstrip('_')
 
-def traverse_node_tree(node, visited=None):
-    visited = visited or set()
-    if node in visited: return []
-    visited.add(node)
-    textures = []
-    if node.type == 'TEX_IMAGE': textures.append(node)
-    for input_socket in node.inputs:
-        if input_socket.is_linked:
-            for link in input_socket.links:
-                textures.extend(traverse_node_tree(link.from_node, visited))
-    return list(set(textures))
-
-def rename_and_relink_texture(tex_node, new_name, unpack_path):
-    image = tex_node.image
-    if not image:
-        print(f"节点 '{tex_node.name}' 没有图像，已跳过。")
-        return False
-    ext = ".jpg"
-    new_filename = f"{new_name}{ext}"
-    new_path = os.path.join(unpack_path, new_filename)
+# 共享工具 (导出预设、导出清单、材质节点索引等) 统一由 99未分类/共享加载.py 取出或安装
+load_shared = runpy.run_path(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(globals().get("__file__", "")))),
+                                          "99未分类", "共享加载.py"))["load_shared"]
+
+
+# ===================================================================
+# 1.5 规划 / 执行 (先算出完整的重命名计划，再统一执行)
+# ===================================================================
+
+ROLLBACK_LOG_NAME = ".rename_rollback.json"
+
+
+def source_extension(image):
+    """按真实数据决定扩展名：打包数据看文件头，外部文件沿用原扩展名，纯内存图保存成 JPG"""
     if image.packed_file:
-        image.unpack(method='WRITE_LOCAL')
+        head = bytes(image.packed_file.data[:4])
+        if head == b"\x89PNG":
+            return ".png"
+        if head[:2] == b"\xff\xd8":
+            return ".jpg"
+        return os.path.splitext(image.filepath)[1].lower() or ".png"
     old_path = bpy.path.abspath(image.filepath)
-    try:
-        if not os.path.exists(old_path):
-            original_settings = image.file_format
+    if image.filepath and os.path.exists(old_path):
+        return os.path.splitext(old_path)[1].lower()
+    return ".jpg"
+
+
+def build_rename_plan(materials, unpack_path):
+    """
+    规划器：材质 -> 插槽用途 -> 图像 -> 目标文件名。
+    一次线性遍历；共享图像只取第一次出现时的名字，目标重名时按 _1/_2 顺延。
+    返回 (steps, report)，steps 中每张图像只出现一次。
+    """
+    index = load_shared("material_graph_index", "5材质贴图/材质节点索引.py")
+    steps = {}            # image.name_full -> step
+    claimed = {}          # 目标名 -> image.name_full
+    report = {"shared": [], "collisions": []}
+
+    for mat in sorted(materials, key=lambda m: m.name):
+        graph = index.get(mat)
+        if graph is None:
+            continue
+        principled = next(iter(graph.nodes_of_type('BSDF_PRINCIPLED')), None)
+        if not principled:
+            continue
+        base_name = sanitize_name(mat.name)
+        for inp in principled.inputs:
+            texture_nodes = [n for n in graph.images_for_socket(inp.name) if n.image]
+            tex_type = texture_type_map.get(inp.name, 'Other')
+            for i, tex_node in enumerate(texture_nodes):
+                image = tex_node.image
+                key = image.name_full
+                step = steps.get(key)
+                if step is not None:
+                    # 共享图像：沿用已分配的名字，只追加需要改名的节点
+                    step["nodes"].append((mat.name, tex_node.name))
+                    report["shared"].append((image.name, mat.name, step["target"]))
+                    continue
+
+                suffix = f"_{i}" if len(texture_nodes) > 1 else ""
+                wanted = target = f"{base_name}_{tex_type}{suffix}"
+                n = 1
+                while target in claimed:
+                    target = f"{wanted}_{n}"
+                    n += 1
+                if target != wanted:
+                    report["collisions"].append((image.name, wanted, target))
+                claimed[target] = key
+
+                ext = source_extension(image)
+                old_path = bpy.path.abspath(image.filepath) if image.filepath else ""
+                if image.packed_file:
+                    source = 'PACKED'
+                elif old_path and os.path.exists(old_path):
+                    source = 'FILE'
+                else:
+                    source = 'MEMORY'
+                steps[key] = {
+                    "image": image,
+                    "target": target,
+                    "path": os.path.join(unpack_path, f"{target}{ext}"),
+                    "source": source,
+                    "old_path": old_path,
+                    "nodes": [(mat.name, tex_node.name)],
+                }
+    return list(steps.values()), report
+
+
+def _norm(path):
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _write_step(step, payload, source_path=None):
+    """线程池中执行：把打包数据写出来，或移动外部文件。返回回滚记录"""
+    new_path = step["path"]
+    if step["source"] == 'PACKED':
+        backup = None
+        if os.path.exists(new_path):
+            backup = new_path + ".bak_rename"
+            os.replace(new_path, backup)
+        with open(new_path, "wb") as f:
+            f.write(payload)
+        return {"op": "create", "path": new_path, "backup": backup}
+    old_path = source_path or step["old_path"]
+    if _norm(old_path) == _norm(new_path):
+        return {"op": "noop"}
+    backup = None
+    if os.path.exists(new_path):
+        backup = new_path + ".bak_rename"
+        os.replace(new_path, backup)
+    os.replace(old_path, new_path)
+    return {"op": "move", "src": old_path, "dst": new_path, "backup": backup}
+
+
+def order_file_steps(file_steps):
+    """
+    把文件步骤排成若干条互不相干的链，链内必须按顺序执行：
+    A->B 且 B->C 时，先把 B 挪到 C 腾出位置，再把 A 挪到 B。
+    同一个源文件被多个数据块引用时只移动一次，其余数据块跟着指向移动后的文件。
+    返回 (chains, aliases)；chains 里每项是 (步骤, 是否先挪到临时文件打破环)
+    """
+    by_source, aliases, unique = {}, [], []
+    for step in file_steps:
+        if step["source"] == 'FILE':
+            first = by_source.get(_norm(step["old_path"]))
+            if first is not None:
+                aliases.append((step, first))
+                continue
+            by_source[_norm(step["old_path"])] = step
+        unique.append(step)
+
+    # before[id(s)]：目标位置上现在的文件属于哪个步骤，那个步骤要先执行
+    before = {}
+    for step in unique:
+        blocker = by_source.get(_norm(step["path"]))
+        if blocker is not None and blocker is not step:
+            before[id(step)] = blocker
+    needed_by = {id(b) for b in before.values()}
+
+    chains, seen = [], set()
+    for step in unique:
+        if id(step) in needed_by:
+            continue                      # 不是链尾，从链尾往前走时会收进来
+        chain = []
+        while step is not None and id(step) not in seen:
+            seen.add(id(step))
+            chain.append((step, False))
+            step = before.get(id(step))
+        chains.append(chain[::-1])
+    for step in unique:
+        if id(step) in seen:
+            continue
+        # 剩下的都在环里 (A->B, B->A)：环上第一个先挪到临时文件，最后再从临时文件挪到目标
+        chain = []
+        while id(step) not in seen:
+            seen.add(id(step))
+            chain.append((step, False))
+            step = before[id(step)]
+        chain = chain[::-1]
+        chains.append([(chain[-1][0], True)] + chain[:-1] + [(chain[-1][0], False)])
+    return chains, aliases
+
+
+def _run_chain(chain, payloads):
+    """线程池中执行一条链；返回 (已完成的回滚记录, 失败的 (步骤, 异常) 或 None)"""
+    records, temp_source = [], {}
+    for step, to_temp in chain:
+        try:
+            if to_temp:
+                tmp_path = step["old_path"] + ".tmp_rename"
+                os.replace(step["old_path"], tmp_path)
+                records.append({"op": "move", "src": step["old_path"], "dst": tmp_path, "backup": None})
+                temp_source[id(step)] = tmp_path
+                continue
+            records.append(_write_step(step, payloads.get(id(step)), temp_source.get(id(step))))
+        except OSError as e:
+            return records, (step, e)
+    return records, None
+
+
+def rollback_files(records):
+    for rec in reversed(records):
+        try:
+            if rec["op"] == "create":
+                if os.path.exists(rec["path"]):
+                    os.remove(rec["path"])
+            elif rec["op"] == "move":
+                os.replace(rec["dst"], rec["src"])
+            else:
+                continue
+            if rec.get("backup"):
+                os.replace(rec["backup"], rec.get("path") or rec["dst"])
+        except OSError as e:
+            print(f"回滚失败 {rec}: {e}")
+
+
+def rollback_from_log(log_path):
+    """按日志手动回滚文件操作 (数据块请用 Ctrl+Z 撤销)"""
+    with open(log_path, "r", encoding="utf-8") as f:
+        rollback_files(json.load(f)["files"])
+
+
+def execute_rename_plan(steps, unpack_path, workers=None):
+    """
+    执行器：文件写入/移动按依赖排成链，链与链之间在线程池里并行，全部成功后再一次性改数据块；
+    任何文件操作失败都会按回滚日志撤销已完成的部分。
+    """
+    records = []
+    memory_steps = [s for s in steps if s["source"] == 'MEMORY']
+    file_steps = [s for s in steps if s["source"] != 'MEMORY']
+    failed = []
+
+    chains, aliases = order_file_steps(file_steps)
+    for step, first in aliases:
+        # 与 first 共用同一个源文件：不再移动，直接指向它移动后的位置
+        step["path"] = first["path"]
+
+    # 打包数据只能在主线程取出，取出后交给线程池写盘；有先后依赖的步骤在同一条链里串行
+    payloads = {id(s): s["image"].packed_file.data for s in file_steps if s["source"] == 'PACKED'}
+    with ThreadPoolExecutor(max_workers=workers or min(8, (os.cpu_count() or 4))) as pool:
+        for chain_records, error in pool.map(lambda chain: _run_chain(chain, payloads), chains):
+            records.extend(chain_records)
+            if error is not None:
+                failed.append(error)
+
+    # 内存中的图像 (无文件) 只能由 Blender 自己保存
+    for step in memory_steps:
+        image = step["image"]
+        original_settings = image.file_format
+        try:
             image.file_format = 'JPEG'
-            image.save(filepath=new_path, quality=80)
+            image.save(filepath=step["path"], quality=80)
+            records.append({"op": "create", "path": step["path"], "backup": None})
+        except Exception as e:
+            failed.append((step, e))
+        finally:
             image.file_format = original_settings
-        elif old_path != new_path:
-            if os.path.exists(new_path):
-                os.remove(new_path)
-            os.rename(old_path, new_path)
-    except Exception as e:
-        print(f"处理文件失败: '{old_path}' -> '{new_path}': {e}")
-        return False
-    image.filepath = new_path
-    image.reload()
-    existing_image = bpy.data.images.get(new_name)
-    if existing_image and existing_image != image:
-        existing_image.user_remap(image)
-        bpy.data.images.remove(existing_image)
-    image.name = new_name
-    tex_node.name = new_name
-    print(f"贴图已重命名并重新链接: {new_name}")
-    return True
+
+    log_path = os.path.join(unpack_path, ROLLBACK_LOG_NAME)
+    if failed:
+        for step, e in failed:
+            print(f"处理文件失败: '{step['old_path']}' -> '{step['path']}': {e}")
+        rollback_files(records)
+        return False, len(failed)
+
+    with open(log_path, "w", encoding="utf-8") as f:
+        json.dump({"files": records,
+                   "datablocks": [{"image": s["image"].name, "filepath": s["image"].filepath,
+                                   "target": s["target"]} for s in steps]},
+                  f, ensure_ascii=False, indent=2)
+
+    # 数据块：所有文件就位后一次性改名、改路径
+    planned = {s["image"].name_full for s in steps}
+    for step in steps:
+        image = step["image"]
+        image.filepath = step["path"]
+        if image.packed_file:
+            image.unpack(method='REMOVE')
+        image.reload()
+        existing_image = bpy.data.images.get(step["target"])
+        if existing_image and existing_image != image and existing_image.name_full not in planned:
+            existing_image.user_remap(image)
+            bpy.data.images.remove(existing_image)
+    # 两段式改名，避免计划内的图像互相占用目标名而被自动加 .001
+    for step in steps:
+        step["image"].name = f"__brt_tmp_{step['target']}"
+    for step in steps:
+        step["image"].name = step["target"]
+        for mat_name, node_name in step["nodes"]:
+            mat = bpy.data.materials.get(mat_name)
+            node = mat.node_tree.nodes.get(node_name) if mat and mat.node_tree else None
+            if node:
+                node.name = step["target"]
+        print(f"贴图已重命名并重新链接: {step['target']}")
+    return True, 0
 
 # ===================================================================
 # 2. UI 和操作符定义 (重构为以材质为中心)
@@ -189,23 +421,6 @@ class BRT_OT_SmartBatchRename(Operator):
             user_row.alignment = 'RIGHT' # 让图标和文字靠右一点
             user_row.label(text=f"使用者: {item.users}", icon='OBJECT_DATA')
 
-    def _process_material(self, mat, unpack_path):
-        print("-" * 40)
-        print(f"正在处理材质: {mat.name}")
-        if not mat.use_nodes or not mat.node_tree: return
-        principled = next((n for n in mat.node_tree.nodes if n.type == 'BSDF_PRINCIPLED'), None)
-        if not principled: return
-        base_name = sanitize_name(mat.name)
-        for inp in principled.inputs:
-            if not inp.is_linked: continue
-            start_node = inp.links[0].from_node
-            texture_nodes = traverse_node_tree(start_node)
-            tex_type = texture_type_map.get(inp.name, 'Other')
-            for i, tex_node in enumerate(texture_nodes):
-                suffix = f"_{i}" if len(texture_nodes) > 1 else ""
-                new_name = f"{base_name}_{tex_type}{suffix}"
-                rename_and_relink_texture(tex_node, new_name, unpack_path)
-    
     def execute(self, context):
         materials_to_process = set()
         if self.direct_execute:
@@ -221,9 +436,16 @@ class BRT_OT_SmartBatchRename(Operator):
         else:
             unpack_path = bpy.path.abspath("//textures/")
             os.makedirs(unpack_path, exist_ok=True)
-            for mat in materials_to_process:
-                self._process_material(mat, unpack_path)
-            self.report({'INFO'}, f"处理完成！共处理了 {len(materials_to_process)} 个材质。")
+            steps, plan_report = build_rename_plan(materials_to_process, unpack_path)
+            for image_name, mat_name, target in plan_report["shared"]:
+                print(f"共享贴图 '{image_name}' (材质 '{mat_name}') 沿用名字: {target}")
+            for image_name, wanted, target in plan_report["collisions"]:
+                print(f"目标名冲突 '{wanted}'，贴图 '{image_name}' 改用: {target}")
+            ok, failed = execute_rename_plan(steps, unpack_path)
+            if ok:
+                self.report({'INFO'}, f"处理完成！共处理了 {len(materials_to_process)} 个材质、{len(steps)} 张贴图。")
+            else:
+                self.report({'ERROR'}, f"{failed} 个文件处理失败，已回滚所有文件操作，数据块未改动。")
         
         unregister()
         return {'FINISHED'}